@@ -0,0 +1,106 @@
+"""Admission control for expensive AI moves.
+
+Time-budgeted policies (those with a ``budget``: alpha-beta, mnk search,
+MCTS) hold one of ``concurrency`` slots while they think. Up to
+``queue_max`` more requests wait for a slot. A request is shed, and the
+caller plays the cheap heuristic instead, when
+
+    - the queue is already full, or
+    - it cannot start before its deadline minus the policy's expected
+      cost (a moving average of its recent move times).
+
+Table lookups and heuristics cost microseconds and never queue. With
+concurrency 0 every move is computed directly.
+
+Waiting blocks the calling thread, so moves must be computed on threads:
+Flask's request threads, or asgi_app's game pool (never the event loop).
+"""
+import threading
+import time
+
+# Weight of the newest move time in a policy's expected cost
+EWMA_WEIGHT = 0.2
+
+
+class Admission:
+    def __init__(self, concurrency=1, queue_max=4, deadline=0.5, clock=time.monotonic):
+        self.concurrency = concurrency
+        self.queue_max = queue_max
+        self.deadline = deadline
+        self.clock = clock
+        self.running = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.admitted = 0
+        self.shed_full = 0
+        self.shed_deadline = 0
+        self._cost = {}
+        self._cond = threading.Condition()
+
+    def expected_cost(self, policy):
+        return self._cost.get(policy, getattr(policy, 'budget', 0.0))
+
+    def _admit(self, policy, deadline):
+        # None once a slot is held, else why the request is shed
+        cost = self.expected_cost(policy)
+        with self._cond:
+            if self.running >= self.concurrency:
+                if self.waiting >= self.queue_max:
+                    self.shed_full += 1
+                    return 'queue_full'
+                self.waiting += 1
+                self.max_waiting = max(self.max_waiting, self.waiting)
+                try:
+                    while self.running >= self.concurrency:
+                        timeout = deadline - cost - self.clock()
+                        if timeout <= 0:
+                            break
+                        self._cond.wait(timeout)
+                finally:
+                    self.waiting -= 1
+            if self.running >= self.concurrency or self.clock() + cost > deadline:
+                self.shed_deadline += 1
+                # Pass on a wake-up this request may have taken from another
+                self._cond.notify()
+                return 'deadline'
+            self.running += 1
+            self.admitted += 1
+            return None
+
+    def best_move(self, policy, x, o, deadline=None):
+        """Return (move, None) if admitted in time, else (None, reason shed).
+
+        deadline is in seconds from now; the default is self.deadline.
+        """
+        if not self.concurrency:
+            return policy.best_move(x, o), None
+        shed = self._admit(policy, self.clock() + (self.deadline if deadline is None else deadline))
+        if shed:
+            return None, shed
+        try:
+            began = self.clock()
+            move = policy.best_move(x, o)
+            cost = self._cost.get(policy)
+            took = self.clock() - began
+            self._cost[policy] = took if cost is None else cost + EWMA_WEIGHT * (took - cost)
+            return move, None
+        finally:
+            with self._cond:
+                self.running -= 1
+                self._cond.notify()
+
+    def stats(self):
+        shed = self.shed_full + self.shed_deadline
+        decided = self.admitted + shed
+        return {
+            'concurrency': self.concurrency,
+            'queue_max': self.queue_max,
+            'deadline_ms': self.deadline * 1000,
+            'running': self.running,
+            'queue_depth': self.waiting,
+            'max_queue_depth': self.max_waiting,
+            'admitted': self.admitted,
+            'shed_queue_full': self.shed_full,
+            'shed_deadline': self.shed_deadline,
+            'fallback_rate': shed / decided if decided else 0.0,
+        }
@@ -1,16 +1,54 @@
+import os
+import resource
+import uuid
+
 import streamlit as st
-import random
-import time
+
+import mnk
+import policies
+import rules
 
 st.set_page_config(page_title="Tic Tac Toe AI", layout="centered")
+
+# DEBUG_COUNTERS=1 shows how often the script and the board fragment ran
+# (read by benchmarks/bench_streamlit.py)
+DEBUG_COUNTERS = os.environ.get("DEBUG_COUNTERS") == "1"
+
+# Board presets: (rows, cols, k in a row)
+SIZES = {
+    "3×3, 3 in a row": (3, 3, 3),
+    "4×4, 4 in a row": (4, 4, 4),
+    "5×5, 4 in a row": (5, 5, 4),
+    "7×7, 5 in a row": (7, 7, 5),
+    "15×15 gomoku": (15, 15, 5),
+}
 st.title("🎮 Tic Tac Toe AI")
 st.write("Fast Q-Learning AI (Player vs AI)")
 
+# -----------------------------
+# Shared resources
+# -----------------------------
+@st.cache_resource
+def ai_policy(level=None):
+    # Loaded once per process and shared, read-only, by every session;
+    # per-session state below only holds the two bitboards and scores
+    return policies.level(level) if level else policies.default_policy()
+
+def process_rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / 2 ** 20
+    except OSError:
+        # No /proc (macOS): fall back to peak RSS, which is reported in bytes there
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 20
+
 # -----------------------------
 # Initialize game state
 # -----------------------------
-if "board" not in st.session_state:
-    st.session_state.board = [0] * 9
+if "x" not in st.session_state:
+    st.session_state.x = 0
+if "o" not in st.session_state:
+    st.session_state.o = 0
 if "current_player" not in st.session_state:
     st.session_state.current_player = 1
 if "done" not in st.session_state:
@@ -29,75 +67,57 @@ if "ai_match_wins" not in st.session_state:
     st.session_state.ai_match_wins = 0
 if "match_over" not in st.session_state:
     st.session_state.match_over = False
+if "moves" not in st.session_state:
+    st.session_state.moves = []
+if "level" not in st.session_state:
+    st.session_state.level = None
+if "size" not in st.session_state:
+    st.session_state.size = mnk.STANDARD
+if "game_id" not in st.session_state:
+    st.session_state.game_id = uuid.uuid4().hex
 
 # -----------------------------
 # Helper functions
 # -----------------------------
-def check_winner(board):
-    wins = [
-        [0,1,2],[3,4,5],[6,7,8],
-        [0,3,6],[1,4,7],[2,5,8],
-        [0,4,8],[2,4,6]
-    ]
-    for line in wins:
-        if board[line[0]] != 0 and board[line[0]] == board[line[1]] == board[line[2]]:
-            return board[line[0]]
-    if 0 not in board:
-        return 0
-    return None
-
 def make_move(pos, player):
-    if st.session_state.done or st.session_state.match_over:
+    state = st.session_state
+    if state.done or state.match_over:
         return
-    if st.session_state.board[pos] == 0:
-        st.session_state.board[pos] = player
-        winner = check_winner(st.session_state.board)
-        if winner is not None:
-            st.session_state.done = True
-            st.session_state.winner = winner
-            if winner == 1:
-                st.session_state.round_wins += 1
-                st.session_state.player_match_wins += 1
-            elif winner == -1:
-                st.session_state.round_losses += 1
-                st.session_state.ai_match_wins += 1
-            else:
-                st.session_state.round_draws += 1
-            if st.session_state.player_match_wins >= 3 or st.session_state.ai_match_wins >= 3:
-                st.session_state.match_over = True
-        else:
-            st.session_state.current_player = -player
+    placed = rules.place(state.x, state.o, state.size, pos, player)
+    if placed is None:
+        return
+    state.moves.append(pos)
+    state.x, state.o = placed
+    winner = rules.board_winner(state.x, state.o, state.size, pos, player)
+    if winner is not None:
+        log = rules.move_log() if state.size == mnk.STANDARD else None
+        if log is not None:
+            log.append(state.moves, winner, ai_choice().stats()["policy"], state.game_id)
+        state.done = True
+        state.winner = winner
+        scores = (state.round_wins, state.round_losses, state.round_draws,
+                  state.player_match_wins, state.ai_match_wins)
+        scores, state.match_over = rules.tally(scores, winner)
+        (state.round_wins, state.round_losses, state.round_draws,
+         state.player_match_wins, state.ai_match_wins) = scores
+    else:
+        state.current_player = -player
+
+def ai_choice():
+    if st.session_state.size != mnk.STANDARD:
+        return mnk.policy(st.session_state.level, st.session_state.size)
+    return ai_policy(st.session_state.level)
 
 def ai_choose_move():
-    available = [i for i, v in enumerate(st.session_state.board) if v == 0]
-    # Try to win
-    for move in available:
-        test_board = st.session_state.board[:]
-        test_board[move] = -1
-        if check_winner(test_board) == -1:
-            return move
-    # Block player
-    for move in available:
-        test_board = st.session_state.board[:]
-        test_board[move] = 1
-        if check_winner(test_board) == 1:
-            return move
-    # Take center
-    if 4 in available:
-        return 4
-    # Take corners
-    corners = [0,2,6,8]
-    corner_moves = [m for m in available if m in corners]
-    if corner_moves:
-        return random.choice(corner_moves)
-    # Random
-    return random.choice(available)
+    return ai_choice().best_move(st.session_state.x, st.session_state.o)
 
 def reset_round():
-    st.session_state.board = [0]*9
+    st.session_state.x = 0
+    st.session_state.o = 0
     st.session_state.current_player = 1
     st.session_state.done = False
     st.session_state.winner = None
+    st.session_state.moves = []
 
 def reset_match():
     reset_round()
@@ -108,72 +128,76 @@ def reset_match():
     st.session_state.ai_match_wins = 0
     st.session_state.match_over = False
 
+def change_size():
+    st.session_state.size = SIZES[st.session_state.size_name]
+    reset_match()
+
 # -----------------------------
 # Game logic
 # -----------------------------
-def player_move(pos):
+def play(pos):
+    # Button callback: runs before the rerun it triggers, so the player's
+    # move and the AI's reply both land in that single pass
     if st.session_state.current_player == 1 and not st.session_state.done:
         make_move(pos, 1)
-        # AI moves after player
         if not st.session_state.done and not st.session_state.match_over:
-            st.session_state.current_player = -1
-            st.experimental_rerun()
-
-def ai_move():
-    if st.session_state.current_player == -1 and not st.session_state.done:
-        time.sleep(0.3)  # AI thinking delay
-        pos = ai_choose_move()
-        make_move(pos, -1)
-        st.session_state.current_player = 1
-        st.experimental_rerun()
+            make_move(ai_choose_move(), -1)
 
-# Run AI move automatically
-if st.session_state.current_player == -1 and not st.session_state.done:
-    ai_move()
+st.session_state.script_runs = st.session_state.get("script_runs", 0) + 1
 
 # -----------------------------
 # Display board
 # -----------------------------
-st.subheader("🏆 Best of 3 Matches")
-st.write(f"Player: {st.session_state.player_match_wins} | AI: {st.session_state.ai_match_wins}")
-st.write(f"Wins: {st.session_state.round_wins} | Losses: {st.session_state.round_losses} | Draws: {st.session_state.round_draws}")
-
-# Render HTML board with improved style
-board_html = '<div style="display:grid; grid-template-columns: repeat(3, 100px); gap:8px; justify-content:center; margin-bottom:15px;">'
-for idx, cell in enumerate(st.session_state.board):
-    color = "#dc3545" if cell == 1 else "#007bff" if cell == -1 else "#f8f9fa"
-    label = "X" if cell == 1 else "O" if cell == -1 else ""
-    board_html += f'''
-        <button style="
-            width:100px;height:100px;font-size:36px;font-weight:bold;
-            color:{color};border-radius:12px;border:2px solid #e9ecef;
-            background:#f8f9fa;cursor:pointer;box-shadow:0 4px 8px rgba(0,0,0,0.1);
-            transition: all 0.2s;" onclick="window.location.href='?move={idx}'">{label}</button>
-    '''
-board_html += '</div>'
-st.markdown(board_html, unsafe_allow_html=True)
-
-# Handle player click using st.query_params
-move_idx = st.query_params.get("move")
-if move_idx:
-    player_move(int(move_idx[0]))
+@st.fragment
+def game_view():
+    # Clicks inside the fragment rerun only this function, not the script
+    st.session_state.board_runs = st.session_state.get("board_runs", 0) + 1
 
-# -----------------------------
-# Round/Match Results
-# -----------------------------
-if st.session_state.match_over:
-    if st.session_state.player_match_wins >= 3:
-        st.success("🎉 You won the match!")
-    else:
-        st.error("🤖 AI won the match!")
-elif st.session_state.done:
-    if st.session_state.winner == 1:
-        st.success("✅ You win this round!")
-    elif st.session_state.winner == -1:
-        st.error("🤖 AI wins this round!")
-    else:
-        st.info("🤝 Draw!")
+    st.selectbox("AI level", (None,) + policies.LEVELS, key="level",
+                 format_func=lambda level: level or "default")
+    st.selectbox("Board", tuple(SIZES), key="size_name", on_change=change_size)
+
+    st.subheader("🏆 Best of 3 Matches")
+    st.write(f"Player: {st.session_state.player_match_wins} | AI: {st.session_state.ai_match_wins}")
+    st.write(f"Wins: {st.session_state.round_wins} | Losses: {st.session_state.round_losses} | Draws: {st.session_state.round_draws}")
+
+    locked = st.session_state.done or st.session_state.match_over
+    rows, cols, _ = st.session_state.size
+    cells = mnk.to_cells(mnk.geometry(*st.session_state.size), st.session_state.x, st.session_state.o)
+    for row in range(rows):
+        for col, column in enumerate(st.columns(cols, gap="small")):
+            idx = row * cols + col
+            cell = cells[idx]
+            label = ":red[**X**]" if cell == 1 else ":blue[**O**]" if cell == -1 else "\u00a0"
+            column.button(label, key=f"cell-{idx}", on_click=play, args=(idx,),
+                          disabled=locked or cell != 0, use_container_width=True)
+
+    # -----------------------------
+    # Round/Match Results
+    # -----------------------------
+    if st.session_state.match_over:
+        if st.session_state.player_match_wins >= 3:
+            st.success("🎉 You won the match!")
+        else:
+            st.error("🤖 AI won the match!")
+    elif st.session_state.done:
+        if st.session_state.winner == 1:
+            st.success("✅ You win this round!")
+        elif st.session_state.winner == -1:
+            st.error("🤖 AI wins this round!")
+        else:
+            st.info("🤝 Draw!")
+
+    # Reset buttons
+    st.button("🔄 Reset Round", on_click=reset_round)
+    st.button("🏁 Reset Match", on_click=reset_match)
+    if DEBUG_COUNTERS:
+        st.caption(f"Script runs: {st.session_state.script_runs} | Board renders: {st.session_state.board_runs}")
+
+game_view()
 
-# Reset buttons
-st.button("🔄 Reset Round", on_click=reset_round)
-st.button("🏁 Reset Match", on_click=reset_match)
+stats = ai_policy().stats()
+st.sidebar.caption(
+    f"AI: {stats['policy']} policy, {stats.get('bytes', 0) / 1024:.1f} KB, one copy shared by all sessions  \n"
+    f"Process memory: {process_rss_mb():.0f} MB RSS"
+)
@@ -0,0 +1,253 @@
+"""Headless AI-vs-AI tournaments for measuring policy strength and speed.
+
+Plays games between two policies across a process pool (no Flask or
+Streamlit involved) and reports win/draw/loss rates for the first policy,
+per-move latency percentiles for each side and games/sec:
+
+    python arena.py perfect random --games 1000000 --workers 0
+    python arena.py alphabeta heuristic --size 7 7 5 --games 200
+    python arena.py perfect qlearning --report arena.json --min-score 0.5 --max-p99-ms 1
+
+Policies are the names policies.load() accepts on 3x3 (perfect, qlearning,
+alphabeta, mcts, heuristic, random, or 'default' for AI_POLICY), and the
+mnk.policy() levels on other boards. The two swap sides every game; with
+--openings N the first N plies of each game are random, so deterministic
+policies don't replay one game. A policy that returns an illegal move
+forfeits.
+
+--report writes the results as JSON. The --min-score, --max-loss-rate and
+--max-p99-ms gates are checked against the first policy, recorded in the
+report, and make the exit status 1 when any fails, for CI.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import mnk
+
+# Latencies are counted in buckets of 2.5% width; percentiles are reported
+# at the bucket's upper edge
+BUCKET_BASE = math.log(1.025)
+OUTCOMES = ('win', 'draw', 'loss')
+
+
+def get_policy(name, size):
+    if size == mnk.STANDARD:
+        import policies
+        return policies.default_policy() if name == 'default' else policies.level(name)
+    return mnk.policy(None if name == 'default' else name, size)
+
+
+# -----------------------------
+# Games
+# -----------------------------
+def play(g, players, openings, rng, latencies):
+    """Play one game; players[0] moves first. Returns (winner index or None, forfeit)."""
+    x = o = 0
+    for ply in range(g.cells):
+        turn = ply & 1
+        if ply < openings:
+            cell = rng.choice(mnk.cells_of(g.full & ~(x | o)))
+        else:
+            start = time.perf_counter_ns()
+            cell = players[turn].best_move(x, o)
+            elapsed = time.perf_counter_ns() - start
+            bucket = int(math.log(elapsed or 1) / BUCKET_BASE) + 1
+            counts = latencies[turn]
+            counts[bucket] = counts.get(bucket, 0) + 1
+            if not isinstance(cell, int) or not 0 <= cell < g.cells or (x | o) >> cell & 1:
+                return 1 - turn, True
+        if turn == 0:
+            x |= 1 << cell
+            if mnk.wins(g, x, cell):
+                return 0, False
+        else:
+            o |= 1 << cell
+            if mnk.wins(g, o, cell):
+                return 1, False
+    return None, False
+
+
+def play_chunk(names, size, first, games, openings, seed):
+    """Play games[first:first + games] in this process; return partial results."""
+    random.seed(seed)  # the policies draw from the global generator
+    rng = random.Random(seed)
+    g = mnk.geometry(*size)
+    a, b = get_policy(names[0], size), get_policy(names[1], size)
+    # Outcomes for policy A, overall and by the side it played
+    results = {side: dict.fromkeys(OUTCOMES, 0) for side in ('x', 'o')}
+    forfeits = [0, 0]
+    latencies = ({}, {})  # per policy: bucket -> moves
+    for n in range(first, first + games):
+        a_first = n % 2 == 0
+        players = (a, b) if a_first else (b, a)
+        lat = latencies if a_first else latencies[::-1]
+        winner, forfeit = play(g, players, openings, rng, lat)
+        side = 'x' if a_first else 'o'
+        if winner is None:
+            results[side]['draw'] += 1
+            continue
+        a_won = (winner == 0) == a_first
+        results[side]['win' if a_won else 'loss'] += 1
+        if forfeit:
+            forfeits[1 if a_won else 0] += 1
+    return results, forfeits, latencies
+
+
+# -----------------------------
+# Aggregation
+# -----------------------------
+def merge(total, part):
+    for key, value in part.items():
+        if isinstance(value, dict):
+            merge(total.setdefault(key, {}), value)
+        else:
+            total[key] = total.get(key, 0) + value
+
+
+def percentiles(buckets):
+    moves = sum(buckets.values())
+    if not moves:
+        return {'moves': 0}
+    report = {'moves': moves}
+    edges = sorted(buckets)
+    for p in (50, 90, 99, 99.9):
+        rank, seen = math.ceil(moves * p / 100), 0
+        for edge in edges:
+            seen += buckets[edge]
+            if seen >= rank:
+                report[f'p{p:g}_us'] = round(math.exp(edge * BUCKET_BASE) / 1000, 3)
+                break
+    report['max_us'] = round(math.exp(edges[-1] * BUCKET_BASE) / 1000, 3)
+    return report
+
+
+def rates(counts):
+    games = sum(counts.values())
+    return dict(counts, games=games, **{f'{k}_rate': counts[k] / games if games else 0.0 for k in OUTCOMES})
+
+
+def run(a, b, size=mnk.STANDARD, games=10000, workers=1, chunk=None, openings=0, seed=0):
+    """Play the tournament and return the report dict (without gates)."""
+    workers = workers or os.cpu_count() or 1
+    chunk = chunk or max(1, min(10000, -(-games // (workers * 4))))
+    jobs = [(first, min(chunk, games - first)) for first in range(0, games, chunk)]
+    names = (a, b)
+    results, forfeits, latencies = {}, {}, [{}, {}]
+
+    def collect(part):
+        merge(results, part[0])
+        merge(forfeits, dict(enumerate(part[1])))
+        for total, buckets in zip(latencies, part[2]):
+            merge(total, buckets)
+
+    start = time.perf_counter()
+    if workers == 1:
+        for first, n in jobs:
+            collect(play_chunk(names, size, first, n, openings, seed + first))
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            futures = [pool.submit(play_chunk, names, size, first, n, openings, seed + first)
+                       for first, n in jobs]
+            for future in futures:
+                collect(future.result())
+    elapsed = time.perf_counter() - start
+
+    overall = {k: results['x'][k] + results['o'][k] for k in OUTCOMES}
+    summary = rates(overall)
+    return {
+        'a': a,
+        'b': b,
+        'size': list(size),
+        'games': games,
+        'workers': workers,
+        'openings': openings,
+        'seed': seed,
+        'seconds': round(elapsed, 3),
+        'games_per_sec': round(games / elapsed, 1),
+        'result': summary,
+        'score': (summary['win'] + summary['draw'] / 2) / games,
+        'a_as_x': rates(results['x']),
+        'a_as_o': rates(results['o']),
+        'forfeits': {'a': forfeits.get(0, 0), 'b': forfeits.get(1, 0)},
+        'latency': {'a': percentiles(latencies[0]), 'b': percentiles(latencies[1])},
+    }
+
+
+def check_gates(report, min_score=None, max_loss_rate=None, max_p99_ms=None):
+    """Evaluate the CI gates on policy A; return {name: {limit, value, passed}}."""
+    gates = {}
+    if min_score is not None:
+        gates['min_score'] = {'limit': min_score, 'value': report['score'],
+                              'passed': report['score'] >= min_score}
+    if max_loss_rate is not None:
+        value = report['result']['loss_rate']
+        gates['max_loss_rate'] = {'limit': max_loss_rate, 'value': value, 'passed': value <= max_loss_rate}
+    if max_p99_ms is not None:
+        value = report['latency']['a'].get('p99_us', 0) / 1000
+        gates['max_p99_ms'] = {'limit': max_p99_ms, 'value': value, 'passed': value <= max_p99_ms}
+    return gates
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('a', help='policy under test')
+    parser.add_argument('b', help='opponent policy')
+    parser.add_argument('--size', type=int, nargs=3, default=list(mnk.STANDARD), metavar=('ROWS', 'COLS', 'K'))
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--workers', type=int, default=1, help='processes (0 = all cores)')
+    parser.add_argument('--chunk', type=int, help='games per task sent to a worker')
+    parser.add_argument('--openings', type=int, default=0, help='random plies at the start of each game')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--report', help='write the JSON report here')
+    parser.add_argument('--min-score', type=float, help='fail below this score for A (win=1, draw=0.5)')
+    parser.add_argument('--max-loss-rate', type=float, help="fail if A loses more often")
+    parser.add_argument('--max-p99-ms', type=float, help="fail if A's p99 move latency is higher")
+    args = parser.parse_args(argv)
+
+    try:
+        size = mnk.check_size(*args.size)
+    except ValueError as e:
+        parser.error(str(e))
+    for name in (args.a, args.b):
+        try:
+            get_policy(name, size)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.games < 1:
+        parser.error('--games must be at least 1')
+    if args.workers < 0:
+        parser.error('--workers must be 0 (all cores) or more')
+    if args.chunk is not None and args.chunk < 1:
+        parser.error('--chunk must be at least 1')
+    report = run(args.a, args.b, size, args.games, args.workers, args.chunk, args.openings, args.seed)
+    report['gates'] = check_gates(report, args.min_score, args.max_loss_rate, args.max_p99_ms)
+    report['passed'] = all(gate['passed'] for gate in report['gates'].values())
+
+    result, lat = report['result'], report['latency']
+    print(f"{args.a} vs {args.b} on {size[0]}x{size[1]} k={size[2]}: {args.games} games in "
+          f"{report['seconds']:.1f} s ({report['games_per_sec']:,.0f} games/sec)")
+    print(f"  {args.a}: win {result['win_rate']:.2%}  draw {result['draw_rate']:.2%}  "
+          f"loss {result['loss_rate']:.2%}  score {report['score']:.3f}")
+    for key, name in (('a', args.a), ('b', args.b)):
+        if lat[key]['moves']:
+            print(f"  {name} move latency: p50 {lat[key]['p50_us']:.1f} us  p99 {lat[key]['p99_us']:.1f} us  "
+                  f"max {lat[key]['max_us']:.1f} us")
+    for name, gate in report['gates'].items():
+        print(f"  gate {name}: {gate['value']:.4g} (limit {gate['limit']:g}) {'ok' if gate['passed'] else 'FAILED'}")
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0 if report['passed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
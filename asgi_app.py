@@ -0,0 +1,260 @@
+"""Asyncio (ASGI) serving mode for the game API.
+
+Serves the same routes as index.py (including the /ws push channel) from
+one event loop, sharing the game store, rules and AI policy through
+game_api, so a single process can hold many mostly idle connections
+without a thread per connection:
+
+    uvicorn asgi_app:app --port 8000
+"""
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+
+import game_api
+import metrics
+import protocol
+from game_api import GAME_COOKIE, clean_game_id, games
+from page import home_page
+
+
+# -----------------------------
+# Plumbing
+# -----------------------------
+# Game actions can compute an AI move (up to AI_BUDGET_MS for search and
+# MCTS levels) and shared state backends do network or lock I/O, so they
+# run on a bounded thread pool instead of stalling the event loop
+executor = ThreadPoolExecutor(int(os.environ.get('ASGI_THREADS', 32)), thread_name_prefix='game')
+
+async def off_loop(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+async def respond(send, status, body, content_type, headers=()):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', content_type),
+            (b'content-length', str(len(body)).encode()),
+            *headers,
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+def header(scope, name):
+    for key, value in scope['headers']:
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+async def home(scope, send):
+    status, body, headers = home_page.respond(
+        header(scope, b'accept-encoding'), header(scope, b'if-none-match'))
+    raw = [(k.lower().encode(), v.encode()) for k, v in headers]
+    raw.append((b'content-length', str(len(body)).encode()))
+    # The page only talks over /ws, whose handshake can't set cookies, so
+    # the game id the socket will pick up is handed out here
+    if not clean_game_id(request_game_id(scope, None)[1]):
+        raw.append(game_cookie(games.new_id()))
+    await send({'type': 'http.response.start', 'status': status, 'headers': raw})
+    await send({'type': 'http.response.body', 'body': body if scope['method'] != 'HEAD' else b''})
+
+async def respond_json(send, status, payload, headers=()):
+    body = json.dumps(payload, separators=(',', ':')).encode()
+    await respond(send, status, body, b'application/json', headers)
+
+def game_cookie(game_id):
+    value = f'{GAME_COOKIE}={game_id}; Max-Age={games.ttl}; Path=/; HttpOnly; SameSite=Lax'
+    return b'set-cookie', value.encode()
+
+def query_args(scope):
+    return parse_qs(scope.get('query_string', b'').decode())
+
+def request_game_id(scope, data):
+    game_id = (data or {}).get('game_id')
+    if not game_id:
+        game_id = query_args(scope).get('game_id', [None])[0]
+    cookie = None
+    for name, value in scope['headers']:
+        if name == b'cookie':
+            jar = SimpleCookie(value.decode('latin-1'))
+            if GAME_COOKIE in jar:
+                cookie = jar[GAME_COOKIE].value
+    return clean_game_id(game_id or cookie), cookie
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+# -----------------------------
+# Routes
+# -----------------------------
+def play(action, game_id, data, content_type):
+    game_id, game = games.get(game_id)
+    return (game_id, *game_api.run(action, game_id, game, data, content_type))
+
+async def game_action(scope, receive, send, action):
+    body = await read_body(receive)
+    start = metrics.clock()
+    try:
+        data = json.loads(body) if body else None
+    except ValueError:
+        data = None
+    game_api.PARSE_SECONDS.observe(metrics.clock() - start)
+    if data is not None and not isinstance(data, dict):
+        await respond_json(send, 400, {'error': 'expected a JSON object'})
+        return
+    game_id, cookie = request_game_id(scope, data)
+    content_type = protocol.negotiate(header(scope, b'accept'))
+    game_id, status, body = await off_loop(play, action, game_id, data, content_type)
+    headers = (game_cookie(game_id),) if cookie != game_id else ()
+    await respond(send, status, body, content_type.encode(), headers)
+
+async def websocket(scope, receive, send):
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+    game_id, _ = request_game_id(scope, None)
+    game_id, _ = await off_loop(games.get, game_id)
+    # ?format=compact switches pushes to binary protocol.COMPACT frames
+    compact = query_args(scope).get('format') == ['compact']
+    content_type = protocol.COMPACT if compact else protocol.JSON
+
+    async def push(body):
+        if compact:
+            await send({'type': 'websocket.send', 'bytes': body})
+        else:
+            await send({'type': 'websocket.send', 'text': body.decode()})
+
+    await send({'type': 'websocket.accept'})
+    await push(await off_loop(game_api.state_message, game_id, content_type))
+    while True:
+        message = await receive()
+        if message['type'] == 'websocket.disconnect':
+            return
+        text = message.get('text')
+        if text is None and message.get('bytes') is not None:
+            text = message['bytes'].decode('utf-8', 'replace')
+        await push(await off_loop(game_api.handle_message, game_id, text, content_type))
+
+async def ai_moves(scope, receive, send):
+    body = await read_body(receive)
+    try:
+        data = json.loads(body) if body else None
+    except ValueError:
+        data = None
+    # Table load and numpy evaluation both run off the loop
+    status, result = await off_loop(game_api.ai_moves, data)
+    if status != 200:
+        await respond_json(send, status, result)
+    elif len(data['boards']) >= game_api.BATCH_STREAM_MIN or query_args(scope).get('stream'):
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [(b'content-type', b'application/x-ndjson')],
+        })
+        for chunk in game_api.stream_rows(result):
+            await send({'type': 'http.response.body', 'body': chunk.encode(), 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+    else:
+        await respond_json(send, 200, {'results': list(result)})
+
+async def profile(scope, receive, send):
+    # GET: folded stacks for flamegraph.pl; POST: start/stop/reset (see metrics.profile_control)
+    if not metrics.profile_allowed(header(scope, metrics.PROFILE_HEADER.lower().encode())):
+        await respond_json(send, 404, {'error': 'not found'})
+    elif scope['method'] == 'GET':
+        await respond(send, 200, metrics.profiler.folded().encode(), b'text/plain; charset=utf-8')
+    else:
+        try:
+            data = json.loads(await read_body(receive) or b'null')
+        except ValueError:
+            data = None
+        await respond_json(send, 200, metrics.profile_control(data))
+
+ROUTES = frozenset(('/', '/ai_moves', '/ai_stats', '/leaderboard', '/stats', '/metrics', '/debug/profile', *game_api.ACTIONS))
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] == 'websocket':
+        if scope['path'] == '/ws':
+            await websocket(scope, receive, send)
+        else:
+            await send({'type': 'websocket.close', 'code': 1000})
+        return
+    if scope['type'] != 'http':
+        return
+
+    # Per-route latency and status counts, as index.py records them
+    start = metrics.clock()
+    route = scope['path'] if scope['path'] in ROUTES else 'other'
+    status = 500
+
+    async def send_counted(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        await send(message)
+
+    await dispatch(scope, receive, send_counted)
+    metrics.REQUEST_SECONDS.labels(route).observe(metrics.clock() - start)
+    metrics.REQUESTS.labels(route, str(status)).inc()
+
+async def dispatch(scope, receive, raw_send):
+    path, method = scope['path'], scope['method']
+    started = finished = False
+
+    async def send(message):
+        nonlocal started, finished
+        started = started or message['type'] == 'http.response.start'
+        finished = message['type'] == 'http.response.body' and not message.get('more_body')
+        await raw_send(message)
+
+    try:
+        if path == '/' and method in ('GET', 'HEAD'):
+            await home(scope, send)
+        elif path == '/ai_moves' and method == 'POST':
+            await ai_moves(scope, receive, send)
+        elif path == '/ai_stats' and method == 'GET':
+            await respond_json(send, 200, await off_loop(game_api.ai_stats))
+        elif path == '/leaderboard' and method == 'GET':
+            limit = query_args(scope).get('limit', [None])[0]
+            await respond_json(send, 200, await off_loop(game_api.leaderboard, limit))
+        elif path == '/stats' and method == 'GET':
+            await respond_json(send, 200, await off_loop(game_api.stats, query_args(scope).get('game_id', [])))
+        elif path == '/metrics' and method == 'GET':
+            await respond(send, 200, metrics.render().encode(), metrics.CONTENT_TYPE.encode())
+        elif path == '/debug/profile' and method in ('GET', 'POST'):
+            await profile(scope, receive, send)
+        elif path in game_api.ACTIONS:
+            if method != 'POST':
+                await respond_json(send, 405, {'error': 'method not allowed'})
+            else:
+                await game_action(scope, receive, send, game_api.ACTIONS[path])
+        else:
+            await respond_json(send, 404, {'error': 'not found'})
+    except Exception as e:
+        if not started:
+            await respond_json(send, 500, {'error': str(e)})
+        elif not finished:
+            # Too late for a status: end the (streamed) body where it stopped
+            await send({'type': 'http.response.body', 'body': b''})
@@ -0,0 +1,67 @@
+"""Vectorized AI move evaluation for many boards at once.
+
+Boards use the API's cell encoding (1 player X, -1 AI O, 0 empty). The move
+returned is for the side to move on each board.
+"""
+import numpy as np
+
+POW3 = 3 ** np.arange(9)
+BITS = 1 << np.arange(9)
+LINES = np.array([
+    [0, 1, 2], [3, 4, 5], [6, 7, 8],
+    [0, 3, 6], [1, 4, 7], [2, 5, 8],
+    [0, 4, 8], [2, 4, 6]
+])
+
+
+def _winners(boards):
+    sums = boards[:, LINES].sum(axis=2)
+    winner = np.full(len(boards), 2, dtype=np.int8)  # 2 = still in play
+    winner[(boards != 0).all(axis=1)] = 0
+    winner[(sums == -3).any(axis=1)] = -1
+    winner[(sums == 3).any(axis=1)] = 1
+    return winner
+
+
+def as_boards(boards):
+    """An (n, 9) array of boards given as lists of 9 ints.
+
+    Raises ValueError for anything else (wrong length, floats, bools), so
+    results always line up one-to-one with the boards sent.
+    """
+    for board in boards:
+        if not isinstance(board, (list, tuple)) or len(board) != 9 or any(type(c) is not int for c in board):
+            raise ValueError('each board must be a list of 9 integers')
+    # int64, not int8: out-of-range cells must stay invalid rather than wrap
+    return np.array(boards, dtype=np.int64).reshape(len(boards), 9)
+
+
+def evaluate(policy, boards, rng=None):
+    """Return (moves, winners) arrays for a list of boards (see as_boards).
+
+    moves[i] is the chosen cell, or -1 when the board is finished or
+    invalid; winners[i] is the result after that move: 1 / -1 / 0, or 2
+    while still in play, or -2 for an invalid board.
+    """
+    rng = rng or np.random.default_rng()
+    boards = as_boards(boards)
+    n = len(boards)
+    xs = (boards == 1).sum(axis=1)
+    os_ = (boards == -1).sum(axis=1)
+    valid = (np.abs(boards) <= 1).all(axis=1) & ((xs == os_) | (xs == os_ + 1))
+    before = _winners(boards)
+    live = valid & (before == 2)
+
+    keys = (boards == 1).astype(np.int64) @ POW3 + 2 * ((boards == -1).astype(np.int64) @ POW3)
+    masks = np.asarray(policy.move_masks())[np.where(live, keys, 0)]
+    # Random tie-break among the best moves
+    choices = ((masks[:, None] & BITS) != 0) * (rng.random((n, 9)) + 1)
+    moves = np.where(live & (masks != 0), choices.argmax(axis=1), -1)
+
+    played = moves >= 0
+    rows = np.flatnonzero(played)
+    after = boards.copy()
+    after[rows, moves[rows]] = np.where(xs[rows] == os_[rows], 1, -1)
+    winners = np.where(played, _winners(after), before)
+    winners[~valid] = -2
+    return moves, winners
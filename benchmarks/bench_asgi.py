@@ -0,0 +1,179 @@
+"""Requests/sec and p99 latency of the Flask app versus the ASGI app.
+
+Run from the repo root:  python -m benchmarks.bench_asgi [--connections 64] [--idle 200]
+
+Each server runs in its own process: Flask under Werkzeug's threaded server
+(HTTP/1.1 keep-alive), the ASGI app under uvicorn. Before measuring, `--idle`
+extra connections are opened and left idle, which costs the threaded server
+one blocked thread each. Every active connection then plays its own game
+(move, AI move, reset) for `--seconds`.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def serve_flask(port):
+    import logging
+
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    from index import app
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    WSGIRequestHandler.protocol_version = 'HTTP/1.1'
+    make_server('127.0.0.1', port, app, threaded=True).serve_forever()
+
+
+def start_server(kind, port):
+    if kind == 'flask':
+        cmd = [sys.executable, '-m', 'benchmarks.bench_asgi', '--serve-flask', str(port)]
+    else:
+        cmd = [sys.executable, '-m', 'uvicorn', 'asgi_app:app', '--port', str(port),
+               '--log-level', 'warning', '--no-access-log']
+    proc = subprocess.Popen(cmd, cwd=ROOT)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f"{kind} server did not start")
+
+
+def rss_mb(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float('nan')
+
+
+# -----------------------------
+# Load generator
+# -----------------------------
+class Connection:
+    """Keep-alive HTTP/1.1 client that reconnects when the server closes.
+
+    Werkzeug answers every request with `Connection: close`, so against
+    Flask each request pays for a new TCP connection, as browsers would.
+    """
+
+    def __init__(self, port):
+        self.port = port
+        self.reader = self.writer = None
+
+    async def request(self, path, payload):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection('127.0.0.1', self.port)
+        body = json.dumps(payload).encode()
+        self.writer.write(
+            f'POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n\r\n'.encode() + body
+        )
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        length, close = 0, False
+        for line in head.lower().split(b'\r\n'):
+            if line.startswith(b'content-length:'):
+                length = int(line.split(b':')[1])
+            elif line == b'connection: close':
+                close = True
+        data = json.loads(await self.reader.readexactly(length))
+        if close:
+            self.close()
+        return data
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+async def client(port, game_id, deadline, latencies):
+    conn = Connection(port)
+    cell = 0
+    try:
+        while time.perf_counter() < deadline:
+            for path, payload in (
+                ('/move', {'game_id': game_id, 'position': cell % 9, 'player': 1}),
+                ('/ai_move', {'game_id': game_id}),
+            ):
+                start = time.perf_counter()
+                state = await conn.request(path, payload)
+                latencies.append(time.perf_counter() - start)
+            cell += 1
+            if state['game_over'] or state['match_over']:
+                start = time.perf_counter()
+                await conn.request('/reset_match', {'game_id': game_id})
+                latencies.append(time.perf_counter() - start)
+    finally:
+        conn.close()
+
+
+async def load(port, connections, idle, seconds, pid=None):
+    idle_socks = []
+    for _ in range(idle):
+        idle_socks.append(await asyncio.open_connection('127.0.0.1', port))
+    latencies = []
+    start = time.perf_counter()
+    deadline = start + seconds
+    await asyncio.gather(*(
+        client(port, f'bench-{i}', deadline, latencies) for i in range(connections)
+    ))
+    elapsed = time.perf_counter() - start
+    server_rss = rss_mb(pid) if pid else float('nan')
+    for _, writer in idle_socks:
+        writer.close()
+    latencies.sort()
+    return {
+        'requests_per_sec': len(latencies) / elapsed,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99)] * 1000,
+        'server_rss_mb': server_rss,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--connections', type=int, default=64)
+    parser.add_argument('--idle', type=int, default=200)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--serve-flask', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve_flask:
+        serve_flask(args.serve_flask)
+        return
+
+    for kind in ('flask', 'asgi'):
+        port = free_port()
+        proc = start_server(kind, port)
+        try:
+            result = asyncio.run(load(port, args.connections, args.idle, args.seconds, proc.pid))
+        finally:
+            proc.terminate()
+            proc.wait()
+        print(f"{kind:>5}: {result['requests_per_sec']:8,.0f} req/s  "
+              f"p50 {result['p50_ms']:6.2f} ms  p99 {result['p99_ms']:6.2f} ms  "
+              f"rss {result['server_rss_mb']:.0f} MB  "
+              f"({args.connections} active + {args.idle} idle connections)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""Per-request cost of each game-state backend, and a cross-process
+lost-update check for the shared ones.
+
+Run from the repo root:  python -m benchmarks.bench_backends [--requests 5000] [--procs 4]
+
+Each backend first plays --requests game actions (turns and resets) through
+game_api.run in one process. Then --procs processes open the same shared
+store and bump the seq of a handful of shared games as fast as they can;
+with correct locking the seqs add up to exactly procs x bumps. The kv
+backend runs against kv_server.py in a subprocess.
+"""
+import argparse
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+
+os.environ.setdefault('RESULTS_DB', '')
+os.environ.setdefault('MOVE_LOG', '')
+
+import game_api  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHARED_GAMES = 8
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_kv_server(port):
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, 'kv_server.py'), '--port', str(port)])
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port), 0.1).close()
+            return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError('kv_server did not start')
+
+
+def latency(store, requests):
+    rng = random.Random(0)
+    game_id, _ = store.get(None)
+    times = []
+    for i in range(requests):
+        _, game = store.get(game_id)
+        start = time.perf_counter()
+        if i % 6 == 5:
+            game_api.run(game_api.reset_round, game_id, game, {})
+        else:
+            game_api.run(game_api.turn, game_id, game, {'player': 1, 'position': rng.randrange(9)})
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return sum(times) / len(times), times[int(len(times) * 0.99)]
+
+
+def bump(game, data):
+    game.seq += 1
+
+def bump_worker(args):
+    backend, env, bumps = args
+    os.environ.update(env)
+    store = game_api.open_games(backend)
+    rng = random.Random()
+    for _ in range(bumps):
+        game_id = f'shared-{rng.randrange(SHARED_GAMES)}'
+        _, game = store.get(game_id)
+        game_api.run(bump, game_id, game, None)
+    return bumps
+
+
+def lost_updates(backend, env, procs, bumps):
+    os.environ.update(env)
+    store = game_api.open_games(backend)
+    for n in range(SHARED_GAMES):
+        store.discard(f'shared-{n}')
+    start = time.perf_counter()
+    with Pool(procs) as pool:
+        done = sum(pool.map(bump_worker, [(backend, env, bumps)] * procs))
+    elapsed = time.perf_counter() - start
+    total = 0
+    for n in range(SHARED_GAMES):
+        _, game = store.get(f'shared-{n}')
+        with game.lock:
+            total += game.seq
+    return done, total, done / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--procs', type=int, default=4)
+    parser.add_argument('--bumps', type=int, default=2000)
+    args = parser.parse_args()
+
+    shm_path = os.path.join(tempfile.mkdtemp(), 'games')
+    port = free_port()
+    server = start_kv_server(port)
+    backends = (
+        ('memory', {}),
+        ('shm', {'GAME_SHM_PATH': shm_path}),
+        ('kv', {'GAME_KV_URL': f'redis://127.0.0.1:{port}/0'}),
+    )
+    try:
+        for backend, env in backends:
+            os.environ.update(env)
+            mean, p99 = latency(game_api.open_games(backend), args.requests)
+            line = f"{backend:>6}: action mean {mean * 1e6:7.1f} us  p99 {p99 * 1e6:7.1f} us"
+            if backend != 'memory':
+                done, total, rate = lost_updates(backend, env, args.procs, args.bumps)
+                line += (f"   {args.procs} procs: {done} bumps -> seq total {total} "
+                         f"({'ok' if total == done else 'LOST UPDATES'}), {rate:,.0f} actions/sec")
+            print(line)
+    finally:
+        server.kill()
+        os.unlink(shm_path)
+
+
+if __name__ == '__main__':
+    main()
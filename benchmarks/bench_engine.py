@@ -0,0 +1,90 @@
+"""Per-move cost of the list-based AI versus the bitboard engine.
+
+Run from the repo root:  python -m benchmarks.bench_engine
+"""
+import random
+import timeit
+
+import engine
+
+
+# -----------------------------
+# Legacy list-based implementation (pre-bitboard index.py/app.py)
+# -----------------------------
+def check_winner(board):
+    wins = [
+        [0, 1, 2], [3, 4, 5], [6, 7, 8],
+        [0, 3, 6], [1, 4, 7], [2, 5, 8],
+        [0, 4, 8], [2, 4, 6]
+    ]
+    for line in wins:
+        if board[line[0]] != 0 and board[line[0]] == board[line[1]] == board[line[2]]:
+            return board[line[0]]
+    if 0 not in board:
+        return 0
+    return None
+
+def ai_choose_move(board):
+    available = [i for i, v in enumerate(board) if v == 0]
+    for move in available:
+        test_board = board[:]
+        test_board[move] = -1
+        if check_winner(test_board) == -1:
+            return move
+    for move in available:
+        test_board = board[:]
+        test_board[move] = 1
+        if check_winner(test_board) == 1:
+            return move
+    if 4 in available:
+        return 4
+    corners = [m for m in available if m in (0, 2, 6, 8)]
+    if corners:
+        return random.choice(corners)
+    return random.choice(available)
+
+
+# -----------------------------
+# Sample positions
+# -----------------------------
+def sample_positions(n, seed=0):
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < n:
+        board = [0] * 9
+        player = 1
+        for _ in range(rng.randint(0, 7)):
+            free = [i for i, v in enumerate(board) if v == 0]
+            board[rng.choice(free)] = player
+            player = -player
+        if check_winner(board) is None and player == -1:
+            positions.append(board)
+    return positions
+
+
+def run(n=2000, repeat=5):
+    boards = sample_positions(n)
+    bitboards = [engine.from_cells(b) for b in boards]
+
+    def legacy_move():
+        for b in boards:
+            ai_choose_move(b)
+            check_winner(b)
+
+    def bitboard_move():
+        for x, o in bitboards:
+            engine.heuristic_move(o, x)
+            engine.winner(x, o)
+
+    results = {}
+    for name, fn in (('list', legacy_move), ('bitboard', bitboard_move)):
+        best = min(timeit.repeat(fn, number=1, repeat=repeat))
+        results[name] = best / n * 1e6
+    return results
+
+
+if __name__ == '__main__':
+    results = run()
+    for name, us in results.items():
+        print(f"{name:>9}: {us:6.2f} us/move")
+    print(f"  speedup: {results['list'] / results['bitboard']:.1f}x")
@@ -0,0 +1,45 @@
+"""GET / throughput: rendering the template per request versus serving the
+pre-encoded page (fresh fetches and ETag revalidations).
+
+Run from the repo root:  python -m benchmarks.bench_home [requests]
+"""
+import sys
+import time
+
+from flask import Flask, render_template_string
+
+from index import app
+from page import HOME_HTML, home_page
+
+
+def rate(client, n, headers=None):
+    start = time.perf_counter()
+    for _ in range(n):
+        client.get('/', headers=headers)
+    return n / (time.perf_counter() - start)
+
+
+def run(n=5000):
+    before = Flask(__name__)
+
+    @before.route('/')
+    def home():
+        return render_template_string(HOME_HTML)
+
+    cached = app.test_client()
+    return {
+        'render per request': rate(before.test_client(), n),
+        'cached, identity': rate(cached, n),
+        'cached, gzip': rate(cached, n, {'Accept-Encoding': 'gzip, deflate, br'}),
+        'cached, 304': rate(cached, n, {'Accept-Encoding': 'gzip', 'If-None-Match': home_page.etags['gzip']}),
+    }
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    results = run(n)
+    base = results['render per request']
+    sizes = {name: len(body) for name, body in home_page.bodies.items()}
+    for name, value in results.items():
+        print(f"{name:>20}: {value:8,.0f} req/s  ({value / base:4.2f}x)")
+    print('  body bytes: ' + ', '.join(f'{k} {v}' for k, v in sizes.items()))
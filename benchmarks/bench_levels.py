@@ -0,0 +1,65 @@
+"""Per-move latency and strength of each AI level.
+
+Run from the repo root:  python -m benchmarks.bench_levels [--games 200] [--budget-ms 50]
+
+Each level plays `--games` games against the heuristic level (alternating
+who moves first); every AI move is timed. The alpha-beta level runs at full
+depth here so its iterative deepening is bounded only by the budget.
+"""
+import argparse
+import time
+
+import engine
+import policies
+import search
+
+
+def play(policy, opponent, games):
+    results = {1: 0, 0: 0, -1: 0}
+    latencies = []
+    for g in range(games):
+        x = o = 0
+        side = 1
+        first = 1 if g % 2 == 0 else -1  # side played by `policy`
+        while engine.winner(x, o) is None:
+            if side == first:
+                start = time.perf_counter()
+                cell = policy.best_move(x, o)
+                latencies.append(time.perf_counter() - start)
+            else:
+                cell = opponent.best_move(x, o)
+            if side == 1:
+                x |= 1 << cell
+            else:
+                o |= 1 << cell
+            side = -side
+        results[engine.winner(x, o) * first] += 1
+    latencies.sort()
+    return results, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--budget-ms', type=float, default=50)
+    args = parser.parse_args()
+
+    opponent = policies.level('heuristic')
+    for name in policies.LEVELS:
+        policy = policies.load(name)
+        if name == 'alphabeta':
+            policy = search.AlphaBetaPolicy(max_depth=9, budget=args.budget_ms / 1000)
+        results, lat = play(policy, opponent, args.games)
+        print(f"{name:>10}: win/draw/loss vs heuristic {results[1]:4}/{results[0]:4}/{results[-1]:4}  "
+              f"p50 {lat[len(lat) // 2] * 1000:7.3f} ms  p99 {lat[int(len(lat) * 0.99)] * 1000:7.3f} ms  "
+              f"max {lat[-1] * 1000:7.3f} ms")
+
+    # A budget far below a full search still bounds the move time
+    tight = search.AlphaBetaPolicy(max_depth=9, budget=0.001)
+    _, lat = play(tight, opponent, args.games)
+    print(f"{'1 ms cap':>10}: p99 {lat[int(len(lat) * 0.99)] * 1000:7.3f} ms  "
+          f"max {lat[-1] * 1000:7.3f} ms  ({tight.timeouts} of {tight.searches} searches cut short)")
+
+
+if __name__ == '__main__':
+    main()
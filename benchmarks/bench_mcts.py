@@ -0,0 +1,78 @@
+"""MCTS playouts/sec per core and win rate against the heuristic.
+
+Run from the repo root:  python -m benchmarks.bench_mcts [--games 10] [--budget-ms 200] [--workers N]
+
+Playout throughput is measured from the empty board of each size with
+1..N worker processes (root parallelism); per-core is the total divided by
+the worker count. Each size then plays `--games` games (alternating the
+first move) of MCTS against mnk's heuristic policy.
+"""
+import argparse
+import os
+
+import mcts
+import mnk
+
+SIZES = ((3, 3, 3), (5, 5, 4), (7, 7, 5), (15, 15, 5))
+
+
+def throughput(size, workers, budget, moves=5):
+    policy = mcts.MCTSPolicy(mnk.geometry(*size), budget=budget, workers=workers)
+    if workers > 1:
+        policy.best_move(0, 0)  # start the pool outside the measurement
+        policy.playouts = 0
+    for _ in range(moves):
+        policy._trees.clear()
+        policy.best_move(0, 0)
+    rate = policy.playouts / (moves * budget)
+    if policy._pool is not None:
+        policy._pool.shutdown()
+    return rate
+
+
+def match(size, games, budget):
+    g = mnk.geometry(*size)
+    ai = mcts.MCTSPolicy(g, budget=budget)
+    heuristic = mnk.HeuristicPolicy(g)
+    results = {1: 0, 0: 0, -1: 0}
+    for n in range(games):
+        x = o = 0
+        side, first = 1, 1 if n % 2 == 0 else -1
+        while True:
+            cell = (ai if side == first else heuristic).best_move(x, o)
+            if side == 1:
+                x |= 1 << cell
+            else:
+                o |= 1 << cell
+            if mnk.wins(g, x if side == 1 else o, cell):
+                results[side * first] += 1
+                break
+            if x | o == g.full:
+                results[0] += 1
+                break
+            side = -side
+    return results, ai.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--budget-ms', type=float, default=200)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    budget = args.budget_ms / 1000
+
+    counts = sorted({1, args.workers} | {w for w in (2, 4, 8) if w < args.workers})
+    for size in SIZES:
+        label = f"{'x'.join(map(str, size[:2]))} k={size[2]}"
+        for workers in counts:
+            rate = throughput(size, workers, budget)
+            print(f"{label:>10}: {workers:2d} workers  {rate:10,.0f} playouts/sec  "
+                  f"{rate / workers:10,.0f} per core")
+        results, stats = match(size, args.games, budget)
+        print(f"{label:>10}: vs heuristic win/draw/loss {results[1]}/{results[0]}/{results[-1]}  "
+              f"({stats['trees_reused']} of {stats['searches']} searches reused a tree)")
+
+
+if __name__ == '__main__':
+    main()
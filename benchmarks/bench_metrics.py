@@ -0,0 +1,78 @@
+"""Overhead of the request metrics and the sampling profiler.
+
+Run from the repo root:  python -m benchmarks.bench_metrics [--requests 5000]
+
+Times one histogram observation (with its two clock reads) and one counter
+increment, then drives /turn and /reset_round through Flask's test client
+with the profiler off and on at two sampling intervals, and renders
+/metrics once the counters are populated.
+"""
+import argparse
+import os
+import time
+import timeit
+
+os.environ.setdefault('ENABLE_WEBSOCKET', '0')
+os.environ.setdefault('RESULTS_DB', '')
+os.environ.setdefault('MOVE_LOG', '')
+
+import metrics  # noqa: E402
+from index import app  # noqa: E402
+
+# Observations and increments made by one /turn request
+OBSERVATIONS = 8
+INCREMENTS = 4
+
+
+def primitive_costs():
+    hist = metrics.Histogram('bench_seconds', 'benchmark only').labels()
+    counter = metrics.Counter('bench_total', 'benchmark only').labels()
+    clock = metrics.clock
+    n = 200000
+    observe = timeit.timeit(lambda: hist.observe(clock() - clock()), number=n) / n
+    inc = timeit.timeit(counter.inc, number=n) / n
+    empty = timeit.timeit(lambda: None, number=n) / n
+    return observe - empty, inc - empty
+
+
+def drive(client, requests):
+    latencies = []
+    for i in range(requests):
+        start = time.perf_counter()
+        if i % 4 == 3:
+            client.post('/reset_round')
+        else:
+            client.post('/turn', json={'player': 1, 'position': (i * 5) % 9})
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return sum(latencies) / len(latencies), latencies[int(len(latencies) * 0.99)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    observe, inc = primitive_costs()
+    print(f"histogram observe {observe * 1e9:5.0f} ns   counter inc {inc * 1e9:5.0f} ns   "
+          f"per /turn ~{(OBSERVATIONS * observe + INCREMENTS * inc) * 1e6:.1f} us")
+
+    client = app.test_client()
+    drive(client, 500)  # warm up: AI table, routes
+    mean_off = None
+    for label, interval in (('profiler off', None), ('profiler 5 ms', 5), ('profiler 1 ms', 1)):
+        if interval:
+            metrics.profile_control({'enabled': True, 'interval_ms': interval, 'reset': True})
+        mean, p99 = drive(client, args.requests)
+        metrics.profile_control({'enabled': False})
+        mean_off = mean_off or mean
+        print(f"{label:>14}: mean {mean * 1e6:7.1f} us  p99 {p99 * 1e6:7.1f} us  "
+              f"({(mean / mean_off - 1) * 100:+5.1f}%)  samples {metrics.profiler.samples}")
+
+    start = time.perf_counter()
+    body = metrics.render()
+    print(f"/metrics render {(time.perf_counter() - start) * 1000:.2f} ms, {len(body)} bytes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""m,n,k engine: win-check cost and search latency per board size.
+
+Run from the repo root:  python -m benchmarks.bench_mnk [--games 4]
+
+For each board, times the incremental win check (lines through the last
+move) against a full scan of every window, then plays the strongest search
+policy against the heuristic and reports its per-move latency, depth and
+nodes/sec under the default budget.
+"""
+import argparse
+import random
+import time
+import timeit
+
+import mnk
+
+SIZES = ((3, 3, 3), (4, 4, 4), (5, 5, 4), (7, 7, 5), (15, 15, 5), (19, 19, 5))
+
+
+def random_position(g, stones, rng):
+    cells = rng.sample(range(g.cells), stones)
+    x = sum(1 << i for i in cells[0::2])
+    o = sum(1 << i for i in cells[1::2])
+    # The last stone placed and the bitboard holding it
+    return x, o, cells[-1], x if stones % 2 else o
+
+
+def play(size, games):
+    g = mnk.geometry(*size)
+    search = mnk.SearchPolicy(g, budget=0.2)
+    heuristic = mnk.HeuristicPolicy(g)
+    wins = 0
+    latencies = []
+    for n in range(games):
+        x = o = 0
+        side, first = 1, 1 if n % 2 == 0 else -1
+        while True:
+            policy = search if side == first else heuristic
+            start = time.perf_counter()
+            cell = policy.best_move(x, o)
+            if policy is search:
+                latencies.append(time.perf_counter() - start)
+            if side == 1:
+                x |= 1 << cell
+            else:
+                o |= 1 << cell
+            if mnk.wins(g, x if side == 1 else o, cell):
+                wins += side == first
+                break
+            if x | o == g.full:
+                break
+            side = -side
+    latencies.sort()
+    return search, wins, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--games', type=int, default=4)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    for size in SIZES:
+        g = mnk.geometry(*size)
+        x, o, last, bits = random_position(g, min(g.cells - 1, 2 * g.k + 2), rng)
+        incremental = timeit.timeit(lambda: mnk.wins(g, bits, last), number=20000) / 20000
+        full = timeit.timeit(lambda: mnk.winner(g, x, o), number=2000) / 2000
+
+        search, wins, lat = play(size, args.games)
+        stats = search.stats()
+        elapsed = sum(lat)
+        print(f"{'x'.join(map(str, size[:2]))} k={size[2]}: win check {incremental * 1e6:6.2f} us "
+              f"(full scan {full * 1e6:7.2f} us)  search vs heuristic {wins}/{args.games} won  "
+              f"p50 {lat[len(lat) // 2] * 1000:6.1f} ms  max {lat[-1] * 1000:6.1f} ms  "
+              f"depth {stats['mean_depth']:.1f}  {stats['nodes'] / elapsed:8,.0f} nodes/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Move-log throughput: appends, lazy reads, memory-mapped decode and replay.
+
+Run from the repo root:  python -m benchmarks.bench_move_log [games]
+
+Random legal games are appended to a temporary log, then read back with
+the generator API, decoded in bulk through the memory map, and replayed
+into a fresh Q-table.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+import engine
+import move_log
+import qlearning
+
+
+def random_game(rng):
+    x = o = 0
+    cells = []
+    while True:
+        cell = rng.choice(engine.CELLS[engine.empty(x, o)])
+        cells.append(cell)
+        if len(cells) % 2:
+            x |= 1 << cell
+        else:
+            o |= 1 << cell
+        winner = engine.winner(x, o)
+        if winner is not None:
+            return cells, winner
+
+
+def main(games=1000000):
+    rng = random.Random(0)
+    samples = [random_game(rng) for _ in range(1000)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'moves.log')
+        log = move_log.MoveLog(path, flush_every=4096)
+        start = time.perf_counter()
+        for i in range(games):
+            cells, winner = samples[i % len(samples)]
+            log.append(cells, winner, 'perfect', 'bench')
+        log.close()
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(path)
+        print(f"   append: {games / elapsed:12,.0f} games/sec  ({size / games:.0f} bytes/game, {size / 2**20:.1f} MB)")
+
+        start = time.perf_counter()
+        plies = sum(len(g.moves) for g in move_log.read_games(path))
+        elapsed = time.perf_counter() - start
+        print(f"generator: {games / elapsed:12,.0f} games/sec  ({plies / games:.1f} plies/game)")
+
+        start = time.perf_counter()
+        cells, counts = move_log.move_matrix(move_log.as_array(path))
+        elapsed = time.perf_counter() - start
+        print(f"     mmap: {games / elapsed:12,.0f} games/sec  (decoded to a {cells.shape} array)")
+
+        q = qlearning.new_table()
+        rate = qlearning.train_from_log(q, path, log=None)
+        print(f"   replay: {rate:12,.0f} games/sec")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
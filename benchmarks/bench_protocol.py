@@ -0,0 +1,26 @@
+"""Encode cost and size of a /move response: JSON versus the compact format.
+
+Run from the repo root:  python -m benchmarks.bench_protocol
+"""
+import timeit
+
+import protocol
+from game_store import Game
+
+
+def run(number=100000):
+    game = Game()
+    game.x, game.o, game.seq, game.current_player = 0b000010001, 0b100000000, 3, 1
+    before = protocol.scores(game)
+    results = {}
+    for content_type in (protocol.JSON, protocol.COMPACT):
+        body = protocol.encode(game, 'a' * 32, 200, before, content_type)
+        seconds = timeit.timeit(
+            lambda: protocol.encode(game, 'a' * 32, 200, before, content_type), number=number)
+        results[content_type] = (len(body), seconds / number * 1e6)
+    return results
+
+
+if __name__ == '__main__':
+    for content_type, (size, us) in run().items():
+        print(f"{content_type:>24}: {size:4d} bytes  {us:5.2f} us/encode")
@@ -0,0 +1,88 @@
+"""Request-path cost of recording results, and leaderboard query latency.
+
+Run from the repo root:  python -m benchmarks.bench_results [--rounds 50000] [--players 5000]
+
+Compares ResultStore's write-behind recording with committing each round
+to SQLite inline, and the in-memory leaderboard with the equivalent GROUP
+BY query over the same database.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from results_store import SCHEMA, ResultStore
+
+LEADERBOARD_SQL = '''
+SELECT r.game_id, COALESCE(m.won, 0), r.won, r.lost
+FROM (SELECT game_id, SUM(winner = 1) AS won, SUM(winner = -1) AS lost
+      FROM rounds GROUP BY game_id) r
+LEFT JOIN (SELECT game_id, SUM(player_wins > ai_wins) AS won
+           FROM matches GROUP BY game_id) m USING (game_id)
+ORDER BY 2 DESC, 3 DESC, 4 ASC LIMIT 10
+'''
+
+
+def workload(rounds, players, seed=0):
+    rng = random.Random(seed)
+    for i in range(rounds):
+        match = (3, rng.randrange(3)) if i % 5 == 4 else None
+        yield f'player-{rng.randrange(players)}', rng.choice((1, -1, 0)), match
+
+
+def inline(path, rows):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.execute('PRAGMA journal_mode=WAL')
+    start = time.perf_counter()
+    for game_id, winner, match in rows:
+        with conn:
+            conn.execute('INSERT INTO rounds VALUES (?, ?, ?)', (game_id, winner, time.time()))
+            if match is not None:
+                conn.execute('INSERT INTO matches VALUES (?, ?, ?, ?)', (game_id, *match, time.time()))
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rounds', type=int, default=50000)
+    parser.add_argument('--players', type=int, default=5000)
+    args = parser.parse_args()
+    rows = list(workload(args.rounds, args.players))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        elapsed = inline(os.path.join(tmp, 'inline.db'), rows)
+        print(f"  inline commit: {elapsed / len(rows) * 1e6:8.1f} us per round on the request path")
+
+        path = os.path.join(tmp, 'results.db')
+        store = ResultStore(path)
+        start = time.perf_counter()
+        for row in rows:
+            store.record_round(*row)
+        elapsed = time.perf_counter() - start
+        store.flush()
+        drained = time.perf_counter() - start
+        print(f"  write-behind: {elapsed / len(rows) * 1e6:8.1f} us per round on the request path "
+              f"(queue drained after {drained:.2f} s)")
+
+        start = time.perf_counter()
+        for _ in range(100):
+            store.leaderboard(10)
+            store.record_round('player-0', 1)  # invalidate the cached board
+        print(f"   leaderboard: {(time.perf_counter() - start) * 10:8.2f} ms per query (in-memory aggregate)")
+        store.close()
+
+        conn = sqlite3.connect(path)
+        start = time.perf_counter()
+        for _ in range(5):
+            conn.execute(LEADERBOARD_SQL).fetchall()
+        print(f"   leaderboard: {(time.perf_counter() - start) * 200:8.2f} ms per query (SQLite GROUP BY)")
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
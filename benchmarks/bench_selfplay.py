@@ -0,0 +1,32 @@
+"""Self-play throughput (games/sec) as the worker count grows.
+
+Run from the repo root:  python -m benchmarks.bench_selfplay [games]
+"""
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import qlearning
+
+
+def run(games=200000, max_workers=None):
+    max_workers = max_workers or os.cpu_count() or 1
+    counts = sorted({1, max_workers} | {w for w in (2, 4, 8, 16, 32, 64) if w < max_workers})
+    results = {}
+    for workers in counts:
+        q = qlearning.new_table()
+        with ProcessPoolExecutor(workers) as pool:
+            # Warm the pool so process start-up is not timed
+            list(pool.map(abs, range(workers)))
+            results[workers] = qlearning.train_parallel(
+                q, games, workers, seed=0, log=None, executor=pool)
+    return results
+
+
+if __name__ == '__main__':
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    q = qlearning.new_table()
+    serial = qlearning.train(q, games, seed=0, log=None)
+    print(f"   serial: {serial:10,.0f} games/sec")
+    for workers, rate in run(games).items():
+        print(f"{workers:>3} procs: {rate:10,.0f} games/sec  speedup {rate / serial:4.2f}x")
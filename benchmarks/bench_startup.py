@@ -0,0 +1,76 @@
+"""Cold-start cost of the Flask entry point: import time and peak RSS.
+
+Run from the repo root:  python -m benchmarks.bench_startup [--runs 5]
+
+Each run imports index.py in a fresh interpreter, as a serverless cold start
+would. Exits non-zero when the median import time or RSS exceeds its budget,
+or when a heavy module that the API must not load eagerly shows up, so it can
+gate CI as features are added.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must stay out of a bare `import index`
+FORBIDDEN = ('streamlit', 'numpy', 'pandas', 'solver', 'qlearning', 'batch', 'sqlite3')
+
+PROBE = f'''
+import json, resource, sys, time
+start = time.perf_counter()
+import index
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "import_ms": elapsed * 1000,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "loaded": [m for m in {FORBIDDEN!r} if m in sys.modules],
+}}))
+'''
+
+
+def measure(runs=5, env=None):
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, '-c', PROBE], cwd=ROOT, env=env,
+            check=True, capture_output=True, text=True,
+        ).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+    return {
+        'import_ms': statistics.median(s['import_ms'] for s in samples),
+        'rss_mb': statistics.median(s['rss_mb'] for s in samples),
+        'loaded': sorted({m for s in samples for m in s['loaded']}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-import-ms', type=float,
+                        default=float(os.environ.get('STARTUP_MAX_IMPORT_MS', 600)))
+    parser.add_argument('--max-rss-mb', type=float,
+                        default=float(os.environ.get('STARTUP_MAX_RSS_MB', 60)))
+    args = parser.parse_args()
+
+    failures = []
+    for label, extra in (('default', {}), ('serverless', {'VERCEL': '1'})):
+        result = measure(args.runs, {**os.environ, **extra})
+        print(f"{label:>10}: import {result['import_ms']:6.1f} ms  rss {result['rss_mb']:5.1f} MB  "
+              f"eager heavy modules: {', '.join(result['loaded']) or 'none'}")
+        if result['import_ms'] > args.max_import_ms:
+            failures.append(f"{label}: import {result['import_ms']:.0f} ms > {args.max_import_ms:.0f} ms")
+        if result['rss_mb'] > args.max_rss_mb:
+            failures.append(f"{label}: rss {result['rss_mb']:.1f} MB > {args.max_rss_mb:.0f} MB")
+        if result['loaded']:
+            failures.append(f"{label}: imported {', '.join(result['loaded'])} at start-up")
+    for failure in failures:
+        print('FAIL', failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
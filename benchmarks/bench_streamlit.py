@@ -0,0 +1,199 @@
+"""Script executions, server CPU and memory per turn of the Streamlit app.
+
+Run from the repo root:  python -m benchmarks.bench_streamlit [--users 20] [--turns 30] [--idle 200]
+
+Starts `streamlit run app.py` headless and drives it over its websocket as
+`--users` concurrent browser sessions, each clicking free cells (and reset
+when a round ends). Every click is sent twice over: once scoped to the board
+fragment, as the browser does, and once as a full-script rerun, which is the
+cheapest the app could do before the board became a fragment (the old flow
+also reran once more for the AI reply and slept 0.3 s on the server thread).
+Script runs per turn are read back from the app's own counters, which it
+shows when DEBUG_COUNTERS=1. `--idle`
+extra sessions are opened first and left idle; server RSS is reported so the
+per-session cost (the AI policy is shared, see app.py) can be read off.
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TICKS = os.sysconf('SC_CLK_TCK')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(port):
+    cmd = [sys.executable, '-m', 'streamlit', 'run', 'app.py', '--server.headless', 'true',
+           '--server.port', str(port), '--browser.gatherUsageStats', 'false']
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=dict(os.environ, DEBUG_COUNTERS='1'),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("streamlit server did not start")
+
+
+def rss_mb(pid):
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return float('nan')
+
+
+def cpu_seconds(pid):
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / TICKS
+
+
+# -----------------------------
+# Session driver
+# -----------------------------
+class Session:
+    """One browser tab: tracks the widgets and counters the app renders."""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.buttons = {}
+        self.fragment_id = ''
+        self.counters = (0, 0)
+
+    async def rerun(self, widget=None, fragment=False):
+        msg = BackMsg()
+        state = msg.rerun_script
+        state.query_string = ''
+        state.page_script_hash = ''
+        if widget is not None:
+            w = state.widget_states.widgets.add()
+            w.id = widget
+            w.trigger_value = True
+        if fragment:
+            state.fragment_id = self.fragment_id
+        await self.ws.send(msg.SerializeToString())
+        while True:
+            fwd = ForwardMsg()
+            fwd.ParseFromString(await self.ws.recv())
+            kind = fwd.WhichOneof('type')
+            if kind == 'script_finished':
+                return
+            if kind == 'delta' and fwd.delta.WhichOneof('type') == 'new_element':
+                self.read_element(fwd.delta)
+
+    def read_element(self, delta):
+        element = delta.new_element
+        kind = element.WhichOneof('type')
+        if kind == 'button':
+            button = element.button
+            name = button.id.rsplit('-', 2)[-2:]
+            key = '-'.join(name) if name[0] == 'cell' else button.label
+            self.buttons[key] = (button.id, button.disabled)
+            self.fragment_id = delta.fragment_id or self.fragment_id
+        elif kind == 'markdown' and element.markdown.body.startswith('Script runs:'):
+            parts = element.markdown.body.replace('|', ':').split(':')
+            self.counters = (int(parts[1]), int(parts[3]))
+
+    def pick(self):
+        free = [b for k, b in self.buttons.items() if k.startswith('cell') and not b[1]]
+        if free:
+            return random.choice(free)[0]
+        return self.buttons['🏁 Reset Match'][0]
+
+
+async def user(port, turns, fragment, totals):
+    url = f'ws://127.0.0.1:{port}/_stcore/stream'
+    async with websockets.connect(url, subprotocols=['streamlit'], max_size=None) as ws:
+        session = Session(ws)
+        await session.rerun()
+        before = session.counters
+        for _ in range(turns):
+            await session.rerun(session.pick(), fragment)
+        totals.append((session.counters[0] - before[0], session.counters[1] - before[1]))
+
+
+async def load(port, pid, users, turns, fragment):
+    totals = []
+    cpu = cpu_seconds(pid)
+    start = time.perf_counter()
+    await asyncio.gather(*(user(port, turns, fragment, totals) for _ in range(users)))
+    elapsed = time.perf_counter() - start
+    cpu = cpu_seconds(pid) - cpu
+    clicks = users * turns
+    return {
+        'script_runs_per_turn': sum(t[0] for t in totals) / clicks,
+        'board_renders_per_turn': sum(t[1] for t in totals) / clicks,
+        'cpu_ms_per_turn': cpu * 1000 / clicks,
+        'turns_per_sec': clicks / elapsed,
+        'server_rss_mb': rss_mb(pid),
+    }
+
+
+async def open_idle(port, count):
+    url = f'ws://127.0.0.1:{port}/_stcore/stream'
+    sockets = []
+    for _ in range(count):
+        ws = await websockets.connect(url, subprotocols=['streamlit'], max_size=None)
+        await Session(ws).rerun()
+        sockets.append(ws)
+    return sockets
+
+
+async def measure(port, pid, users, turns, idle):
+    rss = rss_mb(pid)
+    sockets = await open_idle(port, idle)
+    idle_mb = (rss_mb(pid) - rss) / idle if idle else float('nan')
+    try:
+        results = {}
+        for mode, fragment in (('full rerun', False), ('fragment', True)):
+            results[mode] = await load(port, pid, users, turns, fragment)
+    finally:
+        for ws in sockets:
+            await ws.close()
+    return idle_mb, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--turns', type=int, default=30)
+    parser.add_argument('--idle', type=int, default=200)
+    args = parser.parse_args()
+
+    port = free_port()
+    proc = start_server(port)
+    try:
+        asyncio.run(load(port, proc.pid, 2, 5, True))  # warm up imports and caches
+        idle_mb, results = asyncio.run(measure(port, proc.pid, args.users, args.turns, args.idle))
+        for mode, r in results.items():
+            print(f"{mode:>10}: {r['script_runs_per_turn']:.2f} script runs/turn  "
+                  f"{r['board_renders_per_turn']:.2f} board renders/turn  "
+                  f"{r['cpu_ms_per_turn']:.2f} ms server CPU/turn  "
+                  f"{r['turns_per_sec']:,.0f} turns/sec  rss {r['server_rss_mb']:.0f} MB  "
+                  f"({args.users} users + {args.idle} idle sessions)")
+        print(f"{'sessions':>10}: {idle_mb * 1024:.0f} KB server memory per idle session")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == '__main__':
+    main()
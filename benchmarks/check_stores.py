@@ -0,0 +1,143 @@
+"""Check the locking, expiry and eviction of the shared game stores.
+
+Run from the repo root:  python -m benchmarks.check_stores
+
+shm runs against a temporary file with a fake clock. kv runs against
+kv_server.py in a subprocess, with two KVGameStore instances standing in
+for two workers; its expiry checks wait out real (short) TTLs, so the run
+takes a few seconds. bench_backends.py covers lost updates under load.
+"""
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_backends import free_port, start_kv_server
+from kv_store import KVGameStore
+from shared_store import SharedGameStore
+
+
+def bump(game):
+    with game.lock:
+        game.seq += 1
+
+
+def seq(store, game_id):
+    _, game = store.get(game_id)
+    with game.lock:
+        return game.seq
+
+
+def blocks(lock):
+    """Whether another thread has to wait for lock while this one holds it."""
+    entered = threading.Event()
+
+    def enter():
+        with lock:
+            entered.set()
+
+    with lock:
+        thread = threading.Thread(target=enter)
+        thread.start()
+        waited = not entered.wait(0.05)
+    thread.join()
+    return waited and entered.is_set()
+
+
+# -----------------------------
+# shm
+# -----------------------------
+def check_shm():
+    now = [1000.0]
+    path = os.path.join(tempfile.mkdtemp(), 'games')
+    # Four games fill the single set, so a fifth evicts one
+    store = SharedGameStore(path, max_games=4, ttl=60, clock=lambda: now[0])
+    try:
+        assert store.max_games == 4 and len(store) == 0
+        assert blocks(store.get('a')[1].lock), 'shm lock let two threads in'
+
+        for game_id in 'abcd':
+            now[0] += 1
+            bump(store.get(game_id)[1])
+        now[0] += 1
+        store.get('a')  # b is now the least recently seen
+        now[0] += 1
+        store.get('e')
+        assert 'b' not in store and all(g in store for g in 'acde'), 'shm evicted the wrong game'
+        assert len(store) == 4 and store.get('b', create=False)[1] is None
+        assert seq(store, 'a') == 1
+
+        _, game = store.get('c')
+        now[0] += 61
+        assert 'c' not in store and len(store) == 0, 'shm kept games past their ttl'
+        with game.lock:
+            # A handle to an expired game starts over, as GameStore would
+            assert game.seq == 0
+            game.seq = 5
+        assert seq(store, 'c') == 5
+    finally:
+        store.close()
+        os.unlink(path)
+    print('shm: lock, LRU eviction and ttl expiry ok')
+
+
+# -----------------------------
+# kv
+# -----------------------------
+def check_kv(url):
+    one = KVGameStore(url, ttl=1, lock_ttl=0.2, lock_wait=0.1)
+    two = KVGameStore(url, ttl=1, lock_ttl=0.2, lock_wait=0.1)
+    try:
+        game_id, game = one.get(None)
+        assert game_id not in one, 'kv get() wrote a game before its first action'
+        assert blocks(game.lock), 'kv lock let two threads in'
+        bump(game)
+        assert game_id in two and seq(two, game_id) == 1
+
+        # Held past lock_wait by another worker: the second one gives up
+        with one.get(game_id)[1].lock:
+            try:
+                bump(two.get(game_id)[1])
+                raise AssertionError('kv lock let two workers in')
+            except TimeoutError:
+                pass
+
+        # Held past lock_ttl: the next worker takes over, and the late
+        # holder's write and unlock are refused rather than clobbering it
+        _, late = one.get(game_id)
+        late.lock.__enter__()
+        time.sleep(0.25)
+        _, game = two.get(game_id)
+        with game.lock:
+            game.seq = 10
+            late.seq = 99
+            try:
+                late.lock.__exit__(None, None, None)
+                raise AssertionError('kv released a lock it no longer held')
+            except TimeoutError:
+                pass
+            assert one.pool.execute(('EXISTS', one.prefix + game_id + ':lock'))[0] == 1
+        assert seq(one, game_id) == 10, 'kv kept the write of an expired lock holder'
+
+        time.sleep(1.1)
+        assert game_id not in one and one.get(game_id, create=False)[1] is None, \
+            'kv kept a game past its ttl'
+        assert seq(one, game_id) == 0
+    finally:
+        one.close()
+        two.close()
+    print('kv: lock, lock expiry, token-checked release and ttl expiry ok')
+
+
+def main():
+    check_shm()
+    port = free_port()
+    server = start_kv_server(port)
+    try:
+        check_kv(f'redis://127.0.0.1:{port}/0')
+    finally:
+        server.kill()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""Overload test for AI admission control: p99 with and without it.
+
+Run from the repo root:  python -m benchmarks.load_admission [--rate 300] [--seconds 5] [--threads 8] [--uvicorn]
+
+Requests arrive open-loop at --rate per second and are served by a fixed
+pool of --threads workers, like a gunicorn worker pool. Each is a /turn
+through game_api.run on the MCTS level (AI_BUDGET_MS=50 here), so the pool
+can sustain about threads / 50 ms; past that, requests queue for a worker.
+Latency is measured from each request's scheduled arrival. The run is
+repeated with admission control off (AI_CONCURRENCY=0) and on.
+
+With --uvicorn the same open-loop load is sent over HTTP to asgi_app under
+uvicorn (its game thread pool, ASGI_THREADS, set to --threads), one
+connection per request, and the admission stats are read from /ai_stats.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault('AI_BUDGET_MS', '50')
+os.environ.setdefault('RESULTS_DB', '')
+os.environ.setdefault('MOVE_LOG', '')
+
+import game_api  # noqa: E402
+from admission import Admission  # noqa: E402
+
+
+def request(arrival, latencies, lock):
+    game_id, game = game_api.games.get(None)
+    game_api.run(game_api.turn, game_id, game, {'player': 1, 'position': 4, 'level': 'mcts'})
+    took = time.perf_counter() - arrival
+    with lock:
+        latencies.append(took)
+
+
+def load(rate, seconds, threads):
+    latencies, lock = [], threading.Lock()
+    start = time.perf_counter()
+    total = int(rate * seconds)
+    with ThreadPoolExecutor(threads) as pool:
+        for n in range(total):
+            arrival = start + n / rate
+            delay = arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(request, arrival, latencies, lock)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return total / elapsed, latencies
+
+
+# -----------------------------
+# Over HTTP, against uvicorn
+# -----------------------------
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_uvicorn(port, env):
+    cmd = [sys.executable, '-m', 'uvicorn', 'asgi_app:app', '--port', str(port),
+           '--log-level', 'warning', '--no-access-log', '--backlog', '4096']
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=dict(os.environ, **env))
+    for _ in range(300):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError('uvicorn did not start')
+
+
+async def http(port, method, path, payload=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        body = json.dumps(payload).encode() if payload is not None else b''
+        writer.write(
+            f'{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n'.encode() + body
+        )
+        head = await reader.readuntil(b'\r\n\r\n')
+        length = next(int(line.split(b':')[1]) for line in head.lower().split(b'\r\n')
+                      if line.startswith(b'content-length:'))
+        return json.loads(await reader.readexactly(length))
+    finally:
+        writer.close()
+
+
+async def http_load(port, rate, seconds):
+    latencies = []
+    payload = {'player': 1, 'position': 4, 'level': 'mcts'}
+
+    async def one(arrival):
+        await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+        await http(port, 'POST', '/turn', payload)
+        latencies.append(time.perf_counter() - arrival)
+
+    start = time.perf_counter()
+    total = int(rate * seconds)
+    await asyncio.gather(*(one(start + n / rate) for n in range(total)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return total / elapsed, latencies, (await http(port, 'GET', '/ai_stats'))['admission']
+
+
+def run_uvicorn(args):
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    common = {'ASGI_THREADS': str(args.threads), 'AI_BUDGET_MS': '50', 'RESULTS_DB': '', 'MOVE_LOG': ''}
+    for label, env in (
+        ('off', {'AI_CONCURRENCY': '0'}),
+        ('on', {'AI_CONCURRENCY': str(args.concurrency), 'AI_QUEUE_MAX': str(args.queue_max),
+                'AI_DEADLINE_MS': str(args.deadline_ms)}),
+    ):
+        proc = start_uvicorn(port, dict(common, **env))
+        try:
+            asyncio.run(http(port, 'POST', '/turn', {'player': 1, 'position': 4, 'level': 'mcts'}))  # warm up
+            served, lat, stats = asyncio.run(http_load(port, args.rate, args.seconds))
+        finally:
+            proc.kill()
+            proc.wait()
+        report(f'uvicorn {label}', served, lat, stats)
+
+
+def report(label, served, lat, stats):
+    print(f"admission {label:>11}: {served:6.1f} req/s  p50 {lat[len(lat) // 2] * 1000:7.1f} ms  "
+          f"p99 {lat[int(len(lat) * 0.99)] * 1000:7.1f} ms  max {lat[-1] * 1000:7.1f} ms  "
+          f"fallback {stats['fallback_rate']:.1%}  max queue {stats['max_queue_depth']}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rate', type=float, default=300)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--concurrency', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--queue-max', type=int, default=2 * (os.cpu_count() or 1))
+    parser.add_argument('--deadline-ms', type=float, default=250)
+    parser.add_argument('--uvicorn', action='store_true', help='load asgi_app under uvicorn over HTTP')
+    args = parser.parse_args()
+    if args.uvicorn:
+        run_uvicorn(args)
+        return
+
+    game_api.game_policy(game_api.games.get(None)[1]).best_move(0, 0)  # load the AI outside the clock
+    for label, admission in (
+        ('off', Admission(concurrency=0)),
+        ('on', Admission(args.concurrency, args.queue_max, args.deadline_ms / 1000)),
+    ):
+        game_api.ai_admission = admission
+        served, lat = load(args.rate, args.seconds, args.threads)
+        report(label, served, lat, admission.stats())
+
+
+if __name__ == '__main__':
+    main()
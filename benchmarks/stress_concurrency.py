@@ -0,0 +1,92 @@
+"""Fire parallel /move, /ai_move and reset requests at shared games and check
+that no update is lost or double-counted.
+
+Run from the repo root:  python -m benchmarks.stress_concurrency [threads] [seconds]
+
+Each thread plays against a small set of shared games, echoing the last seq
+it saw. Every accepted state change must bump seq by exactly one, and every
+finished round must be counted exactly once in the score counters.
+"""
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from game_api import games
+from index import app
+
+
+def worker(game_ids, deadline, changes, finished, rejected, lock):
+    client = app.test_client()
+    rng = random.Random()
+    seen = {}
+    local_changes = Counter()
+    local_finished = Counter()
+    local_rejected = 0
+    while time.perf_counter() < deadline:
+        game_id = rng.choice(game_ids)
+        seq = seen.get(game_id, 0)
+        state = seen.get((game_id, 'state'))
+        if state and state['match_over']:
+            path, body = '/reset_match', {}
+        elif state and state['game_over']:
+            path, body = '/reset_round', {}
+        elif state and state['current_player'] == -1:
+            path, body = '/ai_move', {}
+        else:
+            path, body = '/move', {'position': rng.randrange(9), 'player': 1}
+        body.update(game_id=game_id, seq=seq)
+        response = client.post(path, json=body)
+        data = response.get_json()
+        if response.status_code == 409:
+            local_rejected += 1
+        else:
+            assert response.status_code == 200, data
+            step = data['seq'] - seq
+            assert step in (0, 1), (path, seq, data['seq'])
+            local_changes[game_id] += step
+            if step and path in ('/move', '/ai_move') and data['game_over']:
+                local_finished[game_id] += 1
+        seen[game_id] = data['seq']
+        seen[(game_id, 'state')] = data
+    with lock:
+        changes.update(local_changes)
+        finished.update(local_finished)
+        rejected.append(local_rejected)
+
+
+def run(threads=16, seconds=5.0, n_games=4):
+    game_ids = [f'stress-{i}' for i in range(n_games)]
+    for game_id in game_ids:
+        games.discard(game_id)
+    changes, finished, rejected = Counter(), Counter(), []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+    pool = [
+        threading.Thread(target=worker, args=(game_ids, deadline, changes, finished, rejected, lock))
+        for _ in range(threads)
+    ]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+    for game_id in game_ids:
+        _, game = games.get(game_id, create=False)
+        rounds = game.round_wins + game.round_losses + game.round_draws
+        assert game.seq == changes[game_id], (game_id, game.seq, changes[game_id])
+        assert rounds <= finished[game_id], (game_id, rounds, finished[game_id])
+        assert game.player_match_wins == game.round_wins
+        assert game.ai_match_wins == game.round_losses
+        xs, os_ = bin(game.x).count('1'), bin(game.o).count('1')
+        assert not game.x & game.o and xs - os_ in (0, 1), (game.x, game.o)
+    return sum(changes.values()), sum(finished.values()), sum(rejected)
+
+
+if __name__ == '__main__':
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    changes, finished, rejected = run(threads, seconds)
+    print(f"{threads} threads: {changes} state changes, {finished} rounds finished, "
+          f"{rejected} stale requests rejected - counters consistent")
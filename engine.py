@@ -0,0 +1,96 @@
+"""Bitboard tic-tac-toe engine shared by the Flask and Streamlit apps.
+
+A position is two 9-bit ints, ``x`` (player, 1) and ``o`` (AI, -1), where
+bit ``i`` is board cell ``i`` in row-major order.
+"""
+import random
+
+FULL = 0x1FF
+CENTER = 1 << 4
+CORNERS = (1 << 0) | (1 << 2) | (1 << 6) | (1 << 8)
+
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+)
+
+# HAS_LINE[b] is 1 when the 9-bit set b contains a full line
+HAS_LINE = bytes(
+    1 if any(b & m == m for m in WIN_MASKS) else 0 for b in range(1 << 9)
+)
+
+# BIT_INDEX[1 << i] == i for the nine single-cell bits
+BIT_INDEX = {1 << i: i for i in range(9)}
+
+# CELLS[b] lists the cell indices set in the 9-bit set b
+CELLS = tuple(tuple(i for i in range(9) if b >> i & 1) for b in range(1 << 9))
+
+# TERNARY[b] is the base-3 weight of b; TERNARY[x] + 2 * TERNARY[o] keys a position
+TERNARY = tuple(sum(3 ** i for i in CELLS[b]) for b in range(1 << 9))
+
+
+# -----------------------------
+# Conversions
+# -----------------------------
+def from_cells(cells):
+    x = o = 0
+    for i, v in enumerate(cells):
+        if v == 1:
+            x |= 1 << i
+        elif v == -1:
+            o |= 1 << i
+    return x, o
+
+def to_cells(x, o):
+    return [1 if x >> i & 1 else -1 if o >> i & 1 else 0 for i in range(9)]
+
+
+# -----------------------------
+# Rules
+# -----------------------------
+def winner(x, o):
+    """1 or -1 for a completed line, 0 for a draw, None while in play."""
+    if HAS_LINE[x]:
+        return 1
+    if HAS_LINE[o]:
+        return -1
+    if x | o == FULL:
+        return 0
+    return None
+
+def empty(x, o):
+    return FULL & ~(x | o)
+
+def moves(x, o):
+    free = FULL & ~(x | o)
+    while free:
+        bit = free & -free
+        free ^= bit
+        yield BIT_INDEX[bit]
+
+def side_to_move(x, o):
+    return 1 if bin(x).count('1') == bin(o).count('1') else -1
+
+
+# -----------------------------
+# Heuristic AI: win, block, center, corner, random
+# -----------------------------
+def heuristic_move(mine, theirs):
+    free = FULL & ~(mine | theirs)
+    if not free:
+        return None
+    # Try to win, then block
+    for side in (mine, theirs):
+        f = free
+        while f:
+            bit = f & -f
+            f ^= bit
+            if HAS_LINE[side | bit]:
+                return BIT_INDEX[bit]
+    # Take center
+    if free & CENTER:
+        return 4
+    # Take corners
+    corners = free & CORNERS
+    return random.choice(CELLS[corners or free])
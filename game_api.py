@@ -0,0 +1,364 @@
+"""Framework-neutral game actions shared by the Flask (index.py) and ASGI
+(asgi_app.py) front ends.
+
+Each action takes a Game and the decoded JSON body and mutates the game;
+``run`` applies one under the game's lock, rejecting stale requests, and
+returns the status and the response body encoded by protocol.py.
+"""
+import atexit
+import json
+import os
+import threading
+
+import metrics
+from admission import Admission
+import mnk
+import policies
+import protocol
+import rules
+from game_store import GameStore
+
+GAME_COOKIE = 'game_id'
+
+# Game state - one compact record per visitor, looked up by game id.
+# GAME_BACKEND picks where it lives: 'memory' (this process), 'shm'
+# (shared by the processes of one machine, at GAME_SHM_PATH) or 'kv'
+# (a Redis-protocol server at GAME_KV_URL, shared by every node).
+GAME_BACKEND = os.environ.get('GAME_BACKEND', 'memory')
+
+
+def open_games(backend=GAME_BACKEND):
+    max_games = int(os.environ.get('MAX_GAMES', 20000))
+    ttl = int(os.environ.get('GAME_TTL', 3600))
+    if backend == 'memory':
+        return GameStore(max_games=max_games, ttl=ttl)
+    if backend == 'shm':
+        import shared_store
+        return shared_store.SharedGameStore(
+            os.environ.get('GAME_SHM_PATH', shared_store.DEFAULT_PATH), max_games=max_games, ttl=ttl)
+    if backend == 'kv':
+        import kv_store
+        return kv_store.KVGameStore(os.environ.get('GAME_KV_URL', kv_store.DEFAULT_URL), ttl=ttl)
+    raise ValueError(f"unknown GAME_BACKEND: {backend}")
+
+
+games = open_games()
+
+
+RESULTS_DB = os.environ.get(
+    'RESULTS_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results.db'))
+# Admission control for time-budgeted AI levels (see admission.py);
+# AI_CONCURRENCY=0 turns it off
+ai_admission = Admission(
+    concurrency=int(os.environ.get('AI_CONCURRENCY', os.cpu_count() or 1)),
+    queue_max=int(os.environ.get('AI_QUEUE_MAX', 2 * (os.cpu_count() or 1))),
+    deadline=float(os.environ.get('AI_DEADLINE_MS', 1000)) / 1000,
+)
+LEADERBOARD_MAX = 100
+STATS_MAX = 1000
+# Bulk evaluation limits for /ai_moves
+BATCH_MAX = int(os.environ.get('BATCH_MAX', 100000))
+BATCH_STREAM_MIN = int(os.environ.get('BATCH_STREAM_MIN', 1000))
+BATCH_CHUNK = 1000
+_results = None
+_results_lock = threading.Lock()
+
+# Metric series used on every request, bound once (see metrics.py)
+PARSE_SECONDS = metrics.STAGE_SECONDS.labels('parse')
+RUN_SECONDS = metrics.STAGE_SECONDS.labels('run')
+AI_SECONDS = metrics.STAGE_SECONDS.labels('ai')
+WINNER_SECONDS = metrics.STAGE_SECONDS.labels('winner')
+RECORD_SECONDS = metrics.STAGE_SECONDS.labels('record')
+ENCODE_SECONDS = metrics.STAGE_SECONDS.labels('encode')
+MOVES = {1: metrics.MOVES.labels('human'), -1: metrics.MOVES.labels('ai')}
+SHED = {reason: metrics.AI_SHED.labels(reason) for reason in ('queue_full', 'deadline')}
+metrics.Gauge('ttt_ai_queue_depth', 'AI moves waiting for an admission slot.', lambda: ai_admission.waiting)
+metrics.Gauge('ttt_ai_running', 'AI moves holding an admission slot.', lambda: ai_admission.running)
+FINISHED = {
+    1: metrics.GAMES_FINISHED.labels('player'),
+    -1: metrics.GAMES_FINISHED.labels('ai'),
+    0: metrics.GAMES_FINISHED.labels('draw'),
+}
+
+
+def ai_policy():
+    # Loaded on first use, once per process (perfect-play table by default)
+    return policies.default_policy()
+
+
+def results():
+    # Opened on first use, once per process. RESULTS_DB='' (or a path that
+    # can't be opened, e.g. on a read-only serverless filesystem) keeps
+    # results in memory only.
+    global _results
+    with _results_lock:
+        if _results is None:
+            import sqlite3
+
+            import results_store
+            try:
+                _results = results_store.ResultStore(RESULTS_DB or None)
+            except sqlite3.Error:
+                _results = results_store.ResultStore(None)
+            atexit.register(_results.close)
+        return _results
+
+
+def clean_game_id(game_id):
+    if not isinstance(game_id, str) or len(game_id) > 64:
+        return None
+    return game_id
+
+
+# -----------------------------
+# Rules
+# -----------------------------
+def make_move(game, pos, player):
+    if game.done or game.match_over:
+        return False
+    placed = rules.place(game.x, game.o, game.size, pos, player)
+    if placed is None:
+        return False
+    game.play(pos)
+    game.x, game.o = placed
+    start = metrics.clock()
+    winner = rules.board_winner(game.x, game.o, game.size, pos, player)
+    WINNER_SECONDS.observe(metrics.clock() - start)
+    MOVES[player].inc()
+    game.winner = winner
+    if winner is not None:
+        FINISHED[winner].inc()
+        game.done = True
+        scores, game.match_over = rules.tally(protocol.scores(game), winner)
+        (game.round_wins, game.round_losses, game.round_draws,
+         game.player_match_wins, game.ai_match_wins) = scores
+    else:
+        game.current_player = -player
+    return True
+
+def game_policy(game):
+    if game.size != mnk.STANDARD:
+        return mnk.policy(game.level, game.size)
+    return policies.level(game.level) if game.level else ai_policy()
+
+def fallback_policy(game):
+    # The cheap heuristic played when an expensive move is shed
+    if game.size != mnk.STANDARD:
+        return mnk.policy('heuristic', game.size)
+    return policies.level('heuristic')
+
+def ai_choose_move(game, deadline=None):
+    policy = game_policy(game)
+    if getattr(policy, 'budget', None) is None:
+        # Table lookups and heuristics: too cheap to queue
+        return policy.best_move(game.x, game.o)
+    move, shed = ai_admission.best_move(policy, game.x, game.o, deadline)
+    if shed:
+        SHED[shed].inc()
+        move = fallback_policy(game).best_move(game.x, game.o)
+    return move
+
+def record_result(game_id, game, before):
+    # A request finishes at most one round; reset_match lowers the counters
+    after = protocol.scores(game)
+    if sum(after[:3]) == sum(before[:3]) + 1:
+        match = (game.player_match_wins, game.ai_match_wins) if game.match_over else None
+        results().record_round(game_id, game.winner, match)
+        log = rules.move_log() if game.size == mnk.STANDARD else None
+        if log is not None:
+            log.append(game.history(), game.winner, game.level or ai_policy().stats()['policy'], game_id)
+
+def is_stale(game, data):
+    # Clients may send the seq of the state they acted on; anything else
+    # means another request changed the game first
+    seq = (data or {}).get('seq')
+    return seq is not None and seq != game.seq
+
+
+# -----------------------------
+# Actions
+# -----------------------------
+def move(game, data):
+    player = data.get('player')
+    if game.current_player == player and make_move(game, data.get('position'), player):
+        game.seq += 1
+
+def set_level(game, data):
+    # Optional "level" field: one of policies.LEVELS, or null for the default
+    level = data.get('level', game.level)
+    if level != game.level and (level is None or level in policies.LEVELS):
+        game.level = level
+        game.seq += 1
+
+def request_deadline(data):
+    # Optional "deadline_ms": a tighter AI deadline than AI_DEADLINE_MS
+    value = data.get('deadline_ms')
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not value > 0:
+        return None
+    return min(value / 1000, ai_admission.deadline)
+
+def ai_move(game, data):
+    set_level(game, data)
+    if not game.done and not game.match_over and game.current_player == -1:
+        start = metrics.clock()
+        pos = ai_choose_move(game, request_deadline(data))
+        AI_SECONDS.observe(metrics.clock() - start)
+        metrics.AI_DECISIONS.labels(game.level or 'default').inc()
+        if pos is not None and make_move(game, pos, -1):
+            game.seq += 1
+
+def turn(game, data):
+    # Player move and the AI's reply in one request
+    move(game, data)
+    ai_move(game, data)
+
+def reset_round(game, data):
+    game.reset_round()
+    game.seq += 1
+
+def parse_size(value):
+    # [rows, cols, k] within mnk's limits, else None
+    if not isinstance(value, (list, tuple)) or len(value) != 3:
+        return None
+    if not all(isinstance(v, int) and not isinstance(v, bool) for v in value):
+        return None
+    try:
+        return mnk.check_size(*value)
+    except ValueError:
+        return None
+
+def reset_match(game, data):
+    # Optional "size": [rows, cols, k] starts the new match on that board
+    size = parse_size(data.get('size'))
+    if size is not None:
+        game.size = size
+    game.reset_match()
+    game.seq += 1
+
+def noop(game, data):
+    pass
+
+ACTIONS = {
+    '/move': move,
+    '/ai_move': ai_move,
+    '/turn': turn,
+    '/reset_round': reset_round,
+    '/reset_match': reset_match,
+    # Just the current state
+    '/state': noop,
+}
+
+# WebSocket messages are {"type": <action>, ...} with the same fields
+MESSAGES = {path.lstrip('/'): action for path, action in ACTIONS.items()}
+
+
+def run(action, game_id, game, data, content_type=protocol.JSON):
+    """Apply action under the game's lock; return (status, encoded body)."""
+    data = data or {}
+    start = metrics.clock()
+    with game.lock:
+        before = protocol.scores(game)
+        if is_stale(game, data):
+            status = 409
+        else:
+            action(game, data)
+            status = 200
+            recorded = metrics.clock()
+            record_result(game_id, game, before)
+            RECORD_SECONDS.observe(metrics.clock() - recorded)
+        encoded = metrics.clock()
+        # A client with no seq has no earlier state to apply a score delta to
+        snapshot = action is noop or data.get('seq') is None
+        body = protocol.encode(game, game_id, status, None if snapshot else before, content_type)
+        end = metrics.clock()
+    ENCODE_SECONDS.observe(end - encoded)
+    RUN_SECONDS.observe(end - start)
+    return status, body
+
+
+def ai_stats():
+    return dict(ai_policy().stats(), admission=ai_admission.stats())
+
+def leaderboard(limit=None):
+    # limit as sent in the query string: 10 if missing or not a number
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        limit = 10
+    limit = min(max(limit, 1), LEADERBOARD_MAX)
+    return {'leaderboard': results().leaderboard(limit)}
+
+def stats(game_ids):
+    # Totals plus per-game counters for up to STATS_MAX ids in one query
+    game_ids = [g for g in map(clean_game_id, game_ids) if g][:STATS_MAX]
+    store = results()
+    return dict(store.stats(game_ids), store=store.writer_stats())
+
+
+# -----------------------------
+# Batch evaluation (/ai_moves)
+# -----------------------------
+def batch_rows(moves, winners, with_outcome):
+    for move, winner in zip(moves.tolist(), winners.tolist()):
+        if winner == -2:
+            yield {'error': 'invalid board'}
+            continue
+        row = {'move': move if move >= 0 else None}
+        if with_outcome:
+            row['winner'] = None if winner == 2 else winner
+        yield row
+
+def stream_rows(rows):
+    # NDJSON, BATCH_CHUNK rows per chunk
+    chunk = []
+    for row in rows:
+        chunk.append(json.dumps(row, separators=(',', ':')))
+        if len(chunk) == BATCH_CHUNK:
+            yield '\n'.join(chunk) + '\n'
+            chunk = []
+    if chunk:
+        yield '\n'.join(chunk) + '\n'
+
+def ai_moves(data):
+    """Evaluate an /ai_moves body: (status, error dict) for a rejected
+    request, else (200, rows) with one result dict per board."""
+    # numpy is only loaded once a bulk client shows up
+    import batch
+
+    policy = ai_policy()
+    if not hasattr(policy, 'move_masks'):
+        # Batches are looked up in a dense move table (perfect or qlearning)
+        name = policy.stats()['policy']
+        return 501, {'error': f'batch evaluation is not available for AI_POLICY={name}'}
+
+    if not isinstance(data, dict):
+        data = {}
+    boards = data.get('boards')
+    if not isinstance(boards, list) or not boards:
+        return 400, {'error': 'boards must be a non-empty list'}
+    if len(boards) > BATCH_MAX:
+        return 413, {'error': f'at most {BATCH_MAX} boards per request'}
+    try:
+        moves, winners = batch.evaluate(policy, boards)
+    except (TypeError, ValueError, OverflowError):
+        return 400, {'error': 'each board must be 9 cells of 1, -1 or 0'}
+    return 200, batch_rows(moves, winners, bool(data.get('outcome')))
+
+
+# A socket outlives many TTL/LRU decisions, so each message looks its game
+# up again: that keeps it fresh in the store (and follows shared backends)
+def state_message(game_id, content_type=protocol.JSON):
+    game_id, game = games.get(game_id)
+    return run(noop, game_id, game, None, content_type)[1]
+
+def handle_message(game_id, text, content_type=protocol.JSON):
+    """Apply one WebSocket message; return the encoded state to push back."""
+    try:
+        data = json.loads(text)
+    except (TypeError, ValueError):
+        data = None
+    action = MESSAGES.get(data.get('type')) if isinstance(data, dict) else None
+    if action is None:
+        return b'{"error":"unknown message"}'
+    game_id, game = games.get(game_id)
+    return run(action, game_id, game, data, content_type)[1]
@@ -0,0 +1,189 @@
+import struct
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import mnk
+from engine import to_cells
+from policies import LEVELS
+
+# -----------------------------
+# Per-game record
+# -----------------------------
+class Game:
+    __slots__ = (
+        'x', 'o', 'current_player', 'done', 'winner',
+        'round_wins', 'round_losses', 'round_draws',
+        'player_match_wins', 'ai_match_wins', 'match_over',
+        'moves', 'level', 'size', 'seq', 'lock', 'last_seen',
+    )
+
+    def __init__(self):
+        # seq counts state changes; clients echo it back so stale moves
+        # can be rejected. Hold lock while reading or changing the game.
+        self.seq = 0
+        self.lock = threading.Lock()
+        self.round_wins = 0
+        self.round_losses = 0
+        self.round_draws = 0
+        self.player_match_wins = 0
+        self.ai_match_wins = 0
+        self.match_over = False
+        self.last_seen = 0.0
+        # AI level name (policies.LEVELS); None plays the default policy
+        self.level = None
+        # (rows, cols, k in a row); anything but mnk.STANDARD plays via mnk.py
+        self.size = mnk.STANDARD
+        self.reset_round()
+
+    def reset_round(self):
+        self.x = 0
+        self.o = 0
+        self.current_player = 1
+        self.done = False
+        self.winner = None
+        # Cell of each ply so far, one nibble per ply (ply 0 lowest)
+        self.moves = 0
+
+    def play(self, pos):
+        # The nibble history (and the move log) only covers 3x3 games
+        if self.size == mnk.STANDARD:
+            self.moves |= pos << (4 * bin(self.x | self.o).count('1'))
+
+    def history(self):
+        return [self.moves >> (4 * ply) & 0xF for ply in range(bin(self.x | self.o).count('1'))]
+
+    def reset_match(self):
+        self.reset_round()
+        self.round_wins = 0
+        self.round_losses = 0
+        self.round_draws = 0
+        self.player_match_wins = 0
+        self.ai_match_wins = 0
+        self.match_over = False
+
+    def to_dict(self):
+        return {
+            'board': to_cells(self.x, self.o) if self.size == mnk.STANDARD
+                     else mnk.to_cells(mnk.geometry(*self.size), self.x, self.o),
+            'size': self.size,
+            'current_player': self.current_player,
+            'game_over': self.done,
+            'winner': self.winner,
+            'match_over': self.match_over,
+            'round_wins': self.round_wins,
+            'round_losses': self.round_losses,
+            'round_draws': self.round_draws,
+            'player_match_wins': self.player_match_wins,
+            'ai_match_wins': self.ai_match_wins,
+            'level': self.level,
+            'seq': self.seq
+        }
+
+
+# -----------------------------
+# Fixed-size record, for stores shared between processes
+# -----------------------------
+# seq, flags (bit 0 AI to move, 1 round over, 2 match over), winner code,
+# the five score counters, move nibbles, level code, rows, cols, k,
+# last_seen, then x and o as little-endian bitboards wide enough for any board
+BOARD_BYTES = (mnk.MAX_SIDE ** 2 + 7) // 8
+RECORD_HEAD = '<IBB5IQB3B'
+RECORD = struct.Struct(f'{RECORD_HEAD}d{BOARD_BYTES}s{BOARD_BYTES}s')
+# Offset of last_seen, which stores may stamp without unpacking the record
+SEEN_OFFSET = struct.calcsize(RECORD_HEAD)
+WINNER_CODES = {None: 0, 1: 1, -1: 2, 0: 3}
+WINNERS = {code: winner for winner, code in WINNER_CODES.items()}
+LEVEL_CODES = {None: 0, **{name: i + 1 for i, name in enumerate(LEVELS)}}
+LEVEL_NAMES = {code: name for name, code in LEVEL_CODES.items()}
+
+
+def pack_game(game):
+    flags = (game.current_player == -1) | game.done << 1 | game.match_over << 2
+    return RECORD.pack(
+        game.seq, flags, WINNER_CODES[game.winner],
+        game.round_wins, game.round_losses, game.round_draws,
+        game.player_match_wins, game.ai_match_wins,
+        game.moves, LEVEL_CODES[game.level], *game.size, game.last_seen,
+        game.x.to_bytes(BOARD_BYTES, 'little'), game.o.to_bytes(BOARD_BYTES, 'little'),
+    )
+
+def unpack_game(data, game):
+    """Load a pack_game() record into game (keeping its lock); return game."""
+    (game.seq, flags, winner,
+     game.round_wins, game.round_losses, game.round_draws,
+     game.player_match_wins, game.ai_match_wins,
+     game.moves, level, rows, cols, k, game.last_seen, x, o) = RECORD.unpack(data)
+    game.current_player = -1 if flags & 1 else 1
+    game.done = bool(flags & 2)
+    game.match_over = bool(flags & 4)
+    game.winner = WINNERS[winner]
+    game.level = LEVEL_NAMES[level]
+    game.size = (rows, cols, k)
+    game.x = int.from_bytes(x, 'little')
+    game.o = int.from_bytes(o, 'little')
+    return game
+
+
+# -----------------------------
+# Session-keyed store with TTL + LRU eviction
+# -----------------------------
+class GameStore:
+    """In-process games. Other backends with the same interface share games
+    between processes: shared_store.SharedGameStore (one machine) and
+    kv_store.KVGameStore (a Redis-protocol server). Their games' ``lock``
+    loads the shared state on entry and writes it back on exit.
+    """
+    def __init__(self, max_games=20000, ttl=3600, clock=time.monotonic):
+        self.max_games = max_games
+        self.ttl = ttl
+        self.clock = clock
+        self._games = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._games)
+
+    def __contains__(self, game_id):
+        return game_id in self._games
+
+    def new_id(self):
+        return uuid.uuid4().hex
+
+    def get(self, game_id, create=True):
+        """Return (game_id, game), creating a fresh game for unknown ids.
+
+        The OrderedDict is kept in last-access order, so the oldest entries
+        are both the LRU victims and the only candidates for TTL expiry.
+        """
+        with self._lock:
+            now = self.clock()
+            self._expire(now)
+            game = self._games.get(game_id) if game_id else None
+            if game is None:
+                if not create:
+                    return game_id, None
+                if not game_id:
+                    game_id = self.new_id()
+                game = Game()
+                self._games[game_id] = game
+                while len(self._games) > self.max_games:
+                    self._games.popitem(last=False)
+            else:
+                self._games.move_to_end(game_id)
+            game.last_seen = now
+            return game_id, game
+
+    def discard(self, game_id):
+        with self._lock:
+            self._games.pop(game_id, None)
+
+    def _expire(self, now):
+        games = self._games
+        cutoff = now - self.ttl
+        while games:
+            oldest = next(iter(games.values()))
+            if oldest.last_seen > cutoff:
+                break
+            games.popitem(last=False)
@@ -1,437 +1,161 @@
-from flask import Flask, render_template_string, request, jsonify
-import random
-import streamlit as st
-
-st.title("My ML App")
-st.write("Hello! This is running on Streamlit Cloud 🚀")
-
-# Example: take user input
-user_input = st.text_input("Enter your name:")
-
-if user_input:
-    st.success(f"Hello {user_input}, your ML model is ready!")
+from flask import Flask, Response, g, request, jsonify
+import os
 
+import game_api
+import metrics
+import protocol
+from game_api import GAME_COOKIE, clean_game_id, games
+from page import home_page
 
 app = Flask(__name__)
 
-# Game state - using simple variables instead of class instances
-board = [0] * 9
-current_player = 1
-done = False
-winner = None
-round_wins = 0
-round_losses = 0
-round_draws = 0
-player_match_wins = 0
-ai_match_wins = 0
-match_over = False
-
 def handler(request, response):
     # Example: simple ML placeholder
     return response.json({"message": "ML model is running!"})
 
 
-def reset_game():
-    global board, current_player, done, winner
-    board = [0] * 9
-    current_player = 1
-    done = False
-    winner = None
-
-def reset_match():
-    global board, current_player, done, winner, round_wins, round_losses, round_draws, player_match_wins, ai_match_wins, match_over
-    board = [0] * 9
-    current_player = 1
-    done = False
-    winner = None
-    round_wins = 0
-    round_losses = 0
-    round_draws = 0
-    player_match_wins = 0
-    ai_match_wins = 0
-    match_over = False
-
-def check_winner(board_state):
-    wins = [
-        [0, 1, 2], [3, 4, 5], [6, 7, 8],
-        [0, 3, 6], [1, 4, 7], [2, 5, 8],
-        [0, 4, 8], [2, 4, 6]
-    ]
-    for line in wins:
-        if board_state[line[0]] != 0 and board_state[line[0]] == board_state[line[1]] == board_state[line[2]]:
-            return board_state[line[0]]
-    if 0 not in board_state:
-        return 0
-    return None
-
-def make_move(pos, player):
-    global board, done, winner, current_player, round_wins, round_losses, round_draws, player_match_wins, ai_match_wins, match_over
-    
-    if not done and not match_over and board[pos] == 0:
-        board[pos] = player
-        winner = check_winner(board)
-        if winner is not None:
-            done = True
-            if winner == 1:
-                round_wins += 1
-                player_match_wins += 1
-            elif winner == -1:
-                round_losses += 1
-                ai_match_wins += 1
-            else:
-                round_draws += 1
-            if player_match_wins >= 3 or ai_match_wins >= 3:
-                match_over = True
-        else:
-            current_player = -player
-        return True
-    return False
-
-def ai_choose_move():
-    available = [i for i, v in enumerate(board) if v == 0]
-    
-    # Try to win
-    for move in available:
-        test_board = board[:]
-        test_board[move] = -1
-        if check_winner(test_board) == -1:
-            return move
-    
-    # Block player
-    for move in available:
-        test_board = board[:]
-        test_board[move] = 1
-        if check_winner(test_board) == 1:
-            return move
-    
-    # Take center
-    if 4 in available:
-        return 4
-    
-    # Take corners
-    corners = [0, 2, 6, 8]
-    available_corners = [m for m in available if m in corners]
-    if available_corners:
-        return random.choice(available_corners)
-    
-    return random.choice(available)
+# -----------------------------
+# Metrics
+# -----------------------------
+@app.before_request
+def start_timer():
+    g.started = metrics.clock()
+
+@app.after_request
+def record_request(response):
+    # Label by route pattern, not path, so unknown URLs share one series
+    route = request.url_rule.rule if request.url_rule else 'other'
+    metrics.REQUEST_SECONDS.labels(route).observe(metrics.clock() - g.started)
+    metrics.REQUESTS.labels(route, str(response.status_code)).inc()
+    return response
+
+def json_body(silent=False):
+    start = metrics.clock()
+    data = request.get_json(silent=silent)
+    game_api.PARSE_SECONDS.observe(metrics.clock() - start)
+    return data
+
+
+def current_game(data=None):
+    game_id = (data or {}).get('game_id') or request.args.get('game_id') or request.cookies.get(GAME_COOKIE)
+    return games.get(clean_game_id(game_id))
+
+def game_response(action, data):
+    if data is not None and not isinstance(data, dict):
+        return jsonify({'error': 'expected a JSON object'}), 400
+    game_id, game = current_game(data)
+    content_type = protocol.negotiate(request.headers.get('Accept'))
+    status, body = game_api.run(action, game_id, game, data, content_type)
+    response = Response(body, status, content_type=content_type)
+    if request.cookies.get(GAME_COOKIE) != game_id:
+        response.set_cookie(GAME_COOKIE, game_id, max_age=games.ttl, httponly=True, samesite='Lax')
+    return response
 
 @app.route('/')
 def home():
-    return render_template_string('''
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Tic Tac Toe AI</title>
-    <style>
-        body {
-            font-family: Arial, sans-serif;
-            display: flex;
-            justify-content: center;
-            align-items: center;
-            min-height: 100vh;
-            margin: 0;
-            background: #f0f2f5;
-        }
-        .container {
-            background: white;
-            padding: 30px;
-            border-radius: 12px;
-            box-shadow: 0 8px 32px rgba(0,0,0,0.1);
-            text-align: center;
-            max-width: 400px;
-        }
-        h1 { color: #333; margin-bottom: 10px; }
-        .subtitle { color: #666; margin-bottom: 20px; }
-        .match-info {
-            background: #f8f9fa;
-            padding: 12px;
-            border-radius: 8px;
-            margin: 20px 0;
-            font-weight: bold;
-        }
-        .board {
-            display: grid;
-            grid-template-columns: repeat(3, 1fr);
-            gap: 8px;
-            margin: 25px auto;
-            max-width: 300px;
-        }
-        .cell {
-            width: 80px;
-            height: 80px;
-            background: #f8f9fa;
-            border: 2px solid #e9ecef;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            font-size: 28px;
-            font-weight: bold;
-            cursor: pointer;
-            border-radius: 8px;
-            transition: all 0.2s;
-        }
-        .cell:hover { background: #e9ecef; transform: scale(1.05); }
-        .cell.x { color: #dc3545; }
-        .cell.o { color: #007bff; }
-        .status {
-            margin: 20px 0;
-            font-size: 18px;
-            font-weight: bold;
-            min-height: 25px;
-        }
-        .scores { margin: 15px 0; color: #666; }
-        button {
-            background: #007bff;
-            color: white;
-            border: none;
-            padding: 12px 24px;
-            border-radius: 8px;
-            cursor: pointer;
-            font-size: 16px;
-            font-weight: bold;
-            transition: background 0.2s;
-        }
-        button:hover { background: #0056b3; }
-        .winner { color: #28a745; }
-        .loser { color: #dc3545; }
-        .thinking { color: #17a2b8; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1>🎮 Tic Tac Toe AI</h1>
-        <p class="subtitle">Fast Q-Learning Algorithm</p>
-        
-        <div class="match-info">
-            <div>🏆 Best of 3 Matches</div>
-            <div id="matchScore">Player: 0 | AI: 0</div>
-        </div>
-        
-        <div class="board" id="board"></div>
-        
-        <div class="status" id="status">Your turn! Click a cell</div>
-        <div class="scores" id="scores">Wins: 0 | Losses: 0 | Draws: 0</div>
-        
-        <button id="resetBtn">New Round</button>
-    </div>
-
-    <script>
-        const boardEl = document.getElementById('board');
-        const statusEl = document.getElementById('status');
-        const scoresEl = document.getElementById('scores');
-        const matchScoreEl = document.getElementById('matchScore');
-        const resetBtn = document.getElementById('resetBtn');
-        
-        let board = Array(9).fill(0);
-        let gameOver = false;
-        let matchOver = false;
-
-        function renderBoard() {
-            boardEl.innerHTML = '';
-            board.forEach((cell, i) => {
-                const cellEl = document.createElement('div');
-                cellEl.className = 'cell';
-                
-                if (cell === 1) {
-                    cellEl.textContent = 'X';
-                    cellEl.classList.add('x');
-                } else if (cell === -1) {
-                    cellEl.textContent = 'O';
-                    cellEl.classList.add('o');
-                } else {
-                    cellEl.addEventListener('click', () => handleCellClick(i));
-                }
-                
-                boardEl.appendChild(cellEl);
-            });
-        }
-
-        async function handleCellClick(index) {
-            if (gameOver || matchOver || board[index] !== 0) return;
-            
-            try {
-                const response = await fetch('/move', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ position: index, player: 1 })
-                });
-                const data = await response.json();
-                updateGameState(data);
-            } catch (error) {
-                console.error('Move error:', error);
-            }
-        }
-
-        async function makeAIMove() {
-            if (gameOver || matchOver) return;
-            
-            statusEl.innerHTML = '<span class="thinking">🤖 AI thinking...</span>';
-            
-            setTimeout(async () => {
-                try {
-                    const response = await fetch('/ai_move', { method: 'POST' });
-                    const data = await response.json();
-                    updateGameState(data);
-                } catch (error) {
-                    console.error('AI move error:', error);
-                }
-            }, 800);
-        }
-
-        function updateGameState(data) {
-            board = data.board;
-            gameOver = data.game_over;
-            matchOver = data.match_over;
-            
-            renderBoard();
-            updateScores(data);
-            updateStatus(data);
-            
-            if (!gameOver && !matchOver && data.current_player === -1) {
-                setTimeout(makeAIMove, 500);
-            }
-        }
-
-        function updateScores(data) {
-            scoresEl.textContent = `Wins: ${data.round_wins} | Losses: ${data.round_losses} | Draws: ${data.round_draws}`;
-            matchScoreEl.textContent = `Player: ${data.player_match_wins} | AI: ${data.ai_match_wins}`;
-        }
-
-        function updateStatus(data) {
-            if (data.match_over) {
-                if (data.player_match_wins >= 3) {
-                    statusEl.innerHTML = '<span class="winner">🎉 You won the match!</span>';
-                } else {
-                    statusEl.innerHTML = '<span class="loser">🤖 AI won the match!</span>';
-                }
-                resetBtn.textContent = 'New Match';
-            } else if (data.game_over) {
-                if (data.winner === 1) {
-                    statusEl.innerHTML = '<span class="winner">✅ You win this round!</span>';
-                } else if (data.winner === -1) {
-                    statusEl.innerHTML = '<span class="loser">🤖 AI wins this round!</span>';
-                } else {
-                    statusEl.textContent = '🤝 Draw!';
-                }
-                resetBtn.textContent = 'Next Round';
-            } else {
-                statusEl.textContent = data.current_player === 1 ? 'Your turn! Click a cell' : '🤖 AI turn';
-                resetBtn.textContent = 'New Round';
-            }
-        }
-
-        resetBtn.onclick = async () => {
-            const endpoint = matchOver ? '/reset_match' : '/reset_round';
-            try {
-                const response = await fetch(endpoint, { method: 'POST' });
-                const data = await response.json();
-                board = data.board;
-                gameOver = false;
-                matchOver = data.match_over || false;
-                renderBoard();
-                updateScores(data);
-                statusEl.textContent = 'Your turn! Click a cell';
-                resetBtn.textContent = 'New Round';
-            } catch (error) {
-                console.error('Reset error:', error);
-            }
-        };
-
-        renderBoard();
-    </script>
-</body>
-</html>
-    ''')
+    status, body, headers = home_page.respond(
+        request.headers.get('Accept-Encoding'), request.headers.get('If-None-Match'))
+    response = Response(body, status, headers)
+    # The page only talks over /ws, whose handshake can't set cookies, so
+    # the game id the socket will pick up is handed out here
+    if not clean_game_id(request.cookies.get(GAME_COOKIE)):
+        response.set_cookie(GAME_COOKIE, games.new_id(), max_age=games.ttl, httponly=True, samesite='Lax')
+    return response
 
 @app.route('/move', methods=['POST'])
 def move():
     try:
-        data = request.get_json()
-        pos = data.get('position')
-        player = data.get('player')
-        
-        if current_player == player:
-            make_move(pos, player)
-        
-        return jsonify({
-            'board': board,
-            'current_player': current_player,
-            'game_over': done,
-            'winner': winner,
-            'match_over': match_over,
-            'round_wins': round_wins,
-            'round_losses': round_losses,
-            'round_draws': round_draws,
-            'player_match_wins': player_match_wins,
-            'ai_match_wins': ai_match_wins
-        })
+        return game_response(game_api.move, json_body())
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/ai_move', methods=['POST'])
 def ai_move():
     try:
-        if not done and not match_over and current_player == -1:
-            available = [i for i, v in enumerate(board) if v == 0]
-            if available:
-                pos = ai_choose_move()
-                make_move(pos, -1)
-        
-        return jsonify({
-            'board': board,
-            'current_player': current_player,
-            'game_over': done,
-            'winner': winner,
-            'match_over': match_over,
-            'round_wins': round_wins,
-            'round_losses': round_losses,
-            'round_draws': round_draws,
-            'player_match_wins': player_match_wins,
-            'ai_match_wins': ai_match_wins
-        })
+        return game_response(game_api.ai_move, json_body(silent=True))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/turn', methods=['POST'])
+def turn():
+    try:
+        return game_response(game_api.turn, json_body())
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/reset_round', methods=['POST'])
 def reset_round():
     try:
-        reset_game()
-        return jsonify({
-            'board': board,
-            'current_player': current_player,
-            'game_over': done,
-            'winner': winner,
-            'match_over': match_over,
-            'round_wins': round_wins,
-            'round_losses': round_losses,
-            'round_draws': round_draws,
-            'player_match_wins': player_match_wins,
-            'ai_match_wins': ai_match_wins
-        })
+        return game_response(game_api.reset_round, json_body(silent=True))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/reset_match', methods=['POST'])
 def reset_match_route():
     try:
-        reset_match()
-        return jsonify({
-            'board': board,
-            'current_player': current_player,
-            'game_over': done,
-            'winner': winner,
-            'match_over': match_over,
-            'round_wins': round_wins,
-            'round_losses': round_losses,
-            'round_draws': round_draws,
-            'player_match_wins': player_match_wins,
-            'ai_match_wins': ai_match_wins
-        })
+        return game_response(game_api.reset_match, json_body(silent=True))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/state', methods=['POST'])
+def state():
+    try:
+        return game_response(game_api.noop, json_body(silent=True))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/ai_moves', methods=['POST'])
+def ai_moves():
+    data = json_body(silent=True)
+    status, result = game_api.ai_moves(data)
+    if status != 200:
+        return jsonify(result), status
+    if len(data['boards']) >= game_api.BATCH_STREAM_MIN or request.args.get('stream'):
+        return Response(game_api.stream_rows(result), mimetype='application/x-ndjson')
+    return jsonify({'results': list(result)})
+
+@app.route('/ai_stats', methods=['GET'])
+def ai_stats():
+    return jsonify(game_api.ai_stats())
+
+@app.route('/leaderboard', methods=['GET'])
+def leaderboard():
+    return jsonify(game_api.leaderboard(request.args.get('limit')))
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    return jsonify(game_api.stats(request.args.getlist('game_id')))
+
+@app.route('/metrics', methods=['GET'])
+def metrics_route():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.route('/debug/profile', methods=['GET', 'POST'])
+def profile():
+    # GET: folded stacks for flamegraph.pl; POST: start/stop/reset (see metrics.profile_control)
+    if not metrics.profile_allowed(request.headers.get(metrics.PROFILE_HEADER)):
+        return jsonify({'error': 'not found'}), 404
+    if request.method == 'GET':
+        return Response(metrics.profiler.folded(), content_type='text/plain; charset=utf-8')
+    return jsonify(metrics.profile_control(request.get_json(silent=True)))
+
+# WebSockets need a long-lived server. Serverless hosts (VERCEL is set there)
+# skip flask-sock entirely and the page falls back to POST /turn.
+if os.environ.get('ENABLE_WEBSOCKET', '0' if os.environ.get('VERCEL') else '1') == '1':
+    from flask_sock import Sock
+
+    @Sock(app).route('/ws')
+    def ws(socket):
+        # ?format=compact switches pushes to binary protocol.COMPACT frames
+        game_id, _ = current_game()
+        content_type = protocol.COMPACT if request.args.get('format') == 'compact' else protocol.JSON
+
+        def push(body):
+            socket.send(body if content_type == protocol.COMPACT else body.decode())
+
+        push(game_api.state_message(game_id, content_type))
+        while True:
+            push(game_api.handle_message(game_id, socket.receive(), content_type))
+
 # Vercel entry point
 app = app
@@ -0,0 +1,260 @@
+"""Stand-in for a Redis server, for local development and the benchmarks.
+
+Speaks the subset of RESP that kv_store.py uses, plus a few conveniences:
+PING, ECHO, AUTH, SELECT, GET, SET (EX, PX, NX, XX), DEL, EXISTS, EXPIRE,
+PEXPIRE, TTL, MGET, MSET, DBSIZE, FLUSHDB, FLUSHALL and QUIT. EVAL runs
+only kv_store's scripts, each by a Python equivalent; there is no Lua. One
+asyncio loop holds every key in a dict (all databases share it); keys
+expire on access and in a periodic sweep. Nothing is persisted.
+
+    python kv_server.py --port 6380
+    GAME_BACKEND=kv GAME_KV_URL=redis://127.0.0.1:6380/0 gunicorn -w 4 index:app
+"""
+import argparse
+import asyncio
+import time
+from itertools import islice
+
+from kv_store import RELEASE_SCRIPT
+
+SWEEP_INTERVAL = 1.0
+SWEEP_SAMPLE = 1000
+
+
+def bulk(value):
+    return b'$-1\r\n' if value is None else b'$%d\r\n%s\r\n' % (len(value), value)
+
+def integer(n):
+    return b':%d\r\n' % n
+
+def error(message):
+    return b'-ERR %s\r\n' % message.encode()
+
+OK = b'+OK\r\n'
+
+
+class KVServer:
+    def __init__(self, password=None, clock=time.monotonic):
+        self.password = password
+        self.clock = clock
+        self.data = {}
+        self.expires = {}
+
+    # -----------------------------
+    # Keyspace
+    # -----------------------------
+    def _live(self, key):
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= self.clock():
+            del self.expires[key]
+            self.data.pop(key, None)
+        return key in self.data
+
+    def _set(self, key, value, ttl=None):
+        self.data[key] = value
+        # Re-inserted so expires stays roughly in deadline order for sweep()
+        self.expires.pop(key, None)
+        if ttl is not None:
+            self.expires[key] = self.clock() + ttl
+
+    def sweep(self):
+        # Drop a sample of expired keys so unread ones don't pile up
+        now = self.clock()
+        for key in [k for k, t in islice(self.expires.items(), SWEEP_SAMPLE) if t <= now]:
+            del self.expires[key]
+            self.data.pop(key, None)
+
+    # -----------------------------
+    # Commands
+    # -----------------------------
+    def execute(self, args):
+        name = args[0].decode('ascii', 'replace').upper()
+        command = getattr(self, 'cmd_' + name.lower(), None)
+        if command is None:
+            return error(f"unknown command '{name}'")
+        try:
+            return command(*args[1:])
+        except TypeError:
+            return error(f"wrong number of arguments for '{name}'")
+        except ValueError:
+            return error('syntax error')
+
+    def cmd_ping(self, message=None):
+        return b'+PONG\r\n' if message is None else bulk(message)
+
+    def cmd_echo(self, message):
+        return bulk(message)
+
+    def cmd_select(self, db):
+        int(db)
+        return OK
+
+    def cmd_get(self, key):
+        return bulk(self.data[key] if self._live(key) else None)
+
+    def cmd_set(self, key, value, *options):
+        ttl, only, i = None, None, 0
+        while i < len(options):
+            option = options[i].upper()
+            if option in (b'EX', b'PX'):
+                ttl = int(options[i + 1]) / (1 if option == b'EX' else 1000)
+                if ttl <= 0:
+                    raise ValueError
+                i += 2
+            elif option in (b'NX', b'XX'):
+                only = option
+                i += 1
+            else:
+                raise ValueError
+        exists = self._live(key)
+        if (only == b'NX' and exists) or (only == b'XX' and not exists):
+            return bulk(None)
+        self._set(key, value, ttl)
+        return OK
+
+    def cmd_del(self, *keys):
+        removed = 0
+        for key in keys:
+            if self._live(key):
+                del self.data[key]
+                self.expires.pop(key, None)
+                removed += 1
+        return integer(removed)
+
+    def cmd_exists(self, *keys):
+        return integer(sum(self._live(key) for key in keys))
+
+    def cmd_expire(self, key, seconds, scale=1):
+        if not self._live(key):
+            return integer(0)
+        ttl = int(seconds) / scale
+        if ttl <= 0:
+            self.cmd_del(key)
+        else:
+            self.expires.pop(key, None)
+            self.expires[key] = self.clock() + ttl
+        return integer(1)
+
+    def cmd_pexpire(self, key, ms):
+        return self.cmd_expire(key, ms, 1000)
+
+    def cmd_ttl(self, key):
+        if not self._live(key):
+            return integer(-2)
+        deadline = self.expires.get(key)
+        return integer(-1 if deadline is None else round(deadline - self.clock()))
+
+    def cmd_mget(self, *keys):
+        return b'*%d\r\n' % len(keys) + b''.join(bulk(self.data[k] if self._live(k) else None) for k in keys)
+
+    def cmd_mset(self, *pairs):
+        if not pairs or len(pairs) % 2:
+            raise TypeError
+        for key, value in zip(pairs[0::2], pairs[1::2]):
+            self._set(key, value)
+        return OK
+
+    def cmd_dbsize(self):
+        self.sweep()
+        return integer(len(self.data))
+
+    def cmd_flushdb(self, *options):
+        self.data.clear()
+        self.expires.clear()
+        return OK
+
+    cmd_flushall = cmd_flushdb
+
+    def cmd_eval(self, script, numkeys, *rest):
+        run = {RELEASE_SCRIPT.encode(): self._release}.get(script)
+        if run is None:
+            return error('only the kv_store scripts can be run here')
+        numkeys = int(numkeys)
+        if not 0 <= numkeys <= len(rest):
+            raise ValueError
+        return run(rest[:numkeys], rest[numkeys:])
+
+    def _release(self, keys, args):
+        key, lock = keys
+        token, ttl, *record = args
+        if not self._live(lock) or self.data[lock] != token:
+            return integer(0)
+        if record:
+            self._set(key, record[0], int(ttl))
+        else:
+            self.cmd_expire(key, ttl)
+        self.cmd_del(lock)
+        return integer(1)
+
+    # -----------------------------
+    # Connections
+    # -----------------------------
+    async def handle(self, reader, writer):
+        authed = not self.password
+        try:
+            while True:
+                args = await read_command(reader)
+                if args is None:
+                    break
+                name = args[0].upper()
+                if name == b'QUIT':
+                    writer.write(OK)
+                    break
+                if name == b'AUTH':
+                    if self.password is None:
+                        writer.write(error('AUTH called without any password configured'))
+                    else:
+                        authed = args[-1].decode(errors='replace') == self.password
+                        writer.write(OK if authed else b'-WRONGPASS invalid password\r\n')
+                elif not authed:
+                    writer.write(b'-NOAUTH Authentication required.\r\n')
+                else:
+                    writer.write(self.execute(args))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=6379):
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            while True:
+                await asyncio.sleep(SWEEP_INTERVAL)
+                self.sweep()
+
+
+async def read_command(reader):
+    """One command as a list of bytes arguments, or None at end of stream."""
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b'*'):
+        # Inline command, as typed into telnet
+        return line.split() or [b'PING']
+    args = []
+    for _ in range(int(line[1:])):
+        header = await reader.readline()
+        if not header.startswith(b'$'):
+            raise ValueError('expected a bulk string')
+        data = await reader.readexactly(int(header[1:]) + 2)
+        args.append(data[:-2])
+    if not args:
+        raise ValueError('empty command')
+    return args
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6379)
+    parser.add_argument('--password')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(KVServer(args.password).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
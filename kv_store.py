@@ -0,0 +1,280 @@
+"""Game state in a Redis-protocol key-value store, shared across machines.
+
+    GAME_BACKEND=kv GAME_KV_URL=redis://[:password@]host:6379/0
+
+Each game is one key holding a game_store.RECORD with the store's TTL, so
+any worker on any node can serve any request without sticky sessions.
+A game action costs two round trips, both made by the game's ``lock``:
+entering takes a per-game lock key (SET NX PX, with a random token) and
+reads the record in one pipeline; leaving runs RELEASE_SCRIPT, which writes
+the record back (only if it changed) and deletes the lock key, both only if
+the key still holds this token. ``get()`` makes no request: a new game is
+written when its first action releases the lock. Connections come from a
+bounded pool and are reused between requests.
+
+The lock key expires after lock_ttl seconds in case its holder dies. A
+request that outlives it has lost its exclusive hold: its write is dropped
+and the lock raises TimeoutError, so keep lock_ttl well above the slowest
+AI budget. These calls block, so under asgi_app they run on its game
+thread pool. kv_server.py is a stand-in server for local development and
+benchmarks/check_stores.py.
+"""
+import socket
+import threading
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+from urllib.parse import unquote, urlsplit
+
+from game_store import RECORD, Game, pack_game, unpack_game
+
+DEFAULT_URL = 'redis://127.0.0.1:6379/0'
+LOCK_STRIPES = 64
+
+# KEYS: game key, lock key. ARGV: token, ttl, [record]. Writes the record
+# (or refreshes its expiry) and unlocks if the lock key holds the token;
+# returns 1 if it did, else 0.
+RELEASE_SCRIPT = '''\
+if redis.call('GET', KEYS[2]) ~= ARGV[1] then return 0 end
+if ARGV[3] then redis.call('SET', KEYS[1], ARGV[3], 'EX', ARGV[2])
+else redis.call('EXPIRE', KEYS[1], ARGV[2]) end
+redis.call('DEL', KEYS[2])
+return 1
+'''
+
+
+class RespError(Exception):
+    pass
+
+
+# -----------------------------
+# RESP client
+# -----------------------------
+def encode_command(args):
+    out = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode()
+        elif isinstance(arg, int):
+            arg = b'%d' % arg
+        out.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+    return b''.join(out)
+
+def read_reply(f):
+    # Error replies are returned, not raised, so a pipeline reads them all
+    line = f.readline()
+    if not line.endswith(b'\r\n'):
+        raise ConnectionError('connection closed by server')
+    kind, rest = line[:1], line[1:-2]
+    if kind == b'+':
+        return rest.decode()
+    if kind == b'-':
+        return RespError(rest.decode())
+    if kind == b':':
+        return int(rest)
+    if kind == b'$':
+        n = int(rest)
+        if n < 0:
+            return None
+        data = f.read(n + 2)
+        if len(data) != n + 2:
+            raise ConnectionError('connection closed by server')
+        return data[:-2]
+    if kind == b'*':
+        n = int(rest)
+        return None if n < 0 else [read_reply(f) for _ in range(n)]
+    raise ConnectionError(f'unexpected reply {line[:40]!r}')
+
+def check(replies):
+    for reply in replies:
+        if isinstance(reply, RespError):
+            raise reply
+    return replies
+
+
+class Connection:
+    def __init__(self, host, port, timeout):
+        self.sock = socket.create_connection((host, port), timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.file = self.sock.makefile('rb')
+
+    def pipeline(self, *commands):
+        """Send the commands in one write and return their replies in order."""
+        self.sock.sendall(b''.join(map(encode_command, commands)))
+        return [read_reply(self.file) for _ in commands]
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+
+class ConnectionPool:
+    """Up to max_connections connections to the server at url, reused LIFO."""
+
+    def __init__(self, url=DEFAULT_URL, max_connections=32, timeout=2.0):
+        parts = urlsplit(url)
+        if parts.scheme != 'redis':
+            raise ValueError(f"expected a redis:// URL, got {url!r}")
+        self.host = parts.hostname or '127.0.0.1'
+        self.port = parts.port or 6379
+        self.password = unquote(parts.password) if parts.password else None
+        self.db = int(parts.path.strip('/') or 0)
+        self.timeout = timeout
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self.created = 0
+
+    def _connect(self):
+        conn = Connection(self.host, self.port, self.timeout)
+        try:
+            setup = []
+            if self.password:
+                setup.append(('AUTH', self.password))
+            if self.db:
+                setup.append(('SELECT', self.db))
+            if setup:
+                check(conn.pipeline(*setup))
+        except BaseException:
+            conn.close()
+            raise
+        self.created += 1
+        return conn
+
+    @contextmanager
+    def connection(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError('no free connection in the pool')
+        try:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                conn = self._connect()
+            try:
+                yield conn
+            except BaseException:
+                # The reply stream may be half read; never reuse it
+                conn.close()
+                raise
+            with self._lock:
+                self._idle.append(conn)
+        finally:
+            self._slots.release()
+
+    def execute(self, *commands):
+        with self.connection() as conn:
+            return conn.pipeline(*commands)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+# -----------------------------
+# GameStore interface
+# -----------------------------
+class KVGameStore:
+    def __init__(self, url=DEFAULT_URL, ttl=3600, lock_ttl=5.0, lock_wait=5.0,
+                 prefix='ttt:game:', max_connections=32):
+        self.pool = ConnectionPool(url, max_connections)
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self.lock_wait = lock_wait
+        self.prefix = prefix
+        # Threads of one process queue here rather than polling the server
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def new_id(self):
+        return uuid.uuid4().hex
+
+    def get(self, game_id, create=True):
+        """Return (game_id, game), creating a fresh game for unknown ids.
+
+        With create the game is only a handle: its lock loads the record, or
+        starts a fresh one, and stores it on release.
+        """
+        if not game_id:
+            if not create:
+                return game_id, None
+            game_id = self.new_id()
+        key = self.prefix + game_id
+        if not create and not check(self.pool.execute(('EXPIRE', key, self.ttl)))[0]:
+            return game_id, None
+        game = Game()
+        game.lock = KVLock(self, key, game)
+        return game_id, game
+
+    def discard(self, game_id):
+        if game_id:
+            check(self.pool.execute(('DEL', self.prefix + game_id)))
+
+    def __contains__(self, game_id):
+        return bool(game_id) and bool(check(self.pool.execute(('EXISTS', self.prefix + game_id)))[0])
+
+    def __len__(self):
+        # Counts every key in the database: give the store a db of its own
+        return check(self.pool.execute(('DBSIZE',)))[0]
+
+    def close(self):
+        self.pool.close()
+
+
+class KVLock:
+    """game.lock for a KVGameStore game: syncs the Game with its key."""
+    __slots__ = ('store', 'key', 'game', 'local', 'packed', 'token')
+
+    def __init__(self, store, key, game):
+        self.store = store
+        self.key = key
+        self.game = game
+        self.local = store._locks[zlib.crc32(key.encode()) % LOCK_STRIPES]
+        self.packed = None
+        self.token = None
+
+    def __enter__(self):
+        store = self.store
+        self.local.acquire()
+        try:
+            self.token = token = uuid.uuid4().hex
+            deadline = time.monotonic() + store.lock_wait
+            delay = 0.001
+            while True:
+                locked, data = check(store.pool.execute(
+                    ('SET', self.key + ':lock', token, 'NX', 'PX', int(store.lock_ttl * 1000)),
+                    ('GET', self.key),
+                ))
+                if locked is not None:
+                    break
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f'{self.key} stayed locked for {store.lock_wait} s')
+                time.sleep(delay)
+                delay = min(delay * 2, 0.05)
+            if data is None or len(data) != RECORD.size:
+                # New or expired: start over, as GameStore would
+                data = None
+                fresh = Game()
+                fresh.last_seen = time.time()
+                unpack_game(pack_game(fresh), self.game)
+            else:
+                unpack_game(data, self.game)
+            self.packed = data
+        except BaseException:
+            self.local.release()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        store = self.store
+        try:
+            packed = pack_game(self.game)
+            args = (self.token, store.ttl) + ((packed,) if packed != self.packed else ())
+            released, = check(store.pool.execute(
+                ('EVAL', RELEASE_SCRIPT, 2, self.key, self.key + ':lock') + args))
+            if not released:
+                raise TimeoutError(f'{self.key} was held for over {store.lock_ttl} s; the update was dropped')
+        finally:
+            self.packed = self.token = None
+            self.local.release()
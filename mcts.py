@@ -0,0 +1,228 @@
+"""Monte Carlo Tree Search AI for m,n,k boards (see mnk.py).
+
+UCT selection over a tree of bitboard positions, with uniformly random
+rollouts played on the bitboards and scored by mnk's incremental win check.
+On boards larger than 3x3, moves are drawn from the cells near existing
+stones, as in mnk's search.
+
+Each move is searched for a fixed wall-clock budget. The subtree under the
+move played is kept, keyed by position, so when the opponent replies the
+next search starts from the matching grandchild instead of an empty tree.
+With workers > 1, the search uses root parallelism: every worker process
+grows its own tree from the same position for the budget, and the root
+visit counts are summed to pick the move.
+"""
+import math
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import mnk
+
+
+class Node:
+    __slots__ = ('move', 'parent', 'children', 'untried', 'visits', 'wins', 'x', 'o', 'side', 'result')
+
+    def __init__(self, g, x, o, side, move=None, parent=None, result=None):
+        # side is the player to move here; wins are counted for -side, the
+        # player whose move led here (1 per win, 0.5 per draw)
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.x, self.o, self.side = x, o, side
+        self.result = result
+        self.visits = 0
+        self.wins = 0.0
+        if result is None:
+            me, opp = (x, o) if side == 1 else (o, x)
+            untried = mnk.candidates(g, me, opp) if g.cells > 9 else mnk.cells_of(g.full & ~(x | o))
+            random.shuffle(untried)
+            self.untried = untried
+        else:
+            self.untried = []
+
+    def expand(self, g):
+        cell = self.untried.pop()
+        bit = 1 << cell
+        x, o = (self.x | bit, self.o) if self.side == 1 else (self.x, self.o | bit)
+        if mnk.wins(g, x if self.side == 1 else o, cell):
+            result = self.side
+        elif x | o == g.full:
+            result = 0
+        else:
+            result = None
+        child = Node(g, x, o, -self.side, cell, self, result)
+        self.children.append(child)
+        return child
+
+
+def rollout(g, x, o, side, rng):
+    """Play random moves to the end; return the winner (1, -1, or 0 for a draw)."""
+    free = mnk.cells_of(g.full & ~(x | o))
+    rng.shuffle(free)
+    for cell in free:
+        bit = 1 << cell
+        if side == 1:
+            x |= bit
+            if mnk.wins(g, x, cell):
+                return 1
+        else:
+            o |= bit
+            if mnk.wins(g, o, cell):
+                return -1
+        side = -side
+    return 0
+
+
+def grow(g, root, deadline, rng, c=1.4):
+    """Run UCT iterations on root until the deadline; return the playout count."""
+    playouts = 0
+    # Check the clock every 16 playouts, and always play at least 16 so the
+    # root has children to choose from
+    while playouts & 15 or not playouts or time.perf_counter() < deadline:
+        node = root
+        # Select
+        while not node.untried and node.children:
+            log_n = math.log(node.visits)
+            node = max(node.children, key=lambda ch: ch.wins / ch.visits + c * math.sqrt(log_n / ch.visits))
+        # Expand
+        if node.untried:
+            node = node.expand(g)
+        # Simulate
+        result = node.result
+        if result is None:
+            result = rollout(g, node.x, node.o, node.side, rng)
+        # Backpropagate
+        while node is not None:
+            node.visits += 1
+            if result == 0:
+                node.wins += 0.5
+            elif result == -node.side:
+                node.wins += 1
+            node = node.parent
+        playouts += 1
+    return playouts
+
+
+# -----------------------------
+# Policy
+# -----------------------------
+class MCTSPolicy:
+    def __init__(self, g, budget=0.2, workers=1, c=1.4, max_trees=64, name='mcts'):
+        self.g = g
+        self.budget = budget
+        self.workers = workers
+        self.c = c
+        self.max_trees = max_trees
+        self.name = name
+        self.searches = 0
+        self.playouts = 0
+        self.reused = 0
+        self._trees = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _reuse(self, x, o, side):
+        # The opponent has played one stone since our last search: find the
+        # tree we kept for the position before it and step into that child
+        theirs = o if side == 1 else x
+        with self._lock:
+            for cell in mnk.cells_of(theirs):
+                before = (x & ~(1 << cell), o & ~(1 << cell))
+                node = self._trees.pop(before, None)
+                if node is None:
+                    continue
+                for child in node.children:
+                    if child.move == cell:
+                        child.parent = None
+                        self.reused += 1
+                        return child
+        return None
+
+    def _keep(self, node):
+        node.parent = None
+        with self._lock:
+            self._trees[(node.x, node.o)] = node
+            while len(self._trees) > self.max_trees:
+                self._trees.popitem(last=False)
+
+    def search(self, x, o, budget=None, rng=None):
+        """Grow a (possibly reused) tree from the position; return its root."""
+        side = mnk.side_to_move(x, o)
+        root = self._reuse(x, o, side) or Node(self.g, x, o, side)
+        deadline = time.perf_counter() + (self.budget if budget is None else budget)
+        played = grow(self.g, root, deadline, rng or random.Random(), self.c)
+        self.searches += 1
+        self.playouts += played
+        return root
+
+    def best_move(self, x, o):
+        if not self.g.full & ~(x | o):
+            return None
+        if self.workers > 1:
+            return self._parallel_move(x, o)
+        root = self.search(x, o)
+        best = max(root.children, key=lambda ch: ch.visits)
+        self._keep(best)
+        return best.move
+
+    def _parallel_move(self, x, o):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(self.workers)
+        # One wall-clock deadline for every task of this move, fixed now: tasks
+        # queued behind other moves' then get less time rather than a full
+        # budget from whenever they start. Leave a margin for shipping the
+        # request and the counts.
+        deadline = time.time() + self.budget * 0.9
+        futures = [
+            self._pool.submit(_worker_search, self.g.size, x, o, deadline, self.c, random.getrandbits(32))
+            for _ in range(self.workers)
+        ]
+        visits = {}
+        for future in futures:
+            counts, played = future.result()
+            self.playouts += played
+            for move, n in counts.items():
+                visits[move] = visits.get(move, 0) + n
+        self.searches += 1
+        return max(visits, key=visits.get)
+
+    def stats(self):
+        return {
+            'policy': self.name,
+            'board': self.g.size,
+            'budget_ms': self.budget * 1000,
+            'workers': self.workers,
+            'searches': self.searches,
+            'playouts': self.playouts,
+            'trees_reused': self.reused,
+        }
+
+
+_worker_policies = {}
+
+def _worker_search(size, x, o, deadline, c, seed):
+    # Runs in a pool process; its own policy keeps trees for reuse there.
+    # deadline is wall time, the clock the submitting process shares with us
+    policy = _worker_policies.get(size)
+    if policy is None:
+        policy = _worker_policies[size] = MCTSPolicy(mnk.geometry(*size), c=c)
+    before = policy.playouts
+    root = policy.search(x, o, max(deadline - time.time(), 0.0), random.Random(seed))
+    best = max(root.children, key=lambda ch: ch.visits)
+    policy._keep(best)
+    return {ch.move: ch.visits for ch in root.children}, policy.playouts - before
+
+
+def load(size=mnk.STANDARD):
+    """The serving policy, configured by AI_BUDGET_MS and AI_MCTS_WORKERS."""
+    return MCTSPolicy(
+        mnk.geometry(*size),
+        budget=mnk.env_budget(),
+        workers=int(os.environ.get('AI_MCTS_WORKERS', 1)) or os.cpu_count() or 1,
+    )
@@ -0,0 +1,306 @@
+"""In-process metrics for the game API, served in Prometheus text format.
+
+Counters and latency histograms live in one process-wide registry. The hot
+path pre-binds its label values (``STAGE_SECONDS.labels('ai')``), so an
+observation is a perf_counter() reading, a bisect and one short lock.
+``render()`` produces the body of GET /metrics.
+
+``profiler`` is a sampling profiler that can be switched on and off while
+the server runs: a daemon thread snapshots every other thread's Python
+stack each interval and counts them as folded stacks (``folded()``), the
+input format of flamegraph.pl and speedscope.
+"""
+import hmac
+import math
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter as StackCounter
+
+clock = time.perf_counter
+
+# Upper bounds in seconds, 10 us to 2.5 s
+BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_registry = []
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(names, values, extra=''):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+# -----------------------------
+# Metric types
+# -----------------------------
+class Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._child())
+        return child
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        # labels() may add a child mid-scrape; render from a snapshot
+        with self._lock:
+            children = sorted(self._children.items())
+        for values, child in children:
+            lines.extend(child.render(self.name, self.labelnames, values))
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ('value', 'lock')
+
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def render(self, name, names, values):
+        return [f'{name}{_labels(names, values)} {self.value}']
+
+
+class _HistogramChild:
+    __slots__ = ('buckets', 'counts', 'sum', 'lock')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # One slot per bucket plus +Inf; made cumulative when rendered
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds):
+        i = bisect_left(self.buckets, seconds)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += seconds
+
+    def render(self, name, names, values):
+        with self.lock:
+            counts, total = list(self.counts), self.sum
+        lines = []
+        running = 0
+        for bound, n in zip(self.buckets + (float('inf'),), counts):
+            running += n
+            le = 'le="+Inf"' if bound == float('inf') else f'le="{bound!r}"'
+            lines.append(f'{name}_bucket{_labels(names, values, le)} {running}')
+        lines.append(f'{name}_sum{_labels(names, values)} {total!r}')
+        lines.append(f'{name}_count{_labels(names, values)} {running}')
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def _child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, help, labelnames)
+
+    def _child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, seconds):
+        self.labels().observe(seconds)
+
+
+class Gauge(Metric):
+    """A value read when /metrics is scraped: fn() -> number."""
+    kind = 'gauge'
+
+    def __init__(self, name, help, fn):
+        self.fn = fn
+        super().__init__(name, help)
+
+    def render(self):
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} gauge', f'{self.name} {self.fn()}']
+
+
+def render():
+    """The Prometheus text exposition of every registered metric."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+# -----------------------------
+# Game API metrics
+# -----------------------------
+REQUEST_SECONDS = Histogram(
+    'ttt_http_request_duration_seconds', 'Time to handle an HTTP request, by route.', ('route',))
+REQUESTS = Counter('ttt_http_requests_total', 'HTTP requests handled, by route and status.', ('route', 'status'))
+STAGE_SECONDS = Histogram(
+    'ttt_stage_duration_seconds',
+    'Time spent in each stage of a game request: parse (JSON body), run (game_api.run, '
+    'including the game lock), ai (choosing the AI move), winner (win check), '
+    'record (results and move log), encode (response body).',
+    ('stage',))
+MOVES = Counter('ttt_moves_total', 'Moves played, by player (human or ai).', ('player',))
+AI_DECISIONS = Counter('ttt_ai_decisions_total', 'AI moves chosen, by level.', ('level',))
+AI_SHED = Counter(
+    'ttt_ai_shed_total', 'AI moves made by the heuristic fallback instead, by reason (queue_full or deadline).',
+    ('reason',))
+GAMES_FINISHED = Counter('ttt_games_finished_total', 'Rounds finished, by winner (player, ai or draw).', ('winner',))
+
+
+# -----------------------------
+# Sampling profiler
+# -----------------------------
+# Leaf functions of threads blocked waiting for work; skipped unless
+# include_idle is set, so the samples show where requests spend time
+IDLE = frozenset(('wait', 'select', 'poll', 'accept', 'readinto', 'recv', 'recv_into', '_wait_for_tstate_lock'))
+MAX_DEPTH = 64
+MAX_STACKS = 10000
+
+
+class Profiler:
+    def __init__(self):
+        self.stacks = StackCounter()
+        self.samples = 0
+        self.interval = 0.005
+        self.include_idle = False
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self, interval=None, include_idle=None):
+        with self._lock:
+            if interval is not None:
+                self.interval = min(max(interval, 0.001), 1.0)
+            if include_idle is not None:
+                self.include_idle = include_idle
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='metrics-profiler', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._stop.set()
+                thread.join()
+
+    def reset(self):
+        with self._lock:
+            self.stacks = StackCounter()
+            self.samples = 0
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                if not self.include_idle and frame.f_code.co_name in IDLE:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_DEPTH:
+                    code = frame.f_code
+                    stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+                    frame = frame.f_back
+                key = ';'.join(reversed(stack))
+                stacks = self.stacks
+                if key not in stacks and len(stacks) >= MAX_STACKS:
+                    key = '[other]'
+                stacks[key] += 1
+                self.samples += 1
+
+    def folded(self):
+        """One 'frame;frame;... count' line per distinct stack, most samples first."""
+        stacks = dict(self.stacks)  # snapshot; the sampler keeps counting
+        return ''.join(f'{stack} {n}\n' for stack, n in sorted(stacks.items(), key=lambda s: -s[1]))
+
+    def status(self):
+        return {
+            'running': self.running,
+            'interval_ms': self.interval * 1000,
+            'include_idle': self.include_idle,
+            'samples': self.samples,
+            'stacks': len(self.stacks),
+        }
+
+
+profiler = Profiler()
+
+# The HTTP profiler control is off unless PROFILE_TOKEN is set; clients
+# send it in the X-Profile-Token header
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')
+PROFILE_HEADER = 'X-Profile-Token'
+
+Gauge('ttt_profiler_running', 'Whether the sampling profiler is on.', lambda: int(profiler.running))
+Gauge('ttt_profiler_samples', 'Stack samples held by the profiler since it was last reset.', lambda: profiler.samples)
+
+
+def profile_allowed(token):
+    return bool(PROFILE_TOKEN) and hmac.compare_digest((token or '').encode(), PROFILE_TOKEN.encode())
+
+def profile_control(data):
+    """Apply a profiler control body and return the profiler status.
+
+    ``{"enabled": true|false, "interval_ms": 5, "include_idle": false,
+    "reset": false}``; every field is optional.
+    """
+    data = data if isinstance(data, dict) else {}
+    if data.get('reset'):
+        profiler.reset()
+    interval = data.get('interval_ms')
+    if isinstance(interval, bool) or not isinstance(interval, (int, float)) or not math.isfinite(interval):
+        interval = None
+    else:
+        interval /= 1000
+    include_idle = data.get('include_idle')
+    include_idle = include_idle if isinstance(include_idle, bool) else None
+    if data.get('enabled') is True:
+        profiler.start(interval, include_idle)
+    elif data.get('enabled') is False:
+        profiler.stop()
+    return profiler.status()
+
+
+if os.environ.get('METRICS_PROFILE') == '1':
+    profiler.start()
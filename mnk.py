@@ -0,0 +1,394 @@
+"""m,n,k-games: get k in a row on an m-row by n-column board.
+
+Positions are bitboards like engine.py's, with bit ``r * n + c`` for row r,
+column c, so every supported size fits in two Python ints. A ``Geometry``
+precomputes, per board size, every k-cell window and the windows through
+each cell, so a win check after a move only tests the lines through that
+move. Tic-tac-toe is (3, 3, 3); the API keeps using engine.py for it.
+
+The search AI is alpha-beta over the same bitboards, with Zobrist hashing
+into a transposition table, iterative deepening under a time budget and
+candidate moves limited to cells near existing stones, which keeps it
+responsive on boards up to 19x19.
+"""
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+STANDARD = (3, 3, 3)
+MIN_SIDE = 3
+MAX_SIDE = 19
+# Above the sum of every window weight (under 4 * 19 * 19 windows of at
+# most 4 ** 18 each), so no static score can pass for a forced win
+WIN = 1 << 48
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+# Default per-move budget of the time-limited AI levels, unless AI_BUDGET_MS is set
+BUDGET_MS = 50
+
+
+def env_budget():
+    """AI_BUDGET_MS in seconds; shared by every time-limited level."""
+    return float(os.environ.get('AI_BUDGET_MS', BUDGET_MS)) / 1000
+
+
+# -----------------------------
+# Board geometry
+# -----------------------------
+def check_size(m, n, k):
+    if not (MIN_SIDE <= m <= MAX_SIDE and MIN_SIDE <= n <= MAX_SIDE and 3 <= k <= max(m, n)):
+        raise ValueError(f"unsupported board {m}x{n} with {k} in a row")
+    return m, n, k
+
+
+class Geometry:
+    def __init__(self, m, n, k):
+        check_size(m, n, k)
+        self.m, self.n, self.k = m, n, k
+        self.cells = m * n
+        self.full = (1 << self.cells) - 1
+        windows = []
+        for r in range(m):
+            for c in range(n):
+                for dr, dc in DIRECTIONS:
+                    if 0 <= r + dr * (k - 1) < m and 0 <= c + dc * (k - 1) < n:
+                        windows.append(sum(1 << (r + dr * i) * n + c + dc * i for i in range(k)))
+        self.windows = tuple(windows)
+        through = [[] for _ in range(self.cells)]
+        for w in windows:
+            for i in cells_of(w):
+                through[i].append(w)
+        self.through = tuple(map(tuple, through))
+        # Cells within two steps of each cell: where useful replies are found
+        self.near = tuple(
+            sum(1 << rr * n + cc
+                for rr in range(max(0, r - 2), min(m, r + 3))
+                for cc in range(max(0, c - 2), min(n, c + 3)))
+            for r in range(m) for c in range(n)
+        )
+        # Move-ordering tie-break: closer to the centre first
+        self.centrality = tuple(
+            -max(abs(2 * r - (m - 1)), abs(2 * c - (n - 1)))
+            for r in range(m) for c in range(n)
+        )
+        self.center = (m // 2) * n + n // 2
+        # Per-size seed so Zobrist keys (and stored hashes) are reproducible
+        rng = random.Random(m << 16 | n << 8 | k)
+        self.zobrist = (
+            tuple(rng.getrandbits(64) for _ in range(self.cells)),
+            tuple(rng.getrandbits(64) for _ in range(self.cells)),
+        )
+        # Value of a window holding i stones of one side and none of the other
+        self.weight = (0,) + tuple(4 ** i for i in range(1, k)) + (WIN,)
+
+    @property
+    def size(self):
+        return self.m, self.n, self.k
+
+
+@lru_cache(maxsize=32)
+def geometry(m, n, k):
+    return Geometry(m, n, k)
+
+
+def cells_of(bits):
+    cells = []
+    while bits:
+        low = bits & -bits
+        cells.append(low.bit_length() - 1)
+        bits ^= low
+    return cells
+
+
+# -----------------------------
+# Rules
+# -----------------------------
+def wins(g, bits, cell):
+    """True if `bits` (which includes `cell`) has k in a row through cell."""
+    for w in g.through[cell]:
+        if bits & w == w:
+            return True
+    return False
+
+def winner(g, x, o):
+    """1 or -1 for k in a row, 0 for a full board, None while in play."""
+    for w in g.windows:
+        if x & w == w:
+            return 1
+        if o & w == w:
+            return -1
+    return 0 if x | o == g.full else None
+
+def side_to_move(x, o):
+    return 1 if x.bit_count() == o.bit_count() else -1
+
+def to_cells(g, x, o):
+    return [1 if x >> i & 1 else -1 if o >> i & 1 else 0 for i in range(g.cells)]
+
+def candidates(g, me, opp):
+    """Empty cells near a stone (the centre on an empty board)."""
+    occupied = me | opp
+    if not occupied:
+        return [g.center]
+    near = 0
+    for i in cells_of(occupied):
+        near |= g.near[i]
+    return cells_of(near & ~occupied)
+
+def gain(g, me, opp, cell):
+    """Change in the static score for `me` when me plays cell."""
+    weight = g.weight
+    total = 0
+    for w in g.through[cell]:
+        mine, theirs = me & w, opp & w
+        if not theirs:
+            a = mine.bit_count()
+            total += weight[a + 1] - weight[a]
+        elif not mine:
+            total += weight[theirs.bit_count()]
+    return total
+
+def evaluate(g, me, opp):
+    """Static score for `me`: open windows weighted by stone count."""
+    weight = g.weight
+    score = 0
+    for w in g.windows:
+        mine, theirs = me & w, opp & w
+        if not theirs:
+            score += weight[mine.bit_count()]
+        elif not mine:
+            score -= weight[theirs.bit_count()]
+    return score
+
+
+# -----------------------------
+# Policies
+# -----------------------------
+def _sides(x, o):
+    return (x, o) if side_to_move(x, o) == 1 else (o, x)
+
+
+class RandomPolicy:
+    def __init__(self, g):
+        self.g = g
+
+    def best_move(self, x, o):
+        free = cells_of(self.g.full & ~(x | o))
+        return random.choice(free) if free else None
+
+    def stats(self):
+        return {'policy': 'random', 'board': self.g.size}
+
+
+class HeuristicPolicy:
+    """Win, block, else the most central cell near the stones."""
+
+    def __init__(self, g):
+        self.g = g
+
+    def best_move(self, x, o):
+        g = self.g
+        if not g.full & ~(x | o):
+            return None
+        me, opp = _sides(x, o)
+        cells = candidates(g, me, opp)
+        for side in (me, opp):
+            for i in cells:
+                if wins(g, side | 1 << i, i):
+                    return i
+        best = max(g.centrality[i] for i in cells)
+        return random.choice([i for i in cells if g.centrality[i] == best])
+
+    def stats(self):
+        return {'policy': 'heuristic', 'board': self.g.size}
+
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class _Timeout(Exception):
+    pass
+
+
+class SearchPolicy:
+    """Alpha-beta with a Zobrist-keyed transposition table.
+
+    Each move is searched by iterative deepening until `budget` seconds run
+    out or `max_depth` is reached; the deepest completed iteration's move is
+    played. At most `width` candidates are searched per node, best first.
+    The table is shared by every search on this policy, so consecutive moves
+    of a game start from the previous move's results.
+    """
+
+    def __init__(self, g, max_depth=None, budget=0.2, width=12, tt_size=1 << 17, name='alphabeta'):
+        self.g = g
+        self.max_depth = max_depth or g.cells
+        self.budget = budget
+        self.width = width
+        self.tt_size = tt_size
+        self.name = name
+        self.tt = {}
+        self.searches = 0
+        self.timeouts = 0
+        self.nodes = 0
+        self.depth_total = 0
+
+    def best_move(self, x, o):
+        g = self.g
+        if not g.full & ~(x | o):
+            return None
+        me, opp = _sides(x, o)
+        zme, zopp = g.zobrist if side_to_move(x, o) == 1 else g.zobrist[::-1]
+        h = 0
+        for i in cells_of(x):
+            h ^= g.zobrist[0][i]
+        for i in cells_of(o):
+            h ^= g.zobrist[1][i]
+        if len(self.tt) > self.tt_size:
+            self.tt.clear()
+        run = _Run(self, time.perf_counter() + self.budget)
+        best, depth = None, 0
+        for d in range(1, min(self.max_depth, (g.full & ~(x | o)).bit_count()) + 1):
+            try:
+                score = run.negamax(me, opp, zme, zopp, h, evaluate(g, me, opp), d, -WIN - 1, WIN + 1, 0)
+            except _Timeout:
+                self.timeouts += 1
+                break
+            # From the run, not the shared table: another search may clear it
+            best, depth = run.root_move, d
+            if abs(score) >= WIN - g.cells:
+                break  # forced result found
+        self.searches += 1
+        self.nodes += run.nodes
+        self.depth_total += depth
+        if best is None:
+            best = HeuristicPolicy(g).best_move(x, o)
+        return best
+
+    def stats(self):
+        return {
+            'policy': self.name,
+            'board': self.g.size,
+            'budget_ms': self.budget * 1000,
+            'searches': self.searches,
+            'timeouts': self.timeouts,
+            'nodes': self.nodes,
+            'mean_depth': self.depth_total / self.searches if self.searches else 0.0,
+            'tt_entries': len(self.tt),
+        }
+
+
+class _Run:
+    """State of one search, so concurrent searches can share a policy."""
+
+    def __init__(self, policy, deadline):
+        self.g = policy.g
+        self.tt = policy.tt
+        self.width = policy.width
+        self.deadline = deadline
+        self.nodes = 0
+        # Best move at the root of the last completed iteration
+        self.root_move = None
+
+    def ordered(self, me, opp, first):
+        g = self.g
+        cells = candidates(g, me, opp)
+        for i in cells:
+            if wins(g, me | 1 << i, i):
+                return [i], True
+        forced = [i for i in cells if wins(g, opp | 1 << i, i)]
+        if forced:
+            return forced, False
+        cells.sort(key=lambda i: (gain(g, me, opp, i) + gain(g, opp, me, i), g.centrality[i]), reverse=True)
+        cells = cells[:self.width]
+        if first is not None and first in cells:
+            cells.remove(first)
+            cells.insert(0, first)
+        return cells, False
+
+    def negamax(self, me, opp, zme, zopp, h, score, depth, alpha, beta, ply):
+        self.nodes += 1
+        if not self.nodes & 63 and time.perf_counter() > self.deadline:
+            raise _Timeout
+        g = self.g
+        entry = self.tt.get(h)
+        first = None
+        if entry is not None:
+            e_depth, e_value, e_flag, first = entry
+            if not ply:
+                self.root_move = first
+            if e_depth >= depth:
+                if e_flag == EXACT:
+                    return e_value
+                if e_flag == LOWER and e_value >= beta:
+                    return e_value
+                if e_flag == UPPER and e_value <= alpha:
+                    return e_value
+        if depth == 0:
+            return score
+        moves, winning = self.ordered(me, opp, first)
+        if winning:
+            self.tt[h] = (depth, WIN - ply, EXACT, moves[0])
+            if not ply:
+                self.root_move = moves[0]
+            return WIN - ply
+        alpha0 = alpha
+        best, best_move = -WIN - 1, moves[0]
+        for i in moves:
+            bit = 1 << i
+            if (me | opp | bit) == g.full:
+                value = 0
+            else:
+                child = -(score + gain(g, me, opp, i))
+                value = -self.negamax(opp, me | bit, zopp, zme, h ^ zme[i], child,
+                                      depth - 1, -beta, -alpha, ply + 1)
+            if value > best:
+                best, best_move = value, i
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+        flag = UPPER if best <= alpha0 else LOWER if best >= beta else EXACT
+        self.tt[h] = (depth, best, flag, best_move)
+        if not ply:
+            self.root_move = best_move
+        return best
+
+
+# -----------------------------
+# Shared policies per board size
+# -----------------------------
+# Least recently used policies (and their tables) are dropped past this many
+MAX_POLICIES = 16
+_policies = OrderedDict()
+_policies_lock = threading.Lock()
+
+def policy(level, size):
+    """Shared policy for a level on an m,n,k board (level None = strongest)."""
+    key = (level, size)
+    with _policies_lock:
+        found = _policies.get(key)
+        if found is not None:
+            _policies.move_to_end(key)
+            return found
+        g = geometry(*size)
+        if level == 'random':
+            found = RandomPolicy(g)
+        elif level == 'heuristic':
+            found = HeuristicPolicy(g)
+        elif level == 'alphabeta':
+            found = SearchPolicy(g, max_depth=4, budget=env_budget())
+        elif level == 'mcts':
+            import mcts
+            found = mcts.load(size)
+        elif level is None or level == 'perfect':
+            # No solved table beyond 3x3: the strongest level is a deeper search
+            found = SearchPolicy(g, budget=0.2)
+        else:
+            raise ValueError(f"unknown AI level: {level}")
+        _policies[key] = found
+        while len(_policies) > MAX_POLICIES:
+            _policies.popitem(last=False)
+    return found
@@ -0,0 +1,171 @@
+"""Append-only binary log of finished rounds, for replay and training.
+
+The file is a 16-byte header followed by fixed-size 16-byte records, all
+little-endian:
+
+    header  b'TTTL' | uint16 version | uint16 record size | 8 reserved bytes
+    record  5 bytes  moves: nibble i (low nibble first) is the cell of ply i,
+                     0xF after the last ply; nibble 9 is the ply count
+            B        winner (WINNER_CODES: 1 X, 2 O, 3 draw)
+            B        AI policy code (POLICY_CODES, 0 unknown)
+            B        reserved
+            I        finish time, unix seconds
+            I        crc32 of the game id, to group rounds of one game
+
+X always moves first. Readers ignore a torn trailing record left by a crash
+mid-append. Offline tools can map the file with ``as_array`` and stream
+millions of games without parsing anything.
+"""
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import namedtuple
+
+MAGIC = b'TTTL'
+VERSION = 1
+HEADER = struct.Struct('<4sHH8x')
+RECORD = struct.Struct('<5sBBxII')
+NO_MOVE = 0xF
+# Ply nibbles, every one set to NO_MOVE
+EMPTY_MOVES = (1 << 36) - 1
+
+WINNER_CODES = {1: 1, -1: 2, 0: 3}
+WINNERS = {code: winner for winner, code in WINNER_CODES.items()}
+POLICY_CODES = {'perfect': 1, 'qlearning': 2, 'random': 3, 'heuristic': 4, 'alphabeta': 5, 'mcts': 6}
+POLICIES = {code: name for name, code in POLICY_CODES.items()}
+
+LoggedGame = namedtuple('LoggedGame', 'moves winner policy finished_at tag')
+
+
+def pack_moves(cells):
+    """Nibble-pack a sequence of cells into a ply-count + moves int."""
+    moves = EMPTY_MOVES
+    for ply, cell in enumerate(cells):
+        moves ^= (NO_MOVE ^ cell) << (4 * ply)
+    return moves | len(cells) << 36
+
+def unpack_moves(packed):
+    return tuple(packed >> (4 * ply) & 0xF for ply in range(packed >> 36))
+
+
+def encode(cells, winner, policy=None, finished_at=None, game_id=''):
+    return RECORD.pack(
+        pack_moves(cells).to_bytes(5, 'little'),
+        WINNER_CODES[winner],
+        POLICY_CODES.get(policy, 0),
+        int(time.time() if finished_at is None else finished_at),
+        zlib.crc32(game_id.encode()),
+    )
+
+def decode(record):
+    return _game(RECORD.unpack(record))
+
+def _game(fields):
+    moves, winner, policy, finished_at, tag = fields
+    return LoggedGame(
+        unpack_moves(int.from_bytes(moves, 'little')),
+        WINNERS.get(winner),
+        POLICIES.get(policy),
+        finished_at,
+        tag,
+    )
+
+
+# -----------------------------
+# Writer
+# -----------------------------
+class MoveLog:
+    """Thread-safe appender; records are buffered and flushed every flush_every."""
+
+    def __init__(self, path, flush_every=64):
+        self.path = path
+        self.flush_every = flush_every
+        self.written = 0
+        self._lock = threading.Lock()
+        self._file = open(path, 'ab')
+        size = self._file.tell()
+        if size == 0:
+            self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        else:
+            check_header(path)
+            # Drop a torn record so new appends stay aligned
+            self._file.truncate(size - (size - HEADER.size) % RECORD.size)
+        self._pending = 0
+
+    def append(self, cells, winner, policy=None, game_id=''):
+        record = encode(cells, winner, policy, None, game_id)
+        with self._lock:
+            self._file.write(record)
+            self.written += 1
+            self._pending += 1
+            if self._pending >= self.flush_every:
+                self._file.flush()
+                self._pending = 0
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+            self._pending = 0
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+# -----------------------------
+# Readers
+# -----------------------------
+def check_header(path):
+    with open(path, 'rb') as f:
+        head = f.read(HEADER.size)
+    if len(head) < HEADER.size:
+        raise ValueError(f"{path} is not a move log")
+    magic, version, size = HEADER.unpack(head)
+    if magic != MAGIC or version != VERSION or size != RECORD.size:
+        raise ValueError(f"{path} is not a version {VERSION} move log")
+
+def count(path):
+    return max(0, os.path.getsize(path) - HEADER.size) // RECORD.size
+
+def read_games(path, start=0, stop=None):
+    """Yield LoggedGame records lazily, reading the file in large chunks."""
+    check_header(path)
+    stop = count(path) if stop is None else min(stop, count(path))
+    chunk = 4096
+    with open(path, 'rb') as f:
+        f.seek(HEADER.size + start * RECORD.size)
+        while start < stop:
+            n = min(chunk, stop - start)
+            data = f.read(n * RECORD.size)
+            for fields in RECORD.iter_unpack(data[:len(data) - len(data) % RECORD.size]):
+                yield _game(fields)
+            start += n
+
+def as_array(path):
+    """Memory-map the records as a numpy structured array (read-only)."""
+    import numpy as np
+
+    check_header(path)
+    dtype = np.dtype([
+        ('moves', 'u1', 5), ('winner', 'u1'), ('policy', 'u1'), ('reserved', 'u1'),
+        ('finished_at', '<u4'), ('tag', '<u4'),
+    ])
+    n = count(path)
+    if n == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', offset=HEADER.size, shape=(n,))
+
+def move_matrix(records):
+    """(n, 9) int8 cells per ply (-1 after the last) and (n,) ply counts."""
+    import numpy as np
+
+    raw = np.asarray(records['moves'])
+    nibbles = np.empty((len(raw), 10), dtype=np.int8)
+    nibbles[:, 0::2] = raw & 0xF
+    nibbles[:, 1::2] = raw >> 4
+    cells = nibbles[:, :9]
+    cells[cells == NO_MOVE] = -1
+    return cells, nibbles[:, 9].copy()
@@ -0,0 +1,364 @@
+"""The single-page browser client served at GET /."""
+import gzip
+import hashlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+HOME_HTML = '''
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Tic Tac Toe AI</title>
+    <style>
+        body {
+            font-family: Arial, sans-serif;
+            display: flex;
+            justify-content: center;
+            align-items: center;
+            min-height: 100vh;
+            margin: 0;
+            background: #f0f2f5;
+        }
+        .container {
+            background: white;
+            padding: 30px;
+            border-radius: 12px;
+            box-shadow: 0 8px 32px rgba(0,0,0,0.1);
+            text-align: center;
+            max-width: 400px;
+        }
+        h1 { color: #333; margin-bottom: 10px; }
+        .subtitle { color: #666; margin-bottom: 20px; }
+        .match-info {
+            background: #f8f9fa;
+            padding: 12px;
+            border-radius: 8px;
+            margin: 20px 0;
+            font-weight: bold;
+        }
+        .board {
+            display: grid;
+            grid-template-columns: repeat(3, 1fr);
+            gap: 8px;
+            margin: 25px auto;
+            max-width: 300px;
+        }
+        .cell {
+            width: 80px;
+            height: 80px;
+            background: #f8f9fa;
+            border: 2px solid #e9ecef;
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            font-size: 28px;
+            font-weight: bold;
+            cursor: pointer;
+            border-radius: 8px;
+            transition: all 0.2s;
+        }
+        .cell:hover { background: #e9ecef; transform: scale(1.05); }
+        .board.wide { gap: 2px; max-width: 340px; }
+        .board.wide .cell {
+            width: auto; height: auto; aspect-ratio: 1;
+            font-size: 14px; border-width: 1px; border-radius: 3px;
+        }
+        .cell.x { color: #dc3545; }
+        .cell.o { color: #007bff; }
+        .status {
+            margin: 20px 0;
+            font-size: 18px;
+            font-weight: bold;
+            min-height: 25px;
+        }
+        .scores { margin: 15px 0; color: #666; }
+        button {
+            background: #007bff;
+            color: white;
+            border: none;
+            padding: 12px 24px;
+            border-radius: 8px;
+            cursor: pointer;
+            font-size: 16px;
+            font-weight: bold;
+            transition: background 0.2s;
+        }
+        button:hover { background: #0056b3; }
+        .level { display: block; margin-top: 15px; color: #666; }
+        .winner { color: #28a745; }
+        .loser { color: #dc3545; }
+        .thinking { color: #17a2b8; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>🎮 Tic Tac Toe AI</h1>
+        <p class="subtitle">Fast Q-Learning Algorithm</p>
+        
+        <div class="match-info">
+            <div>🏆 Best of 3 Matches</div>
+            <div id="matchScore">Player: 0 | AI: 0</div>
+        </div>
+        
+        <div class="board" id="board"></div>
+        
+        <div class="status" id="status">Your turn! Click a cell</div>
+        <div class="scores" id="scores">Wins: 0 | Losses: 0 | Draws: 0</div>
+        
+        <button id="resetBtn">New Round</button>
+        <label class="level">Board
+            <select id="size">
+                <option value="3,3,3">3×3, 3 in a row</option>
+                <option value="4,4,4">4×4, 4 in a row</option>
+                <option value="5,5,4">5×5, 4 in a row</option>
+                <option value="7,7,5">7×7, 5 in a row</option>
+                <option value="15,15,5">15×15 gomoku</option>
+            </select>
+        </label>
+        <label class="level">AI level
+            <select id="level">
+                <option value="">Default</option>
+                <option value="random">Random</option>
+                <option value="heuristic">Heuristic</option>
+                <option value="alphabeta">Alpha-beta</option>
+                <option value="mcts">Monte Carlo</option>
+                <option value="perfect">Perfect</option>
+            </select>
+        </label>
+    </div>
+
+    <script>
+        const boardEl = document.getElementById('board');
+        const statusEl = document.getElementById('status');
+        const scoresEl = document.getElementById('scores');
+        const matchScoreEl = document.getElementById('matchScore');
+        const resetBtn = document.getElementById('resetBtn');
+        const levelEl = document.getElementById('level');
+        const sizeEl = document.getElementById('size');
+        
+        let board = Array(9).fill(0);
+        let cols = 3;
+        let gameOver = false;
+        let matchOver = false;
+        let seq = null;
+        let gameId = null;
+        let socket = null;
+
+        // The server pushes the whole turn (player move + AI reply) as one
+        // state message over /ws; without a socket, POST /turn does the same
+        // (and POST /state loads the game).
+        function connect() {
+            if (!('WebSocket' in window)) {
+                send('state', {});
+                return;
+            }
+            const proto = location.protocol === 'https:' ? 'wss' : 'ws';
+            const query = gameId ? `?game_id=${encodeURIComponent(gameId)}` : '';
+            const ws = new WebSocket(`${proto}://${location.host}/ws${query}`);
+            ws.onopen = () => { socket = ws; };
+            ws.onmessage = (event) => updateGameState(JSON.parse(event.data));
+            ws.onclose = () => {
+                if (socket === ws) {
+                    socket = null;
+                    setTimeout(connect, 2000);
+                } else if (seq === null) {
+                    // Never opened (no /ws on serverless hosts): load over HTTP
+                    send('state', {});
+                }
+            };
+        }
+
+        async function send(type, payload) {
+            const message = { ...payload, game_id: gameId };
+            if (socket && socket.readyState === WebSocket.OPEN) {
+                socket.send(JSON.stringify({ type, ...message }));
+                return;
+            }
+            try {
+                const response = await fetch(`/${type}`, {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify(message)
+                });
+                updateGameState(await response.json());
+            } catch (error) {
+                console.error(`${type} error:`, error);
+            }
+        }
+
+        function renderBoard() {
+            boardEl.innerHTML = '';
+            boardEl.style.gridTemplateColumns = `repeat(${cols}, 1fr)`;
+            boardEl.classList.toggle('wide', cols > 3);
+            board.forEach((cell, i) => {
+                const cellEl = document.createElement('div');
+                cellEl.className = 'cell';
+                
+                if (cell === 1) {
+                    cellEl.textContent = 'X';
+                    cellEl.classList.add('x');
+                } else if (cell === -1) {
+                    cellEl.textContent = 'O';
+                    cellEl.classList.add('o');
+                } else {
+                    cellEl.addEventListener('click', () => handleCellClick(i));
+                }
+                
+                boardEl.appendChild(cellEl);
+            });
+        }
+
+        function handleCellClick(index) {
+            if (gameOver || matchOver || board[index] !== 0) return;
+            send('turn', { position: index, player: 1, seq, level: levelEl.value || null });
+        }
+
+        function updateGameState(data) {
+            if (data.board === undefined) {
+                console.error('Server error:', data.error);
+                return;
+            }
+            gameId = data.game_id;
+            seq = data.seq;
+            board = data.board;
+            gameOver = data.game_over;
+            matchOver = data.match_over;
+            levelEl.value = data.level || '';
+            cols = data.size[1];
+            sizeEl.value = data.size.join(',');
+            
+            renderBoard();
+            updateScores(data);
+            updateStatus(data);
+            
+            // Only reachable if a turn was interrupted before the AI replied
+            if (!gameOver && !matchOver && data.current_player === -1) {
+                statusEl.innerHTML = '<span class="thinking">🤖 AI thinking...</span>';
+                send('ai_move', { seq, level: levelEl.value || null });
+            }
+        }
+
+        function updateScores(data) {
+            scoresEl.textContent = `Wins: ${data.round_wins} | Losses: ${data.round_losses} | Draws: ${data.round_draws}`;
+            matchScoreEl.textContent = `Player: ${data.player_match_wins} | AI: ${data.ai_match_wins}`;
+        }
+
+        function updateStatus(data) {
+            if (data.match_over) {
+                if (data.player_match_wins >= 3) {
+                    statusEl.innerHTML = '<span class="winner">🎉 You won the match!</span>';
+                } else {
+                    statusEl.innerHTML = '<span class="loser">🤖 AI won the match!</span>';
+                }
+                resetBtn.textContent = 'New Match';
+            } else if (data.game_over) {
+                if (data.winner === 1) {
+                    statusEl.innerHTML = '<span class="winner">✅ You win this round!</span>';
+                } else if (data.winner === -1) {
+                    statusEl.innerHTML = '<span class="loser">🤖 AI wins this round!</span>';
+                } else {
+                    statusEl.textContent = '🤝 Draw!';
+                }
+                resetBtn.textContent = 'Next Round';
+            } else {
+                statusEl.textContent = data.current_player === 1 ? 'Your turn! Click a cell' : '🤖 AI turn';
+                resetBtn.textContent = 'New Round';
+            }
+        }
+
+        // A new board size starts a new match
+        sizeEl.onchange = () => {
+            send('reset_match', { size: sizeEl.value.split(',').map(Number) });
+        };
+
+        resetBtn.onclick = () => {
+            send(matchOver ? 'reset_match' : 'reset_round', {});
+        };
+
+        renderBoard();
+        connect();
+    </script>
+</body>
+</html>
+'''
+
+
+# -----------------------------
+# Pre-encoded response for GET /
+# -----------------------------
+class CachedPage:
+    """The page encoded once (identity, gzip and, if available, brotli) and
+    served with a strong ETag per encoding, so repeat visitors get 304s.
+
+    The encodings are different bytes, so each gets its own tag ("<hash>",
+    "<hash>-gzip", "<hash>-br"); a revalidation matching any of them is
+    answered 304 carrying the tag that matched.
+    """
+
+    def __init__(self, html, content_type='text/html; charset=utf-8'):
+        body = html.encode()
+        self.content_type = content_type
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.bodies = {'identity': body, 'gzip': gzip.compress(body, 9, mtime=0)}
+        if brotli is not None:
+            self.bodies['br'] = brotli.compress(body, quality=11)
+        self.etags = {
+            encoding: '"%s"' % digest if encoding == 'identity' else f'"{digest}-{encoding}"'
+            for encoding in self.bodies
+        }
+        self.etag = self.etags['identity']
+
+    def encoding_for(self, accept_encoding):
+        accepted = {}
+        for part in (accept_encoding or '').split(','):
+            name, _, params = part.strip().partition(';')
+            q = 1.0
+            params = params.strip()
+            if params.startswith('q='):
+                try:
+                    q = float(params[2:])
+                except ValueError:
+                    q = 0.0
+            accepted[name.strip().lower()] = q
+        for encoding in ('br', 'gzip'):
+            if encoding in self.bodies and accepted.get(encoding, accepted.get('*', 0)) > 0:
+                return encoding
+        return 'identity'
+
+    def matched_etag(self, if_none_match, encoding):
+        """The tag of ours that If-None-Match names, or None.
+
+        A 304 has to carry this tag, not the one for the newly negotiated
+        encoding, so the cache can tell which stored response it refreshes.
+        """
+        if not if_none_match:
+            return None
+        for tag in if_none_match.split(','):
+            tag = tag.strip()
+            if tag == '*':
+                return self.etags[encoding]
+            if tag.removeprefix('W/') in self.etags.values():
+                return tag.removeprefix('W/')
+        return None
+
+    def respond(self, accept_encoding=None, if_none_match=None):
+        """Return (status, body, headers) for a GET with the given request headers."""
+        encoding = self.encoding_for(accept_encoding)
+        headers = [('Cache-Control', 'no-cache'), ('Vary', 'Accept-Encoding')]
+        matched = self.matched_etag(if_none_match, encoding)
+        if matched:
+            return 304, b'', [('ETag', matched), *headers]
+        headers.insert(0, ('ETag', self.etags[encoding]))
+        body = self.bodies[encoding]
+        headers.append(('Content-Type', self.content_type))
+        if encoding != 'identity':
+            headers.append(('Content-Encoding', encoding))
+        return 200, body, headers
+
+
+home_page = CachedPage(HOME_HTML)
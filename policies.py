@@ -0,0 +1,81 @@
+"""AI policy selection shared by the Flask and Streamlit apps.
+
+Every policy exposes ``best_move(x, o)`` and ``stats()``. The default is
+chosen with the AI_POLICY environment variable; games can also pick one of
+the LEVELS, weakest first:
+
+    random     any empty cell
+    heuristic  win, block, centre, corner, random (engine.heuristic_move)
+    alphabeta  depth-limited alpha-beta search (see search.py); AI_DEPTH plies,
+               at most AI_BUDGET_MS per move
+    mcts       Monte Carlo tree search for AI_BUDGET_MS per move over
+               AI_MCTS_WORKERS processes (see mcts.py)
+    perfect    solved move table (default, see solver.py)
+
+and, for the default only:
+
+    qlearning  greedy play from a trained Q-table at QTABLE_PATH (see qlearning.py)
+"""
+import os
+import random
+
+from engine import CELLS, FULL, heuristic_move, side_to_move
+
+LEVELS = ('random', 'heuristic', 'alphabeta', 'mcts', 'perfect')
+
+
+class RandomPolicy:
+    def best_move(self, x, o):
+        free = CELLS[FULL & ~(x | o)]
+        return random.choice(free) if free else None
+
+    def stats(self):
+        return {'policy': 'random'}
+
+
+class HeuristicPolicy:
+    def best_move(self, x, o):
+        return heuristic_move(x, o) if side_to_move(x, o) == 1 else heuristic_move(o, x)
+
+    def stats(self):
+        return {'policy': 'heuristic'}
+
+
+def load(name=None):
+    # Policy modules are imported on demand to keep app start-up lean
+    name = name or os.environ.get('AI_POLICY', 'perfect')
+    if name == 'perfect':
+        import solver
+        return solver.default_table()
+    if name == 'qlearning':
+        import qlearning
+        return qlearning.load_policy(os.environ.get('QTABLE_PATH', qlearning.QTABLE_PATH))
+    if name == 'alphabeta':
+        import mnk
+        import search
+        return search.AlphaBetaPolicy(
+            max_depth=int(os.environ.get('AI_DEPTH', 4)),
+            budget=mnk.env_budget(),
+        )
+    if name == 'mcts':
+        import mcts
+        return mcts.load()
+    if name == 'heuristic':
+        return HeuristicPolicy()
+    if name == 'random':
+        return RandomPolicy()
+    raise ValueError(f"unknown AI policy: {name}")
+
+
+_levels = {}
+
+def level(name):
+    """The shared policy for a level (or any name load() accepts), loaded once."""
+    policy = _levels.get(name)
+    if policy is None:
+        policy = _levels.setdefault(name, load(name))
+    return policy
+
+
+def default_policy():
+    return level(os.environ.get('AI_POLICY', 'perfect'))
@@ -0,0 +1,117 @@
+"""Wire formats for game state responses.
+
+JSON (the default) is the full state dict. Clients that send
+``Accept: application/x-ttt-state`` get a compact little-endian record
+instead:
+
+    B   version (1)
+    H   x bitboard          H   o bitboard
+    B   flags: bit 0 AI to move, 1 round over, 2 match over, 3 stale
+        request (409), bits 4-5 winner (0 none, 1 X, 2 O, 3 draw)
+    I   seq
+    B   mask of score counters changed by this request (SCORE_FIELDS order)
+    I   new value of each changed counter, in the same order
+
+A turn that changes no score is 11 bytes, versus ~230 bytes of JSON. A
+snapshot (the answer to a "state" message, or to a request without seq)
+sets every mask bit, so a client with no earlier record has all scores.
+
+Boards other than 3x3 (see mnk.py) use version 2, which replaces the two
+H bitboards with ``B rows, B cols, B k`` followed by x and o as
+ceil(rows * cols / 8)-byte little-endian integers; the rest is unchanged.
+"""
+import json
+import struct
+
+from mnk import STANDARD
+
+JSON = 'application/json'
+COMPACT = 'application/x-ttt-state'
+VERSION = 1
+SIZED_VERSION = 2
+
+SCORE_FIELDS = ('round_wins', 'round_losses', 'round_draws', 'player_match_wins', 'ai_match_wins')
+WINNER_CODES = {None: 0, 1: 1, -1: 2, 0: 3}
+WINNERS = {code: winner for winner, code in WINNER_CODES.items()}
+
+HEADER = struct.Struct('<BHHBIB')
+SIZED_HEADER = struct.Struct('<BBBB')
+TAIL = struct.Struct('<BIB')
+
+
+def negotiate(accept):
+    return COMPACT if accept and COMPACT in accept else JSON
+
+
+def scores(game):
+    return (game.round_wins, game.round_losses, game.round_draws,
+            game.player_match_wins, game.ai_match_wins)
+
+
+def encode(game, game_id, status, before, content_type=JSON):
+    """Encode the game (caller holds its lock); `before` is scores() prior to
+    the request, or None for a snapshot carrying every score."""
+    if content_type == COMPACT:
+        after = scores(game)
+        changed = 0
+        values = []
+        for i, (old, new) in enumerate(zip(before or (None,) * len(after), after)):
+            if old != new:
+                changed |= 1 << i
+                values.append(new)
+        flags = (
+            (game.current_player == -1)
+            | game.done << 1
+            | game.match_over << 2
+            | (status == 409) << 3
+            | WINNER_CODES[game.winner] << 4
+        )
+        scores_tail = struct.pack(f'<{len(values)}I', *values)
+        if game.size == STANDARD:
+            return HEADER.pack(VERSION, game.x, game.o, flags, game.seq, changed) + scores_tail
+        rows, cols, k = game.size
+        width = (rows * cols + 7) // 8
+        return b''.join((
+            SIZED_HEADER.pack(SIZED_VERSION, rows, cols, k),
+            game.x.to_bytes(width, 'little'), game.o.to_bytes(width, 'little'),
+            TAIL.pack(flags, game.seq, changed), scores_tail,
+        ))
+
+    state = game.to_dict()
+    state['game_id'] = game_id
+    if status == 409:
+        state['error'] = 'stale move'
+    return json.dumps(state, separators=(',', ':')).encode()
+
+
+def decode_compact(data, scores_state=None):
+    """Decode a compact record, applying its score delta onto scores_state (a dict)."""
+    version = data[0]
+    if version == VERSION:
+        _, x, o, flags, seq, changed = HEADER.unpack_from(data)
+        size, offset = STANDARD, HEADER.size
+    elif version == SIZED_VERSION:
+        size = SIZED_HEADER.unpack_from(data)[1:]
+        width = (size[0] * size[1] + 7) // 8
+        offset = SIZED_HEADER.size
+        x = int.from_bytes(data[offset:offset + width], 'little')
+        o = int.from_bytes(data[offset + width:offset + 2 * width], 'little')
+        offset += 2 * width
+        flags, seq, changed = TAIL.unpack_from(data, offset)
+        offset += TAIL.size
+    else:
+        raise ValueError(f"unsupported state version {version}")
+    state = dict(scores_state or {})
+    values = iter(struct.unpack_from(f'<{bin(changed).count("1")}I', data, offset))
+    for i, field in enumerate(SCORE_FIELDS):
+        if changed >> i & 1:
+            state[field] = next(values)
+    state.update(
+        x=x, o=o, seq=seq, size=size,
+        current_player=-1 if flags & 1 else 1,
+        game_over=bool(flags & 2),
+        match_over=bool(flags & 4),
+        stale=bool(flags & 8),
+        winner=WINNERS[flags >> 4 & 3],
+    )
+    return state
@@ -0,0 +1,409 @@
+"""Tabular Q-learning for tic-tac-toe, trained by batched self-play.
+
+The Q-table is a ``(3**9, 9)`` float32 array indexed by the base-3 board key
+(X = 1, O = 2 per cell) and scores each move for the side to move. One table
+plays both sides: after a move the target is the reward if the game ended,
+otherwise minus the opponent's best Q-value in the resulting position.
+
+    python qlearning.py train --games 2000000 --checkpoint qtable.ckpt.npz
+    python qlearning.py train --workers 0 ...   # self-play on every core
+    python qlearning.py train --games 4000000 --resume ...   # continue to 4M in all
+    python qlearning.py replay --log moves.log    # learn from recorded games
+    python qlearning.py export --checkpoint qtable.ckpt.npz --out qtable.npy
+
+Serve the exported table with AI_POLICY=qlearning (see policies.py).
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from engine import CELLS, FULL, TERNARY
+
+STATES = 3 ** 9
+POW3 = 3 ** np.arange(9)
+LINES = np.array([
+    [0, 1, 2], [3, 4, 5], [6, 7, 8],
+    [0, 3, 6], [1, 4, 7], [2, 5, 8],
+    [0, 4, 8], [2, 4, 6]
+])
+QTABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'qtable.npy')
+
+def new_table():
+    return np.zeros((STATES, 9), dtype=np.float32)
+
+
+# -----------------------------
+# Vectorized self-play
+# -----------------------------
+def _best_reply(q, boards, keys):
+    # Opponent's best reply value in each new position (0 once the board is full)
+    best = np.where(boards == 0, q[keys], -np.inf).max(axis=1)
+    return np.where(np.isfinite(best), best, 0.0)
+
+
+def _td_update(q, keys, action, target, alpha, visits=None):
+    # Many games share the opening positions, so average the TD errors
+    # of duplicate (state, action) pairs and apply each once
+    flat = keys * 9 + action
+    cells, inverse = np.unique(flat, return_inverse=True)
+    error = target - q.reshape(-1)[flat]
+    mean_error = np.bincount(inverse, error) / np.bincount(inverse)
+    q.reshape(-1)[cells] += (alpha * mean_error).astype(np.float32)
+    if visits is not None:
+        visits[cells] += np.bincount(inverse)
+
+
+def self_play_batch(q, games, epsilon, alpha=0.5, gamma=0.95, rng=None, visits=None):
+    """Play `games` self-play games in lockstep, updating q in place.
+
+    When `visits` (a flat int64 array of q.size) is given, it accumulates the
+    number of updates applied to each (state, action) cell.
+    Returns the (x_wins, o_wins, draws) counts of the batch.
+    """
+    rng = rng or np.random.default_rng()
+    boards = np.zeros((games, 9), dtype=np.int8)
+    rows = np.arange(games)
+    active = np.ones(games, dtype=bool)
+    outcome = np.zeros(games, dtype=np.int8)
+    player = 1
+    keys = np.zeros(games, dtype=np.int64)
+
+    for _ in range(9):
+        idx = rows[active]
+        b = boards[idx]
+        k = keys[idx]
+        legal = b == 0
+
+        # Epsilon-greedy: random legal move, or best legal Q-value
+        q_s = np.where(legal, q[k], -np.inf)
+        greedy = q_s.argmax(axis=1)
+        explore = rng.random(len(idx)) < epsilon
+        noise = np.where(legal, rng.random(legal.shape), -1.0)
+        action = np.where(explore, noise.argmax(axis=1), greedy)
+
+        b[np.arange(len(idx)), action] = player
+        boards[idx] = b
+        won = (b[:, LINES].sum(axis=2) == 3 * player).any(axis=1)
+        full = (b != 0).all(axis=1)
+        next_k = k + (1 if player == 1 else 2) * POW3[action]
+
+        target = np.where(won, 1.0, np.where(full, 0.0, -gamma * _best_reply(q, b, next_k)))
+        _td_update(q, k, action, target, alpha, visits)
+
+        keys[idx] = next_k
+        ended = won | full
+        outcome[idx[won]] = player
+        active[idx[ended]] = False
+        if not active.any():
+            break
+        player = -player
+
+    return (
+        int((outcome == 1).sum()),
+        int((outcome == -1).sum()),
+        int((outcome == 0).sum()),
+    )
+
+
+def epsilon_at(played, games, epsilon, epsilon_min):
+    # Decays geometrically from epsilon to epsilon_min over all `games`
+    if epsilon <= 0 or games <= 0:
+        return epsilon
+    return max(epsilon_min, epsilon * (epsilon_min / epsilon) ** min(played / games, 1.0))
+
+
+def train(q, games, batch=1024, epsilon=0.3, epsilon_min=0.05, alpha=0.5,
+          gamma=0.95, seed=None, checkpoint=None, checkpoint_every=200, log=print, done=0,
+          log_interval=5.0):
+    """Self-play in batches until `games` games in all, `done` of them
+    already played (a resumed checkpoint); returns this run's games/sec.
+
+    Checkpoints are written every `checkpoint_every` batches; progress is
+    logged every `log_interval` seconds and at the end.
+    """
+    rng = np.random.default_rng(seed)
+    played, step = done, 0
+    start = last_log = time.perf_counter()
+    while played < games:
+        n = min(batch, games - played)
+        x_wins, o_wins, draws = self_play_batch(
+            q, n, epsilon_at(played, games, epsilon, epsilon_min), alpha, gamma, rng)
+        played += n
+        step += 1
+        if checkpoint and step % checkpoint_every == 0:
+            save_checkpoint(checkpoint, q, played, epsilon_at(played, games, epsilon, epsilon_min))
+        now = time.perf_counter()
+        if log and (now - last_log >= log_interval or played == games):
+            last_log = now
+            rate = (played - done) / (now - start)
+            log(f"{played:>10} games  eps={epsilon_at(played, games, epsilon, epsilon_min):.3f}  "
+                f"x/o/draw={x_wins}/{o_wins}/{draws}  {rate:,.0f} games/sec")
+    if checkpoint:
+        save_checkpoint(checkpoint, q, played, epsilon_at(played, games, epsilon, epsilon_min))
+    return (played - done) / (time.perf_counter() - start)
+
+
+# -----------------------------
+# Replay of logged games (see move_log.py)
+# -----------------------------
+def replay_batch(q, cells, plies, winners, alpha=0.5, gamma=0.95):
+    """Apply the self-play TD updates along recorded games.
+
+    cells is (n, 9) with the cell of each ply (X first), plies the number
+    of moves in each game and winners 1 / -1 / 0 for the side that won.
+    """
+    n = len(cells)
+    rows = np.arange(n)
+    boards = np.zeros((n, 9), dtype=np.int8)
+    keys = np.zeros(n, dtype=np.int64)
+    player = 1
+    for ply in range(9):
+        idx = rows[plies > ply]
+        if not len(idx):
+            break
+        action = cells[idx, ply].astype(np.int64)
+        k = keys[idx]
+        b = boards[idx]
+        b[np.arange(len(idx)), action] = player
+        boards[idx] = b
+        next_k = k + (1 if player == 1 else 2) * POW3[action]
+        last = plies[idx] == ply + 1
+        reward = (winners[idx] == player).astype(np.float64)
+        target = np.where(last, reward, -gamma * _best_reply(q, b, next_k))
+        _td_update(q, k, action, target, alpha)
+        keys[idx] = next_k
+        player = -player
+
+
+def train_from_log(q, path, epochs=1, chunk=65536, alpha=0.5, gamma=0.95, log=print):
+    """Replay every game in a move log into q; returns games/sec."""
+    import move_log
+
+    records = move_log.as_array(path)
+    winner_of = np.array([2, 1, -1, 0], dtype=np.int8)  # by move_log.WINNER_CODES
+    played = skipped = 0
+    start = time.perf_counter()
+    for _ in range(epochs):
+        for lo in range(0, len(records), chunk):
+            part = records[lo:lo + chunk]
+            cells, plies = move_log.move_matrix(part)
+            codes = np.asarray(part['winner'])
+            # Skip torn or corrupt records rather than train on them
+            ok = ((cells >= 0) | (np.arange(9) >= plies[:, None])).all(axis=1)
+            ok &= (plies >= 5) & (plies <= 9) & (codes >= 1) & (codes <= 3)
+            replay_batch(q, cells[ok], plies[ok], winner_of[codes[ok]], alpha, gamma)
+            played += int(ok.sum())
+            skipped += int((~ok).sum())
+    rate = played / max(time.perf_counter() - start, 1e-9)
+    if log:
+        log(f"replayed {played} games ({skipped} skipped)  {rate:,.0f} games/sec")
+    return rate
+
+
+# -----------------------------
+# Multi-process self-play with sharded tables
+# -----------------------------
+def _play_shard(q, games, batch, epsilon, alpha, gamma, seed):
+    """Worker: train a private copy of q and return its sparse update."""
+    rng = np.random.default_rng(seed)
+    local = q.copy()
+    visits = np.zeros(q.size, dtype=np.int64)
+    played = 0
+    while played < games:
+        n = min(batch, games - played)
+        self_play_batch(local, n, epsilon, alpha, gamma, rng, visits)
+        played += n
+    cells = np.flatnonzero(visits)
+    delta = local.reshape(-1)[cells] - q.reshape(-1)[cells]
+    return cells, delta, visits[cells]
+
+
+def merge_shards(q, shards):
+    """Apply per-shard updates to q, weighting each cell by its visit count."""
+    total = np.zeros(q.size, dtype=np.float64)
+    weight = np.zeros(q.size, dtype=np.float64)
+    for cells, delta, visits in shards:
+        total[cells] += delta * visits
+        weight[cells] += visits
+    touched = np.flatnonzero(weight)
+    q.reshape(-1)[touched] += (total[touched] / weight[touched]).astype(np.float32)
+
+
+def train_parallel(q, games, workers=None, round_games=None, batch=1024, epsilon=0.3,
+                   epsilon_min=0.05, alpha=0.5, gamma=0.95, seed=None,
+                   checkpoint=None, checkpoint_every=10, log=print, executor=None, done=0,
+                   log_interval=5.0):
+    """Self-play across a process pool until `games` games in all, `done`
+    of them already played; returns this run's games/sec.
+
+    Each round ships the current table to every worker, which plays its
+    share of `round_games` on a private copy and sends back only the cells
+    it touched. Shards are merged before the next round. Checkpoints are
+    written every `checkpoint_every` rounds; progress is logged every
+    `log_interval` seconds and at the end.
+    """
+    workers = workers or os.cpu_count() or 1
+    round_games = round_games or workers * batch * 8
+    seeds = np.random.SeedSequence(seed)
+    pool = executor or ProcessPoolExecutor(workers)
+    played, step = done, 0
+    start = last_log = time.perf_counter()
+    try:
+        while played < games:
+            n = min(round_games, games - played)
+            shares = [n // workers + (i < n % workers) for i in range(workers)]
+            eps = epsilon_at(played, games, epsilon, epsilon_min)
+            futures = [
+                pool.submit(_play_shard, q, share, batch, eps, alpha, gamma, child)
+                for share, child in zip(shares, seeds.spawn(workers)) if share
+            ]
+            merge_shards(q, [f.result() for f in futures])
+            played += n
+            step += 1
+            if checkpoint and step % checkpoint_every == 0:
+                save_checkpoint(checkpoint, q, played, epsilon_at(played, games, epsilon, epsilon_min))
+            now = time.perf_counter()
+            if log and (now - last_log >= log_interval or played == games):
+                last_log = now
+                rate = (played - done) / (now - start)
+                log(f"{played:>10} games  eps={epsilon_at(played, games, epsilon, epsilon_min):.3f}  "
+                    f"{workers} workers  {rate:,.0f} games/sec")
+    finally:
+        if executor is None:
+            pool.shutdown()
+    if checkpoint:
+        save_checkpoint(checkpoint, q, played, epsilon_at(played, games, epsilon, epsilon_min))
+    return (played - done) / (time.perf_counter() - start)
+
+
+def save_checkpoint(path, q, games, epsilon):
+    tmp = path + '.tmp.npz'
+    np.savez(tmp, q=q, games=games, epsilon=epsilon)
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path):
+    with np.load(path) as data:
+        return data['q'].copy(), int(data['games']), float(data['epsilon'])
+
+
+# -----------------------------
+# Greedy policy over an exported table
+# -----------------------------
+class QPolicy:
+    def __init__(self, q, source=None):
+        self.q = q
+        self.source = source
+        self._masks = None
+
+    def best_move(self, x, o):
+        free = FULL & ~(x | o)
+        if not free:
+            return None
+        row = self.q[TERNARY[x] + 2 * TERNARY[o]]
+        return max(CELLS[free], key=row.__getitem__)
+
+    def move_masks(self):
+        """Dense best-move mask per base-3 key, for batch evaluation."""
+        if self._masks is None:
+            digits = np.arange(STATES)[:, None] // POW3 % 3
+            legal = digits == 0
+            best = np.where(legal, self.q, -np.inf).argmax(axis=1)
+            self._masks = np.where(legal.any(axis=1), 1 << best, 0).astype(np.uint16)
+        return self._masks
+
+    def stats(self):
+        return {'policy': 'qlearning', 'source': self.source, 'bytes': int(self.q.nbytes)}
+
+
+def load_policy(path=QTABLE_PATH):
+    return QPolicy(np.load(path, mmap_mode='r'), path)
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    t = sub.add_parser('train', help='train by self-play, checkpointing as it goes')
+    t.add_argument('--games', type=int, default=2000000,
+                   help='self-play games in all, counting those of a resumed checkpoint')
+    t.add_argument('--batch', type=int, default=1024)
+    t.add_argument('--epsilon', type=float, default=0.3)
+    t.add_argument('--epsilon-min', type=float, default=0.05)
+    t.add_argument('--alpha', type=float, default=0.5)
+    t.add_argument('--gamma', type=float, default=0.95)
+    t.add_argument('--seed', type=int)
+    t.add_argument('--checkpoint', default='qtable.ckpt.npz')
+    t.add_argument('--checkpoint-every', type=int,
+                   help='batches between checkpoints (default 200), or merge rounds with --workers > 1 (default 10)')
+    t.add_argument('--log-every', type=float, default=5.0, help='seconds between progress lines')
+    t.add_argument('--resume', action='store_true', help='continue from --checkpoint')
+    t.add_argument('--workers', type=int, default=1, help='self-play processes (0 = all cores)')
+    t.add_argument('--round-games', type=int, help='games per merge round when --workers > 1')
+    t.add_argument('--out', help='also export the trained table here')
+
+    r = sub.add_parser('replay', help='train on games recorded in a move log')
+    r.add_argument('--log', default='moves.log')
+    r.add_argument('--epochs', type=int, default=1)
+    r.add_argument('--alpha', type=float, default=0.5)
+    r.add_argument('--gamma', type=float, default=0.95)
+    r.add_argument('--checkpoint', default='qtable.ckpt.npz', help='resumed if present, then saved')
+    r.add_argument('--out', help='also export the trained table here')
+
+    e = sub.add_parser('export', help='write the table ai_choose_move loads')
+    e.add_argument('--checkpoint', default='qtable.ckpt.npz')
+    e.add_argument('--out', default=QTABLE_PATH)
+
+    args = parser.parse_args(argv)
+    if args.command == 'train':
+        for flag in ('games', 'batch', 'checkpoint_every', 'round_games'):
+            value = getattr(args, flag)
+            if value is not None and value < 1:
+                parser.error(f"--{flag.replace('_', '-')} must be at least 1")
+        if not args.log_every > 0:
+            parser.error('--log-every must be positive')
+        if args.workers < 0:
+            parser.error('--workers must be 0 (all cores) or more')
+        # The epsilon schedule runs from --epsilon over all --games, so a
+        # resumed run picks it up at the checkpoint's game count
+        q, done = new_table(), 0
+        if args.resume and os.path.exists(args.checkpoint):
+            q, done, _ = load_checkpoint(args.checkpoint)
+            print(f"resuming from {args.checkpoint} after {done} of {args.games} games")
+        options = dict(done=done, log_interval=args.log_every)
+        if args.checkpoint_every:
+            options['checkpoint_every'] = args.checkpoint_every
+        if args.workers == 1:
+            rate = train(q, args.games, args.batch, args.epsilon, args.epsilon_min, args.alpha,
+                         args.gamma, args.seed, args.checkpoint, **options)
+        else:
+            rate = train_parallel(q, args.games, args.workers or None, args.round_games,
+                                  args.batch, args.epsilon, args.epsilon_min, args.alpha,
+                                  args.gamma, args.seed, args.checkpoint, **options)
+        print(f"throughput: {rate:,.0f} games/sec")
+        if args.out:
+            np.save(args.out, q)
+            print(f"exported {args.out}")
+    elif args.command == 'replay':
+        q, done, epsilon = new_table(), 0, 0.05
+        if os.path.exists(args.checkpoint):
+            q, done, epsilon = load_checkpoint(args.checkpoint)
+        train_from_log(q, args.log, args.epochs, alpha=args.alpha, gamma=args.gamma)
+        save_checkpoint(args.checkpoint, q, done, epsilon)
+        if args.out:
+            np.save(args.out, q)
+            print(f"exported {args.out}")
+    else:
+        q, done, _ = load_checkpoint(args.checkpoint)
+        np.save(args.out, q)
+        print(f"exported {args.out} ({done} games)")
+
+
+if __name__ == '__main__':
+    main()
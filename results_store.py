@@ -0,0 +1,296 @@
+"""Finished rounds and matches, persisted to SQLite behind a write-behind queue.
+
+``record_round`` only updates the in-memory aggregates and enqueues a row,
+so the request path never waits on SQLite; a background thread drains the
+queue in batched transactions. Leaderboard and stats queries are answered
+from the aggregates, which are loaded from the database once at start-up
+and then updated incrementally.
+
+Several processes (gunicorn workers) can share one database. Each one's
+writer also counts the rows the others wrote: every batch, and every
+sync_interval seconds when idle, it reads the rows past the last rowid it
+has seen. Its own inserts share that write transaction, so they are never
+counted twice. Other workers' results show up within about sync_interval.
+
+The queue holds at most max_pending rows; if the writer falls that far
+behind, further rows are still counted in memory but not persisted
+(writer_stats() reports them as dropped). A batch that fails (say, the
+database stays locked) is retried with backoff up to max_attempts times
+before its rows are given up and counted as errors. If the writer cannot
+open the database at all it stops, logs why, and later rows are dropped.
+"""
+import hashlib
+import heapq
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+# Per-game and total counters, in this order
+FIELDS = ('rounds_won', 'rounds_lost', 'rounds_drawn', 'matches_won', 'matches_lost')
+ROUND_FIELD = {1: 0, -1: 1, 0: 2}
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS rounds (
+    game_id TEXT NOT NULL,
+    winner INTEGER NOT NULL,
+    finished_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS matches (
+    game_id TEXT NOT NULL,
+    player_wins INTEGER NOT NULL,
+    ai_wins INTEGER NOT NULL,
+    finished_at REAL NOT NULL
+);
+'''
+
+LAST_ROWIDS = 'SELECT (SELECT IFNULL(MAX(rowid), 0) FROM rounds), (SELECT IFNULL(MAX(rowid), 0) FROM matches)'
+
+_STOP = object()
+
+log = logging.getLogger(__name__)
+
+
+def player_tag(game_id):
+    # Game ids double as session credentials, so public listings use a digest
+    return hashlib.sha256(game_id.encode()).hexdigest()[:12]
+
+
+class ResultStore:
+    """Aggregated results, optionally persisted to the SQLite file at path.
+
+    With path=None nothing is written and the aggregates start empty.
+    """
+
+    def __init__(self, path=None, batch_size=500, flush_interval=0.5, sync_interval=1.0,
+                 max_pending=100000, max_attempts=5, retry_delay=0.1, clock=time.time):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sync_interval = sync_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.clock = clock
+        self.written = 0
+        self.errors = 0
+        self.dropped = 0
+        self.synced = 0
+        self.retries = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._totals = [0] * len(FIELDS)
+        self._games = {}
+        self._version = 0
+        self._leaderboard = None
+        # Highest rowid of rounds and of matches already in the aggregates
+        self._seen = (0, 0)
+        self._queue = queue.Queue(max_pending)
+        self._writer = None
+        if path is not None:
+            self._load()
+            self._writer = threading.Thread(target=self._write_loop, name='results-writer', daemon=True)
+            self._writer.start()
+
+    # -----------------------------
+    # Recording
+    # -----------------------------
+    def record_round(self, game_id, winner, match=None):
+        """Count a finished round; match is (player_wins, ai_wins) if it ended the match."""
+        now = self.clock()
+        with self._lock:
+            self._count(game_id, ROUND_FIELD[winner], 1)
+            if match is not None:
+                self._count(game_id, 3 if match[0] > match[1] else 4, 1)
+            self._version += 1
+        if self._writer is not None:
+            if not self._writer.is_alive():
+                self.dropped += 1
+                return
+            try:
+                self._queue.put_nowait((game_id, winner, match, now))
+            except queue.Full:
+                self.dropped += 1
+
+    def _count(self, game_id, field, n):
+        counts = self._games.get(game_id)
+        if counts is None:
+            counts = self._games[game_id] = [0] * len(FIELDS)
+        counts[field] += n
+        self._totals[field] += n
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def stats(self, game_ids=()):
+        """Totals, plus the counters of each requested game (bulk lookup)."""
+        with self._lock:
+            result = {'totals': dict(zip(FIELDS, self._totals)), 'games': {}}
+            for game_id in game_ids:
+                counts = self._games.get(game_id)
+                result['games'][game_id] = dict(zip(FIELDS, counts or [0] * len(FIELDS)))
+            result['totals']['players'] = len(self._games)
+        return result
+
+    def leaderboard(self, limit=10):
+        """Top games by matches won, then rounds won, then fewest rounds lost."""
+        with self._lock:
+            cached = self._leaderboard
+            if cached is not None and cached[0] == self._version and cached[1] >= limit:
+                return cached[2][:limit]
+            top = heapq.nlargest(
+                limit, self._games.items(),
+                key=lambda item: (item[1][3], item[1][0], -item[1][1]),
+            )
+            rows = [dict(player=player_tag(game_id), **dict(zip(FIELDS, counts)))
+                    for game_id, counts in top]
+            self._leaderboard = (self._version, limit, rows)
+        return rows
+
+    def writer_stats(self):
+        return {
+            'persistent': self.path is not None,
+            'writer_alive': self._writer is not None and self._writer.is_alive(),
+            'pending': self._queue.qsize(),
+            'written': self.written,
+            'retries': self.retries,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'dropped': self.dropped,
+            'synced': self.synced,
+        }
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def _load(self):
+        conn = sqlite3.connect(self.path)
+        try:
+            conn.executescript(SCHEMA)
+            # Rows past the ones counted here are picked up by the writer
+            self._seen = conn.execute(LAST_ROWIDS).fetchone()
+            rounds = conn.execute(
+                'SELECT game_id, winner, COUNT(*) FROM rounds WHERE rowid <= ? GROUP BY game_id, winner',
+                self._seen[:1])
+            for game_id, winner, n in rounds:
+                self._count(game_id, ROUND_FIELD[winner], n)
+            matches = conn.execute(
+                'SELECT game_id, player_wins > ai_wins, COUNT(*) FROM matches WHERE rowid <= ? GROUP BY 1, 2',
+                self._seen[1:])
+            for game_id, player_won, n in matches:
+                self._count(game_id, 3 if player_won else 4, n)
+        finally:
+            conn.close()
+
+    def _write_loop(self):
+        conn = self._connect()
+        if conn is None:
+            log.error('results writer for %s stopped: %s', self.path, self.last_error)
+            self._abandon()
+            return
+        stop = False
+        while not stop:
+            try:
+                batch = [self._queue.get(timeout=self.sync_interval)]
+            except queue.Empty:
+                batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while batch and len(batch) < self.batch_size and batch[-1] is not _STOP:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            stop = bool(batch) and batch[-1] is _STOP
+            rows = [item for item in batch if item is not _STOP]
+            self._write(conn, rows)
+            for _ in batch:
+                self._queue.task_done()
+        conn.close()
+
+    def _connect(self):
+        for attempt in range(self.max_attempts):
+            conn = None
+            try:
+                # Transactions are begun explicitly, see _sync()
+                conn = sqlite3.connect(self.path, isolation_level=None)
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('PRAGMA synchronous=NORMAL')
+                return conn
+            except sqlite3.Error as e:
+                self.last_error = str(e)
+                if conn is not None:
+                    conn.close()
+                if attempt + 1 < self.max_attempts:
+                    self.retries += 1
+                    time.sleep(self.retry_delay * 2 ** attempt)
+        return None
+
+    def _write(self, conn, rows):
+        # Retry a failed batch with backoff; an idle sync is simply skipped
+        for attempt in range(self.max_attempts):
+            try:
+                self._sync(conn, rows)
+                self.written += len(rows)
+                return
+            except sqlite3.Error as e:
+                self.last_error = str(e)
+                if not rows:
+                    return
+                if attempt + 1 < self.max_attempts:
+                    self.retries += 1
+                    time.sleep(self.retry_delay * 2 ** attempt)
+        self.errors += len(rows)
+        log.error('gave up writing %d results to %s: %s', len(rows), self.path, self.last_error)
+
+    def _abandon(self):
+        # The writer is gone: release anything queued so flush() returns
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self.dropped += 1
+            self._queue.task_done()
+
+    def _sync(self, conn, rows):
+        # Count the rows other processes wrote since the last sync, then
+        # insert ours; one write transaction, so ours are never read back
+        conn.execute('BEGIN IMMEDIATE' if rows else 'BEGIN')
+        try:
+            rounds = conn.execute(
+                'SELECT game_id, winner FROM rounds WHERE rowid > ?', self._seen[:1]).fetchall()
+            matches = conn.execute(
+                'SELECT game_id, player_wins > ai_wins FROM matches WHERE rowid > ?', self._seen[1:]).fetchall()
+            conn.executemany(
+                'INSERT INTO rounds VALUES (?, ?, ?)',
+                [(game_id, winner, at) for game_id, winner, _, at in rows])
+            conn.executemany(
+                'INSERT INTO matches VALUES (?, ?, ?, ?)',
+                [(game_id, match[0], match[1], at)
+                 for game_id, _, match, at in rows if match is not None])
+            seen = conn.execute(LAST_ROWIDS).fetchone()
+            conn.execute('COMMIT')
+        except BaseException:
+            # SQLite may already have rolled back (e.g. SQLITE_BUSY mid-statement)
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        self._seen = seen
+        if rounds or matches:
+            with self._lock:
+                for game_id, winner in rounds:
+                    self._count(game_id, ROUND_FIELD[winner], 1)
+                for game_id, player_won in matches:
+                    self._count(game_id, 3 if player_won else 4, 1)
+                self._version += 1
+            self.synced += len(rounds)
+
+    def flush(self):
+        """Block until every queued result has been written (or given up)."""
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.join()
+
+    def close(self):
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
@@ -0,0 +1,75 @@
+"""Game rules and the move log, shared by the API (game_api.py) and the
+Streamlit app (app.py) without either pulling in the other's state.
+
+Positions are the x / o bitboards of engine.py (3x3) or mnk.py (any other
+size), passed in explicitly along with the board size.
+"""
+import atexit
+import os
+import threading
+
+import engine
+import mnk
+
+# Rounds a side must win to take the match
+MATCH_WINS = 3
+
+MOVE_LOG = os.environ.get(
+    'MOVE_LOG', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'moves.log'))
+_move_log = None
+_move_log_lock = threading.Lock()
+
+
+def move_log():
+    # Opened on first use, once per process; returns None when MOVE_LOG=''
+    # or the file can't be opened for appending
+    global _move_log
+    with _move_log_lock:
+        if _move_log is None:
+            import move_log as log
+            try:
+                _move_log = log.MoveLog(MOVE_LOG) if MOVE_LOG else False
+            except (OSError, ValueError):
+                _move_log = False
+            if _move_log:
+                atexit.register(_move_log.close)
+        return _move_log or None
+
+
+# -----------------------------
+# Rules
+# -----------------------------
+def place(x, o, size, pos, player):
+    """(x, o) with player's stone on pos, or None if pos is not a free cell."""
+    cells = size[0] * size[1]
+    if not isinstance(pos, int) or isinstance(pos, bool) or not 0 <= pos < cells:
+        return None
+    bit = 1 << pos
+    if (x | o) & bit:
+        return None
+    return (x | bit, o) if player == 1 else (x, o | bit)
+
+def board_winner(x, o, size, pos, player):
+    """1 / -1 / 0 (draw) once player's stone on pos ends the round, else None."""
+    if size == mnk.STANDARD:
+        return engine.winner(x, o)
+    # Larger boards only check the lines through the new stone
+    g = mnk.geometry(*size)
+    if mnk.wins(g, x if player == 1 else o, pos):
+        return player
+    return 0 if x | o == g.full else None
+
+def tally(scores, winner):
+    """Score counters (protocol.SCORE_FIELDS order) after a round won by
+    winner; returns (scores, match_over)."""
+    wins, losses, draws, player_matches, ai_matches = scores
+    if winner == 1:
+        wins += 1
+        player_matches += 1
+    elif winner == -1:
+        losses += 1
+        ai_matches += 1
+    else:
+        draws += 1
+    match_over = player_matches >= MATCH_WINS or ai_matches >= MATCH_WINS
+    return (wins, losses, draws, player_matches, ai_matches), match_over
@@ -0,0 +1,138 @@
+"""Depth-limited alpha-beta search for the adjustable-strength AI level.
+
+Negamax over the engine's bitboards with a static line-count evaluation at
+the depth limit. Each move is searched by iterative deepening against a
+wall-clock budget: the move from the deepest completed iteration is played,
+so a move never takes much longer than the budget however deep the limit.
+"""
+import random
+import time
+
+from engine import CELLS, FULL, HAS_LINE, WIN_MASKS, heuristic_move, side_to_move
+
+WIN = 100
+# Centre first, then corners, then edges
+PRIORITY = (1, 2, 1, 2, 0, 2, 1, 2, 1)
+# Static value of a line holding n pieces of one side and none of the other
+LINE_SCORE = (0, 1, 4, 0)
+
+
+class Timeout(Exception):
+    pass
+
+
+def evaluate(me, opp):
+    """Static score for the side to move: open lines weighted by piece count."""
+    score = 0
+    for m in WIN_MASKS:
+        mine, theirs = me & m, opp & m
+        if not theirs:
+            score += LINE_SCORE[len(CELLS[mine])]
+        elif not mine:
+            score -= LINE_SCORE[len(CELLS[theirs])]
+    return score
+
+
+def ordered_moves(me, opp, first=None):
+    """Candidate cells, best first; only the forced ones when there are any."""
+    free = FULL & ~(me | opp)
+    cells = CELLS[free]
+    for side in (me, opp):
+        # Win now, else block: anything else loses at once
+        forced = [i for i in cells if HAS_LINE[side | 1 << i]]
+        if forced:
+            return forced[:1] if side is me else forced
+    cells = sorted(cells, key=PRIORITY.__getitem__)
+    if first in cells:
+        cells.remove(first)
+        cells.insert(0, first)
+    return cells
+
+
+class AlphaBetaPolicy:
+    def __init__(self, max_depth=9, budget=0.05, name='alphabeta'):
+        self.max_depth = max_depth
+        self.budget = budget
+        self.name = name
+        self.searches = 0
+        self.timeouts = 0
+        self.nodes = 0
+
+    def _negamax(self, me, opp, depth, alpha, beta, ply, deadline):
+        # The deadline is passed down rather than stored, so threads can
+        # share one policy
+        self.nodes += 1
+        if time.perf_counter() > deadline:
+            raise Timeout
+        if depth == 0:
+            return evaluate(me, opp)
+        best = -WIN - 1
+        for i in ordered_moves(me, opp):
+            bit = 1 << i
+            if HAS_LINE[me | bit]:
+                score = WIN - ply
+            elif me | opp | bit == FULL:
+                score = 0
+            else:
+                score = -self._negamax(opp, me | bit, depth - 1, -beta, -alpha, ply + 1, deadline)
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best
+
+    def search(self, me, opp):
+        """Return (cell, completed depth) for the side owning `me`."""
+        free = FULL & ~(me | opp)
+        deadline = time.perf_counter() + self.budget
+        self.searches += 1
+        best, completed = None, 0
+        for depth in range(1, min(self.max_depth, len(CELLS[free])) + 1):
+            try:
+                move, score = self._root(me, opp, depth, best, deadline)
+            except Timeout:
+                self.timeouts += 1
+                break
+            best, completed = move, depth
+            if abs(score) >= WIN - 9:
+                break  # forced result found; deeper search can't change it
+        if best is None:
+            best = heuristic_move(me, opp)
+        return best, completed
+
+    def _root(self, me, opp, depth, first, deadline):
+        alpha, beta = -WIN - 1, WIN + 1
+        best_moves = []
+        for i in ordered_moves(me, opp, first):
+            bit = 1 << i
+            if HAS_LINE[me | bit]:
+                return i, WIN
+            if me | opp | bit == FULL:
+                score = 0
+            else:
+                # Window just below alpha so equally good moves are scored exactly
+                score = -self._negamax(opp, me | bit, depth - 1, -beta, -(alpha - 1), 1, deadline)
+            if score > alpha:
+                alpha, best_moves = score, [i]
+            elif score == alpha:
+                best_moves.append(i)
+        choice = first if first in best_moves else random.choice(best_moves)
+        return choice, alpha
+
+    def best_move(self, x, o):
+        if not FULL & ~(x | o):
+            return None
+        me, opp = (x, o) if side_to_move(x, o) == 1 else (o, x)
+        return self.search(me, opp)[0]
+
+    def stats(self):
+        return {
+            'policy': self.name,
+            'max_depth': self.max_depth,
+            'budget_ms': self.budget * 1000,
+            'searches': self.searches,
+            'timeouts': self.timeouts,
+            'nodes': self.nodes,
+        }
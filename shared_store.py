@@ -0,0 +1,226 @@
+"""Game state shared by the worker processes of one machine.
+
+Every game lives in a fixed-size slot of one memory-mapped file (in
+/dev/shm by default), so gunicorn workers, or any processes opening the
+same path, see the same boards. The slot is found from the game id:
+
+    header   4s magic b'TTTS', H version, H ways, I slots (padded to 64 bytes)
+    slot     B in use, B id length, 64s game id, game_store.RECORD (138 bytes)
+
+Slots are grouped in sets of WAYS. A game id hashes (crc32) to one set and
+may take any slot in it: its own, else a free or expired one, else the one
+seen least recently, which is evicted. That is TTL + LRU eviction as in
+GameStore, applied per set.
+
+A set is locked across processes with an fcntl byte-range lock and across
+threads with a striped threading.Lock. A game's ``lock`` holds its set
+locked, loads the slot into the Game on entry and writes it back on exit,
+so game_api.run() works unchanged. POSIX only (fcntl).
+"""
+import fcntl
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+
+from game_store import RECORD, SEEN_OFFSET, Game, pack_game, unpack_game
+
+MAGIC = b'TTTS'
+VERSION = 2
+WAYS = 4
+HEADER = struct.Struct('<4sHHI')
+HEADER_SIZE = 64
+ID_BYTES = 64
+SLOT_HEAD = struct.Struct(f'<BB{ID_BYTES}s')
+SLOT_SIZE = SLOT_HEAD.size + RECORD.size
+SET_SIZE = WAYS * SLOT_SIZE
+# Offset of last_seen within a slot
+SEEN = struct.Struct('<d')
+SEEN_AT = SLOT_HEAD.size + SEEN_OFFSET
+LOCK_STRIPES = 64
+
+DEFAULT_PATH = os.path.join('/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), 'ttt-games')
+
+
+class SharedGameStore:
+    def __init__(self, path=DEFAULT_PATH, max_games=20000, ttl=3600, clock=time.time):
+        # The clock must agree across processes, hence wall time
+        self.path = path
+        self.ttl = ttl
+        self.clock = clock
+        self.sets = max(1, -(-max_games // WAYS))
+        self.max_games = self.sets * WAYS
+        size = HEADER_SIZE + self.sets * SET_SIZE
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            # Whoever gets here first sizes the file; later workers check it
+            fcntl.lockf(fd, fcntl.LOCK_EX, HEADER_SIZE, 0)
+            try:
+                if os.fstat(fd).st_size == 0:
+                    os.ftruncate(fd, size)
+                    os.pwrite(fd, HEADER.pack(MAGIC, VERSION, WAYS, self.max_games), 0)
+                else:
+                    magic, version, ways, slots = HEADER.unpack(os.pread(fd, HEADER.size, 0))
+                    if (magic, version, ways, slots) != (MAGIC, VERSION, WAYS, self.max_games):
+                        raise ValueError(f"{path} holds a different game store ({slots} slots)")
+            finally:
+                fcntl.lockf(fd, fcntl.LOCK_UN, HEADER_SIZE, 0)
+            self._map = mmap.mmap(fd, size)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    # -----------------------------
+    # Sets and slots
+    # -----------------------------
+    def _acquire(self, s):
+        self._locks[s % LOCK_STRIPES].acquire()
+        try:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, SET_SIZE, HEADER_SIZE + s * SET_SIZE)
+        except BaseException:
+            self._locks[s % LOCK_STRIPES].release()
+            raise
+        return HEADER_SIZE + s * SET_SIZE
+
+    def _release(self, s):
+        try:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, SET_SIZE, HEADER_SIZE + s * SET_SIZE)
+        finally:
+            self._locks[s % LOCK_STRIPES].release()
+
+    def _slot(self, start, key, now, claim):
+        """Offset of key's live slot in the set at start (caller holds it).
+
+        With claim, a missing or expired game gets a fresh record in a free,
+        expired or least recently seen slot; otherwise None is returned.
+        """
+        m = self._map
+        cutoff = now - self.ttl
+        victim, victim_seen = None, None
+        for way in range(WAYS):
+            off = start + way * SLOT_SIZE
+            used, length, stored = SLOT_HEAD.unpack_from(m, off)
+            seen = SEEN.unpack_from(m, off + SEEN_AT)[0] if used else float('-inf')
+            if used and stored[:length] == key:
+                if seen > cutoff:
+                    return off
+                victim, victim_seen = off, float('-inf')
+                break
+            if victim is None or seen < victim_seen:
+                victim, victim_seen = off, seen
+        if not claim:
+            return None
+        fresh = Game()
+        fresh.last_seen = now
+        SLOT_HEAD.pack_into(m, victim, 1, len(key), key)
+        m[victim + SLOT_HEAD.size:victim + SLOT_SIZE] = pack_game(fresh)
+        return victim
+
+    def _key(self, game_id):
+        key = game_id.encode() if game_id else b''
+        return key if len(key) <= ID_BYTES else b''
+
+    # -----------------------------
+    # GameStore interface
+    # -----------------------------
+    def new_id(self):
+        return uuid.uuid4().hex
+
+    def get(self, game_id, create=True):
+        """Return (game_id, game), creating a fresh game for unknown ids."""
+        key = self._key(game_id)
+        if not key:
+            if not create:
+                return game_id, None
+            game_id = self.new_id()
+            key = game_id.encode()
+        s = zlib.crc32(key) % self.sets
+        now = self.clock()
+        start = self._acquire(s)
+        try:
+            off = self._slot(start, key, now, create)
+            if off is not None:
+                SEEN.pack_into(self._map, off + SEEN_AT, now)
+        finally:
+            self._release(s)
+        if off is None:
+            return game_id, None
+        game = Game()
+        game.last_seen = now
+        game.lock = SlotLock(self, key, s, game)
+        return game_id, game
+
+    def discard(self, game_id):
+        key = self._key(game_id)
+        if key:
+            s = zlib.crc32(key) % self.sets
+            start = self._acquire(s)
+            try:
+                off = self._slot(start, key, self.clock(), False)
+                if off is not None:
+                    self._map[off] = 0
+            finally:
+                self._release(s)
+
+    def __contains__(self, game_id):
+        key = self._key(game_id)
+        if not key:
+            return False
+        s = zlib.crc32(key) % self.sets
+        start = self._acquire(s)
+        try:
+            return self._slot(start, key, self.clock(), False) is not None
+        finally:
+            self._release(s)
+
+    def __len__(self):
+        # Unlocked scan; approximate while other processes are playing
+        m, cutoff = self._map, self.clock() - self.ttl
+        return sum(
+            1 for off in range(HEADER_SIZE, len(m), SLOT_SIZE)
+            if m[off] and SEEN.unpack_from(m, off + SEEN_AT)[0] > cutoff
+        )
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+
+class SlotLock:
+    """game.lock for a SharedGameStore game: syncs the Game with its slot."""
+    __slots__ = ('store', 'key', 'set', 'game', 'offset')
+
+    def __init__(self, store, key, s, game):
+        self.store = store
+        self.key = key
+        self.set = s
+        self.game = game
+        self.offset = None
+
+    def __enter__(self):
+        store = self.store
+        start = store._acquire(self.set)
+        try:
+            now = store.clock()
+            # Claims a fresh record if the game expired or was evicted since
+            off = store._slot(start, self.key, now, True)
+            unpack_game(store._map[off + SLOT_HEAD.size:off + SLOT_SIZE], self.game)
+            self.game.last_seen = now
+            self.offset = off
+        except BaseException:
+            store._release(self.set)
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        off, self.offset = self.offset, None
+        try:
+            self.store._map[off + SLOT_HEAD.size:off + SLOT_SIZE] = pack_game(self.game)
+        finally:
+            self.store._release(self.set)
@@ -0,0 +1,200 @@
+"""Perfect-play move table for tic-tac-toe.
+
+Every reachable position is solved once with memoized negamax. Positions
+are folded under the eight board symmetries (see symmetry.py) and written
+to ``ai_table.bin`` as:
+
+    b'TTT2' | uint32 count | count sorted uint32 keys | count uint16 entries
+
+all little-endian. Keys are canonical ``x | o << 9``; entry layout: bits
+0-8 best-move mask in the canonical orientation, bits 9-10 game value + 1
+for the side to move (0 loss, 1 draw, 2 win), bit 15 set.
+
+Build the table with:  python solver.py [path]
+"""
+import mmap
+import os
+import random
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+from engine import CELLS, FULL, HAS_LINE, TERNARY
+from symmetry import TRANSFORM, TranspositionTable, canonical, from_canonical
+
+MAGIC = b'TTT2'
+VALID = 1 << 15
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ai_table.bin')
+
+
+# -----------------------------
+# Solver
+# -----------------------------
+def solve():
+    """Return {canonical key: entry} for every reachable non-terminal position."""
+    table = {}
+    scores = {}
+
+    def negamax(me, opp, x_to_move):
+        # Score for the side to move: 10 - plies for a win, so faster wins
+        # (and slower losses) are preferred; 0 for a draw.
+        x, o = (me, opp) if x_to_move else (opp, me)
+        k, t = canonical(x, o)
+        if k in scores:
+            return scores[k]
+        free = FULL & ~(me | opp)
+        pieces = 9 - len(CELLS[free])
+        best, best_mask = -100, 0
+        for i in CELLS[free]:
+            bit = 1 << i
+            if HAS_LINE[me | bit]:
+                score = 10 - (pieces + 1)
+            elif (me | opp | bit) == FULL:
+                score = 0
+            else:
+                score = -negamax(opp, me | bit, not x_to_move)
+            if score > best:
+                best, best_mask = score, bit
+            elif score == best:
+                best_mask |= bit
+        value = (best > 0) - (best < 0)
+        table[k] = VALID | (value + 1) << 9 | TRANSFORM[t][best_mask]
+        scores[k] = best
+        return best
+
+    negamax(0, 0, True)
+    return table
+
+
+def save(table, path=TABLE_PATH):
+    keys = array('I', sorted(table))
+    entries = array('H', (table[k] for k in keys))
+    if sys.byteorder != 'little':
+        keys.byteswap()
+        entries.byteswap()
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(keys)))
+        f.write(keys.tobytes())
+        f.write(entries.tobytes())
+    os.replace(tmp, path)
+
+
+# -----------------------------
+# Loading and lookup
+# -----------------------------
+class MoveTable:
+    """Lookup over the solved table, fronted by an optional TranspositionTable."""
+
+    def __init__(self, keys, entries, source=None, cache=None):
+        self.keys = keys
+        self.entries = entries
+        self.source = source
+        self.cache = cache
+        self._masks = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _lookup(self, x, o):
+        k, t = canonical(x, o)
+        keys = self.keys
+        i = bisect_left(keys, k)
+        if i < len(keys) and keys[i] == k:
+            return self.entries[i], t
+        return 0, t
+
+    def best_mask(self, x, o):
+        cache = self.cache
+        if cache is not None:
+            mask = cache.get(x, o)
+            if mask is not None:
+                return mask
+        entry, t = self._lookup(x, o)
+        mask = from_canonical(entry & FULL, t)
+        if cache is not None:
+            cache.put(x, o, mask)
+        return mask
+
+    def best_moves(self, x, o):
+        return CELLS[self.best_mask(x, o)]
+
+    def value(self, x, o):
+        """Game value for the side to move: 1 win, 0 draw, -1 loss, None if unsolved."""
+        entry, _ = self._lookup(x, o)
+        if not entry & VALID:
+            return None
+        return (entry >> 9 & 3) - 1
+
+    def best_move(self, x, o):
+        moves = self.best_moves(x, o)
+        return random.choice(moves) if moves else None
+
+    def move_masks(self):
+        """Dense best-move mask per base-3 key, for batch evaluation."""
+        if self._masks is None:
+            masks = array('H', bytes(2 * 3 ** 9))
+            for k, entry in zip(self.keys, self.entries):
+                cx, co, mask = k & FULL, k >> 9, entry & FULL
+                for t in range(8):
+                    table = TRANSFORM[t]
+                    masks[TERNARY[table[cx]] + 2 * TERNARY[table[co]]] = table[mask]
+            self._masks = masks
+        return self._masks
+
+    def stats(self):
+        stats = {'policy': 'perfect', 'positions': len(self.keys), 'bytes': 6 * len(self.keys)}
+        if self.cache is not None:
+            stats['cache'] = self.cache.stats()
+        return stats
+
+
+def from_dict(table, source=None, cache=None):
+    keys = array('I', sorted(table))
+    return MoveTable(keys, array('H', (table[k] for k in keys)), source, cache)
+
+
+def load(path=TABLE_PATH, cache=None):
+    """Memory-map the table at path, solving (and saving) it if missing."""
+    try:
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        table = solve()
+        try:
+            save(table, path)
+        except OSError:
+            pass
+        return from_dict(table, cache=cache)
+    if mm[:4] != MAGIC:
+        raise ValueError(f"{path} is not a move table")
+    count, = struct.unpack_from('<I', mm, 4)
+    if len(mm) != 8 + 6 * count:
+        raise ValueError(f"{path} is truncated")
+    split = 8 + 4 * count
+    if sys.byteorder == 'little':
+        view = memoryview(mm)
+        keys, entries = view[8:split].cast('I'), view[split:].cast('H')
+    else:
+        keys, entries = array('I', mm[8:split]), array('H', mm[split:])
+        keys.byteswap()
+        entries.byteswap()
+    return MoveTable(keys, entries, path, cache)
+
+
+_default = None
+
+def default_table():
+    global _default
+    if _default is None:
+        _default = load(cache=TranspositionTable())
+    return _default
+
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else TABLE_PATH
+    table = solve()
+    save(table, path)
+    print(f"solved {len(table)} canonical positions -> {path} ({os.path.getsize(path)} bytes)")
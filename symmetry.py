@@ -0,0 +1,104 @@
+"""The eight board symmetries and a transposition table keyed on them.
+
+A transform ``t`` maps a bitboard to ``TRANSFORM[t][b]``; ``canonical``
+picks the transform giving the smallest ``x | o << 9`` key, so all eight
+rotations/reflections of a position share one table entry.
+"""
+
+# PERMS[t][i] is the source cell that lands on cell i under transform t
+PERMS = (
+    (0, 1, 2, 3, 4, 5, 6, 7, 8),  # identity
+    (6, 3, 0, 7, 4, 1, 8, 5, 2),  # rotate 90
+    (8, 7, 6, 5, 4, 3, 2, 1, 0),  # rotate 180
+    (2, 5, 8, 1, 4, 7, 0, 3, 6),  # rotate 270
+    (2, 1, 0, 5, 4, 3, 8, 7, 6),  # mirror left-right
+    (6, 7, 8, 3, 4, 5, 0, 1, 2),  # mirror top-bottom
+    (0, 3, 6, 1, 4, 7, 2, 5, 8),  # main diagonal
+    (8, 5, 2, 7, 4, 1, 6, 3, 0),  # anti-diagonal
+)
+
+TRANSFORM = tuple(
+    tuple(sum(1 << i for i in range(9) if b >> p[i] & 1) for b in range(1 << 9))
+    for p in PERMS
+)
+
+def _index(perm):
+    return PERMS.index(tuple(perm))
+
+# INVERSE[t] undoes t; COMPOSE[a][b] applies a then the inverse of b
+INVERSE = tuple(_index(sorted(range(9), key=p.__getitem__)) for p in PERMS)
+COMPOSE = tuple(
+    tuple(_index(PERMS[a][PERMS[INVERSE[b]][i]] for i in range(9)) for b in range(8))
+    for a in range(8)
+)
+
+
+def canonical(x, o):
+    """Return (canonical key, transform index) for the position."""
+    best_key, best_t = x | o << 9, 0
+    for t in range(1, 8):
+        table = TRANSFORM[t]
+        k = table[x] | table[o] << 9
+        if k < best_key:
+            best_key, best_t = k, t
+    return best_key, best_t
+
+def to_canonical(mask, t):
+    return TRANSFORM[t][mask]
+
+def from_canonical(mask, t):
+    return TRANSFORM[INVERSE[t]][mask]
+
+
+# -----------------------------
+# Symmetry-folded transposition table
+# -----------------------------
+class TranspositionTable:
+    """Cache of move masks keyed by canonical position.
+
+    Each entry keeps the mask as it was stored together with that position's
+    transform index; a hit from a different orientation is mapped back with
+    a single COMPOSE lookup.
+    """
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, x, o):
+        k, t = canonical(x, o)
+        entry = self._entries.get(k)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        mask, stored_t = entry
+        if stored_t == t:
+            return mask
+        return TRANSFORM[COMPOSE[stored_t][t]][mask]
+
+    def put(self, x, o, mask):
+        k, t = canonical(x, o)
+        entries = self._entries
+        if self.maxsize is not None and k not in entries and len(entries) >= self.maxsize:
+            del entries[next(iter(entries))]
+        entries[k] = (mask, t)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }